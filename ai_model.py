@@ -0,0 +1,174 @@
+"""Win-probability models for the AI Picks page.
+
+A model is anything with the scikit-learn interface: predict_proba (or
+decision_function / predict) on a 2-D feature matrix. Features are built
+column-wise from a normalized snapshot by build_features, and the whole board
+is scored in one call. With no model file the market baseline is used: the
+de-vigged probability averaged across books.
+
+Model files are pickles (.pkl / .pickle) or joblib dumps (.joblib). They are
+loaded once per process and reused by every session until the file changes.
+Unpickling runs code from the file, so only point AI_MODEL_PATH at models you trust.
+"""
+from __future__ import annotations
+import os
+import pickle
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from ev_engine import _bets, _column, _pair_implied, fair_probs, outcome_codes
+from ev_utils import american_to_decimal_array
+
+FEATURE_COLUMNS = ["implied_prob", "opp_implied_prob", "fair_prob", "consensus_prob",
+                   "decimal_odds", "is_home", "is_away", "is_draw", "market_size", "n_books"]
+
+PICK_COLUMNS = ["Date/Time", "Sport", "Matchup", "Sportsbook", "Odds", "IP%", "AI%", "Edge%", "Pick"]
+
+# ---------- FEATURES ----------
+def _joint_codes(df: pd.DataFrame, columns: list, rows: np.ndarray) -> tuple:
+    """Dense codes of the value combination in `columns` at `rows`, and each
+    combination's values per column. Whole columns are factorized before
+    indexing, which is much cheaper than gathering Arrow-backed strings first.
+    """
+    joint = np.zeros(len(rows), dtype=np.int64)
+    uniques = []
+    for c in columns:
+        codes, values = pd.factorize(df[c], use_na_sentinel=False)
+        joint = joint * len(values) + codes[rows]
+        uniques.append(np.asarray(values, dtype=object))
+    codes, first = pd.factorize(joint)
+    parts = []
+    for values in reversed(uniques):
+        first, k = np.divmod(first, len(values))
+        parts.append(values[k])
+    return codes, parts[::-1]
+
+def build_features(df: pd.DataFrame, method: str = "proportional") -> tuple:
+    """(features, rows): one FEATURE_COLUMNS row per snapshot row with a usable
+    price; `rows` are their positions in df.
+    """
+    price = _column(df, "price_american")
+    rows = np.flatnonzero(~np.isnan(price) & (price != 0))
+    price = price[rows]
+    implied, opp_implied = _pair_implied(price, _column(df, "opp_price_american")[rows])
+    fair = fair_probs(df, rows, implied, opp_implied, method)
+
+    side = df["side"].to_numpy(dtype=object)[rows] if "side" in df.columns else np.full(len(rows), None)
+    home = df["home_team"].to_numpy(dtype=object)[rows]
+    away = df["away_team"].to_numpy(dtype=object)[rows]
+    is_home = (side == "home") | (side == home)
+    is_away = (side == "away") | (side == away)
+    is_draw = pd.Series(side, dtype=object).astype(str).str.lower().isin(["draw", "tie"]).to_numpy()
+
+    # the same outcome quoted by several books: average fair probability and book count
+    outcome = outcome_codes(df, rows)
+    n_books = np.bincount(outcome)
+    consensus = np.bincount(outcome, np.nan_to_num(fair)) / np.maximum(np.bincount(outcome, ~np.isnan(fair)), 1)
+    size = df["market_size"].to_numpy(dtype=float)[rows] if "market_size" in df.columns else np.full(len(rows), 2.0)
+
+    features = pd.DataFrame({
+        "implied_prob": implied,
+        "opp_implied_prob": opp_implied,
+        "fair_prob": fair,
+        "consensus_prob": np.where(np.isnan(fair), np.nan, consensus[outcome]),
+        "decimal_odds": american_to_decimal_array(price),
+        "is_home": is_home.astype(float),
+        "is_away": is_away.astype(float),
+        "is_draw": is_draw.astype(float),
+        "market_size": size,
+        "n_books": n_books[outcome].astype(float),
+    })
+    return features, rows
+
+# ---------- MODELS ----------
+class MarketBaseline:
+    """Default model: the cross-book de-vigged probability, in sklearn form."""
+    feature_names_in_ = np.array(["consensus_prob"], dtype=object)
+    classes_ = np.array([0, 1])
+
+    def predict_proba(self, X) -> np.ndarray:
+        p = np.clip(np.nan_to_num(np.asarray(X, dtype=float)[:, 0], nan=0.5), 0.0, 1.0)
+        return np.column_stack([1 - p, p])
+
+_BASELINE = MarketBaseline()
+
+@lru_cache(maxsize=4)
+def _load(path: str, mtime: float):
+    if path.endswith(".joblib"):
+        import joblib  # installed alongside scikit-learn
+        return joblib.load(path)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def load_model(path: str | None = None):
+    """The model at `path` (default AI_MODEL_PATH), or MarketBaseline when unset.
+    Cached per process on (path, modification time), so a retrained file is picked up.
+    """
+    path = path if path is not None else os.getenv("AI_MODEL_PATH", "")
+    if not path:
+        return _BASELINE
+    path = os.path.abspath(path)
+    return _load(path, os.path.getmtime(path))
+
+def model_name(model) -> str:
+    return type(model).__name__
+
+def predict(model, features: pd.DataFrame) -> np.ndarray:
+    """Win probability for every feature row in one batched model call. Models
+    fitted on a DataFrame (feature_names_in_) get those columns, others get
+    FEATURE_COLUMNS in order.
+    """
+    if not len(features):
+        return np.empty(0)
+    names = getattr(model, "feature_names_in_", None)
+    X = features[list(names) if names is not None else FEATURE_COLUMNS].to_numpy(dtype=float)
+    if hasattr(model, "predict_proba"):
+        proba = np.asarray(model.predict_proba(X), dtype=float)
+        if proba.ndim == 1:
+            return proba
+        classes = list(getattr(model, "classes_", []))
+        return proba[:, classes.index(1) if 1 in classes else -1]
+    if hasattr(model, "decision_function"):
+        return 1.0 / (1.0 + np.exp(-np.asarray(model.decision_function(X), dtype=float)))
+    return np.clip(np.asarray(model.predict(X), dtype=float), 0.0, 1.0)
+
+# ---------- TABLE ----------
+def _pct(x: np.ndarray) -> pd.Categorical:
+    """'52.4%' labels; a board has few distinct tenths of a percent, so each is formatted once."""
+    tenths = np.round(np.nan_to_num(x, nan=0.0) * 1000).astype(np.int64)
+    uniques, codes = np.unique(tenths, return_inverse=True)
+    return pd.Categorical.from_codes(codes, [f"{u / 10:.1f}%" for u in uniques])
+
+def _labels(df: pd.DataFrame, columns: list, rows: np.ndarray, fmt) -> pd.Categorical:
+    """fmt(*values) of `columns`, formatted once per distinct combination."""
+    codes, parts = _joint_codes(df, columns, rows)
+    # fill per distinct value: fillna on an interned (categorical) column rejects a new category
+    parts = [np.where(pd.isna(values), "Unknown", values) for values in parts]
+    labels = pd.Index([fmt(*c) for c in zip(*parts)])
+    # distinct combinations can share a label (e.g. two events, one matchup)
+    label_codes, unique_labels = pd.factorize(labels)
+    return pd.Categorical.from_codes(label_codes[codes], unique_labels)
+
+def picks_table(df: pd.DataFrame, model, method: str = "proportional") -> pd.DataFrame:
+    """AI Picks rows for every priced outcome in the snapshot."""
+    features, rows = build_features(df, method)
+    if not len(rows):
+        return pd.DataFrame(columns=PICK_COLUMNS)
+    ai_prob = predict(model, features)
+    implied = features["implied_prob"].to_numpy()
+    edge = ai_prob - implied
+    # ai_prob is the win probability of the row's own outcome, so the pick is that
+    # outcome when the model sees an edge on it, and a pass otherwise
+    bets = pd.Series(np.asarray(_bets(df, rows), dtype=object))
+    pick = np.where(edge > 0, bets, "Pass (" + bets + ")")
+    return pd.DataFrame({
+        "Date/Time": _labels(df, ["commence_time"], rows, str),
+        "Sport": _labels(df, ["sport_key"], rows, lambda sport: str(sport).upper()),
+        "Matchup": _labels(df, ["home_team", "away_team"], rows, lambda home, away: f"{home} vs {away}"),
+        "Sportsbook": _labels(df, ["book"], rows, str),
+        "Odds": _column(df, "price_american")[rows],
+        "IP%": _pct(implied),
+        "AI%": _pct(ai_prob),
+        "Edge%": _pct(edge),
+        "Pick": pick,
+    })
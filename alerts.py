@@ -0,0 +1,381 @@
+"""Edge alerts from each scored snapshot the scanner publishes.
+
+    ALERT_SINKS=stdout,file:alerts.jsonl,webhook:https://hooks.example.com/x python -m scanner
+    ALERT_RULES=rules.json   # optional: list of AlertRule fields, else one rule at MIN_EDGE
+
+The scanner hands every scored board to AlertDispatcher.submit, which queues it
+for an asyncio loop on a background thread, so polling never waits on delivery.
+There each board is matched against the rules (min edge, books, sports, stake),
+alerts already sent for the same (event, book, bet, price) are dropped, and the
+rest go to every sink at once. A sink sends at most `rate` batches a minute;
+alerts that arrive while it is throttled go out together in its next batch.
+"""
+from __future__ import annotations
+import asyncio
+import http.client
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+import numpy as np
+import pandas as pd
+from ev_engine import bet_label
+from odds_snapshot import sport_keys
+import instrument
+
+log = logging.getLogger("alerts")
+
+DEDUP_COLUMNS = ["event_id", "book", "market", "line", "side", "price_american"]
+ALERT_COLUMNS = DEDUP_COLUMNS + ["sport_key", "commence_time", "home_team", "away_team", "point", "edge"]
+DEDUP_SECONDS = 12 * 3600  # an alert isn't repeated for this long unless its price moves
+RATE_PER_MINUTE = 30.0
+BURST = 5
+
+# ---------- RULES ----------
+class AlertRule:
+    """Which scored rows are worth an alert. Stakes are sized like the EV Finder:
+    full Kelly x kelly_cap x bankroll. Empty books / sports mean all of them;
+    sports may be short aliases ('nba').
+    """
+
+    def __init__(self, name: str = "default", min_edge: float = 0.02, books=(), sports=(),
+                 min_stake: float = 0.0, kelly_cap: float = 0.25, bankroll: float = 1000.0):
+        self.name = name
+        self.min_edge = float(min_edge)
+        self.books = list(books)
+        self.sports = sport_keys(sports)
+        self.min_stake = float(min_stake)
+        self.kelly_cap = float(kelly_cap)
+        self.bankroll = float(bankroll)
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> "AlertRule":
+        return cls(**spec)
+
+    def stakes(self, scored: pd.DataFrame, rows: np.ndarray) -> np.ndarray:
+        return np.round(scored["full_kelly"].to_numpy(dtype=float)[rows] * self.kelly_cap * self.bankroll, 2)
+
+    def rows(self, scored: pd.DataFrame) -> np.ndarray:
+        """Positions in `scored` (score_snapshot rows) that pass the rule. Cheap
+        numeric cuts come first, so only the survivors' book and sport are read.
+        """
+        # same cut as the EV Finder, which compares the rounded edge %
+        rows = np.flatnonzero(np.round(scored["edge"].to_numpy(dtype=float) * 100, 2) >= self.min_edge * 100)
+        if self.min_stake > 0:
+            rows = rows[self.stakes(scored, rows) >= self.min_stake]
+        for column, wanted in (("book", self.books), ("sport_key", self.sports)):
+            if wanted and len(rows):
+                rows = rows[np.isin(np.asarray(scored[column].array.take(rows), dtype=object), wanted)]
+        return rows
+
+def load_rules(path: str | None = None) -> list:
+    """Rules from a JSON list (default ALERT_RULES), or one rule from MIN_EDGE,
+    KELLY_FRACTION and BOOKS.
+    """
+    path = path if path is not None else os.getenv("ALERT_RULES", "")
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return [AlertRule.from_dict(spec) for spec in json.load(f)]
+    books = [b.strip() for b in os.getenv("BOOKS", "").split(",") if b.strip()]
+    return [AlertRule(min_edge=float(os.getenv("MIN_EDGE", "0.02")),
+                      kelly_cap=float(os.getenv("KELLY_FRACTION", "0.25")), books=books)]
+
+def match(scored: pd.DataFrame, rules: list) -> tuple:
+    """(rows, rule index, stake) for each scored row that passes any rule; a row
+    passing several is credited to the first.
+    """
+    rule_of = np.full(len(scored), -1, dtype=np.int64)
+    stake = np.zeros(len(scored))
+    for i, rule in enumerate(rules):
+        rows = rule.rows(scored)
+        rows = rows[rule_of[rows] < 0]
+        rule_of[rows] = i
+        stake[rows] = rule.stakes(scored, rows)
+    rows = np.flatnonzero(rule_of >= 0)
+    return rows, rule_of[rows], stake[rows]
+
+def gather(scored: pd.DataFrame, rows: np.ndarray, columns: list = ALERT_COLUMNS) -> dict:
+    """`columns` at `rows` as Python lists (missing values as None). Matched rows
+    are few, so from here on plain Python beats pandas' per-call overhead.
+    """
+    out = {}
+    for c in columns:
+        if c not in scored.columns:
+            out[c] = [None] * len(rows)
+        elif pd.api.types.is_numeric_dtype(scored[c].dtype):
+            values = scored[c].to_numpy()[rows]
+            out[c] = [None if v != v else v for v in values.tolist()]
+        else:
+            out[c] = scored[c].array.take(rows).to_numpy(dtype=object).tolist()
+    return out
+
+def alert_records(cols: dict, rule_of: np.ndarray, stake: np.ndarray, rules: list) -> list:
+    """One JSON-ready dict per row of the gathered ALERT_COLUMNS."""
+    return [{
+        "rule": rules[rule_of[i]].name, "sport": cols["sport_key"][i], "event_id": cols["event_id"][i],
+        "commence_time": str(cols["commence_time"][i]),
+        "matchup": f"{cols['away_team'][i]} vs {cols['home_team'][i]}", "book": cols["book"][i],
+        "bet": bet_label(cols["side"][i], cols["home_team"][i], cols["away_team"][i],
+                         cols["point"][i], cols["market"][i]),
+        "odds": int(cols["price_american"][i]), "edge_pct": round(cols["edge"][i] * 100, 2),
+        "stake": float(stake[i]),
+    } for i in range(len(rule_of))]
+
+# ---------- DEDUP ----------
+class Seen:
+    """Alert keys (DEDUP_COLUMNS values) sent in the last `ttl` seconds, so a
+    price move is a new alert while an unchanged quote stays quiet.
+    """
+
+    def __init__(self, ttl: float = DEDUP_SECONDS):
+        self.ttl = ttl
+        self._until = {}  # key -> expiry; insertion order is expiry order
+
+    def fresh(self, cols: dict, now: float | None = None) -> list:
+        """Positions in the gathered columns not alerted yet, which are remembered from now on."""
+        now = time.time() if now is None else now
+        while self._until:
+            key = next(iter(self._until))
+            if self._until[key] > now:
+                break
+            del self._until[key]
+        keep = []
+        for i, key in enumerate(zip(*(cols[c] for c in DEDUP_COLUMNS))):
+            if key not in self._until:  # also one alert per key within a board
+                self._until[key] = now + self.ttl
+                keep.append(i)
+        return keep
+
+# ---------- SINKS ----------
+class Sink:
+    """Delivers batches of alerts, at most `rate` per minute after a burst of
+    `burst`; what arrives while throttled is held and sent with the next batch.
+    Subclasses implement send().
+    """
+
+    def __init__(self, rate: float = RATE_PER_MINUTE, burst: int = BURST):
+        self.rate = rate / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+        self.pending = []
+        self._flush = None
+        self.sent = self.failed = 0
+
+    def __repr__(self) -> str:
+        return type(self).__name__
+
+    async def send(self, alerts: list):
+        raise NotImplementedError
+
+    def _take(self) -> float:
+        """0 if a batch may go now (and spend its token), else seconds to wait."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def deliver(self, alerts: list) -> bool:
+        """Send alerts (plus any held ones) now, or hold them if throttled; True when sent."""
+        self.pending.extend(alerts)
+        if not self.pending or self._flush is not None:
+            return False
+        wait = self._take()
+        if wait:
+            self._flush = asyncio.get_running_loop().call_later(wait, self._later)
+            return False
+        batch, self.pending = self.pending, []
+        try:
+            await self.send(batch)
+            self.sent += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            log.exception("%r failed to deliver %d alerts", self, len(batch))
+            return False
+        return True
+
+    def _later(self):
+        self._flush = None
+        asyncio.ensure_future(self.deliver([]))
+
+    def close(self):
+        pass
+
+class StdoutSink(Sink):
+    async def send(self, alerts: list):
+        for a in alerts:
+            print(f"[{a['rule']}] {a['sport']} {a['matchup']} · {a['bet']} {a['odds']:+d} @ {a['book']} "
+                  f"edge {a['edge_pct']:.2f}% stake ${a['stake']:.2f}", file=sys.stdout)
+        sys.stdout.flush()
+
+class FileSink(Sink):
+    """Appends one JSON line per alert."""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    async def send(self, alerts: list):
+        self.file.write("".join(json.dumps(a) + "\n" for a in alerts))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class WebhookSink(Sink):
+    """POSTs {"alerts": [...]} as JSON over one kept-alive connection, in a worker
+    thread so a slow endpoint doesn't hold up the other sinks. http.client rather
+    than requests: on a local endpoint it is a few hundred microseconds a POST
+    instead of a few milliseconds.
+    """
+
+    def __init__(self, url: str, timeout: float = 5.0, **kwargs):
+        super().__init__(**kwargs)
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"webhook URL must be http(s): {url!r}")
+        self.url = url
+        self.timeout = timeout
+        self._target = (parts.scheme, parts.netloc, (parts.path or "/") + (f"?{parts.query}" if parts.query else ""))
+        self._conn = None
+
+    def __repr__(self) -> str:
+        return f"WebhookSink({self.url})"
+
+    def _connect(self):
+        scheme, netloc, _ = self._target
+        make = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return make(netloc, timeout=self.timeout)
+
+    def _post(self, body: bytes):
+        # a kept-alive connection the server has since closed fails once; retry on a fresh one
+        for attempt in (0, 1):
+            if self._conn is None:
+                self._conn = self._connect()
+            try:
+                self._conn.request("POST", self._target[2], body, {"Content-Type": "application/json"})
+                resp = self._conn.getresponse()
+                resp.read()
+            except (OSError, http.client.HTTPException):
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+                continue
+            if resp.status >= 400:
+                raise RuntimeError(f"webhook returned HTTP {resp.status}")
+            return
+
+    async def send(self, alerts: list):
+        await asyncio.to_thread(self._post, json.dumps({"alerts": alerts}).encode("utf-8"))
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+def make_sinks(spec: str | None = None, rate: float | None = None) -> list:
+    """Sinks from 'stdout,file:alerts.jsonl,webhook:https://…' (default ALERT_SINKS),
+    each throttled to `rate` batches a minute (default ALERT_RATE).
+    """
+    spec = spec if spec is not None else os.getenv("ALERT_SINKS", "")
+    rate = rate if rate is not None else float(os.getenv("ALERT_RATE", str(RATE_PER_MINUTE)))
+    sinks = []
+    for part in (p.strip() for p in spec.split(",")):
+        kind, _, target = part.partition(":")
+        if kind == "stdout":
+            sinks.append(StdoutSink(rate=rate))
+        elif kind == "file":
+            sinks.append(FileSink(target or "alerts.jsonl", rate=rate))
+        elif kind == "webhook":
+            sinks.append(WebhookSink(target, rate=rate))
+        elif part:
+            raise ValueError(f"unknown alert sink {part!r} (use stdout, file:PATH or webhook:URL)")
+    return sinks
+
+# ---------- DISPATCHER ----------
+class AlertDispatcher:
+    """Runs rules, dedup and sinks on its own asyncio loop thread.
+
+    submit() only enqueues, so it is safe from any thread and costs the caller
+    microseconds. The queue keeps the newest board only: if boards arrive faster
+    than they are handled, the stale one is skipped.
+    """
+
+    def __init__(self, rules: list, sinks: list, dedup_seconds: float = DEDUP_SECONDS):
+        self.rules = rules
+        self.sinks = sinks
+        self.seen = Seen(dedup_seconds)
+        self.skipped = 0
+        self.latency = []  # submit -> every sink done, seconds, one per board with alerts
+        self._loop = asyncio.new_event_loop()
+        self._queue = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="alerts", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._ready.set()
+        self._loop.run_until_complete(self._consume())
+
+    def _put(self, item):
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self.skipped += 1
+        self._queue.put_nowait(item)
+
+    def submit(self, scored: pd.DataFrame):
+        """Queue a scored board (score_snapshot rows) for alerting."""
+        self._loop.call_soon_threadsafe(self._put, (scored, time.perf_counter()))
+
+    async def _consume(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+            try:
+                await self.dispatch(*item)
+            except Exception:
+                log.exception("alert dispatch failed")
+        pending = [s.pending for s in self.sinks if s.pending]
+        if pending:
+            log.warning("%d throttled alerts not sent at shutdown", sum(map(len, pending)))
+
+    async def dispatch(self, scored: pd.DataFrame, submitted: float) -> list:
+        """Match, dedup and deliver one board; returns the alerts sent."""
+        with instrument.stage("alert_match", rows=len(scored)) as s:
+            rows, rule_of, stake = match(scored, self.rules)
+            # dedup on the key columns first; the rest is read only for alerts that go out
+            keep = self.seen.fresh(gather(scored, rows, DEDUP_COLUMNS))
+            alerts = alert_records(gather(scored, rows[keep]), rule_of[keep], stake[keep], self.rules)
+            s["rows"] = len(alerts)
+        if alerts:
+            await asyncio.gather(*(sink.deliver(alerts) for sink in self.sinks))
+            self.latency.append(time.perf_counter() - submitted)
+            instrument.record("alert_latency", self.latency[-1], len(alerts))
+            del self.latency[:-1000]
+        return alerts
+
+    def close(self, timeout: float = 10.0):
+        """Finish the queued board, then stop the loop and close the sinks."""
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+            self._thread.join(timeout)
+        for sink in self.sinks:
+            sink.close()
+
+def dispatcher_from_env() -> AlertDispatcher | None:
+    """An AlertDispatcher for ALERT_SINKS and ALERT_RULES, or None when no sinks are set."""
+    sinks = make_sinks()
+    if not sinks:
+        return None
+    return AlertDispatcher(load_rules(), sinks, float(os.getenv("ALERT_DEDUP_SECONDS", str(DEDUP_SECONDS))))
@@ -63,12 +63,12 @@ with col1:
     st.page_link("pages/EV_Finder.py", label="Open")
 
 with col2:
-    st.markdown("### Arbitrage (coming soon)")
-    st.button("Coming soon", disabled=True)
+    st.markdown("### Arbitrage")
+    st.page_link("pages/Arbitrage.py", label="Open")
 
 with col3:
-    st.markdown("### Parlay Builder (coming soon)")
-    st.button("Coming soon", disabled=True)
+    st.markdown("### Parlay Builder")
+    st.page_link("pages/Parlay_Builder.py", label="Open")
 
 # --- FOOTER ---
 footer()
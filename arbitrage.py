@@ -0,0 +1,106 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from ev_engine import safe_float_array, _matchups, _bets, outcome_codes
+from ev_utils import american_to_decimal_array
+
+ARB_COLUMNS = ["Arb #", "Date/Time", "Matchup", "Market", "Outcome", "Sportsbook",
+               "Odds (American)", "Stake $", "Payout $", "Profit %"]
+
+def _joint(left: np.ndarray, right: np.ndarray, right_size: int) -> np.ndarray:
+    """Dense int codes of (left, right) pairs of non-negative codes."""
+    return pd.factorize(left.astype(np.int64) * (right_size + 1) + right)[0]
+
+def expected_outcomes(df: pd.DataFrame, rows: np.ndarray) -> np.ndarray:
+    """Outcomes the market of each row must have by its key: 3 for three-way
+    markets (soccer moneylines, '*3_way' keys), so one missing its draw quote is
+    never complete; 0 where the key doesn't say.
+    """
+    if "market" not in df.columns:
+        return np.zeros(len(rows), dtype=np.int64)
+    key, keys = pd.factorize(df["market"], use_na_sentinel=False)
+    three = np.array(["3_way" in str(k) for k in keys], dtype=bool)[key[rows]]
+    if "sport_key" in df.columns:
+        sport, sports = pd.factorize(df["sport_key"], use_na_sentinel=False)
+        soccer = np.array([str(s).startswith("soccer") for s in sports], dtype=bool)[sport[rows]]
+        three |= soccer & np.array([k == "h2h" for k in keys], dtype=bool)[key[rows]]
+    return np.where(three, 3, 0)
+
+def best_prices(df: pd.DataFrame) -> dict | None:
+    """Best price per (event, market, line, outcome) across all books.
+
+    Returns arrays indexed by outcome: 'row' (position in df of the best quote),
+    'decimal' (its decimal odds) and 'market' (dense id of its event/market/line),
+    plus 'market_complete' indexed by market: every outcome of it is quoted
+    somewhere. None if no row has a usable price.
+    """
+    price = safe_float_array(df["price_american"])
+    rows = np.flatnonzero(~np.isnan(price) & (price != 0))
+    if not len(rows):
+        return None
+    decimal = american_to_decimal_array(price[rows])
+    market = outcome_codes(df, rows, ["event_id", "market", "line"])
+    side, sides = pd.factorize(df["side"], use_na_sentinel=False)
+    outcome = _joint(market, side[rows], len(sides))
+    n_outcomes = outcome.max() + 1
+
+    # scatter-max instead of a sort: best decimal per outcome, then the first row quoting it
+    best_decimal = np.full(n_outcomes, -np.inf)
+    np.maximum.at(best_decimal, outcome, decimal)
+    is_best = decimal == best_decimal[outcome]
+    best = np.full(n_outcomes, len(rows))
+    np.minimum.at(best, outcome[is_best], np.flatnonzero(is_best))
+
+    n_markets = market.max() + 1
+    best_market = market[best]
+    quoted = np.bincount(best_market, minlength=n_markets)
+    # a book listing the whole market tells us how many outcomes it has; CSV rows
+    # come one outcome at a time (market_size 1), so the market key sets a floor
+    expected = quoted.copy()
+    if "market_size" in df.columns:
+        np.maximum.at(expected, market, df["market_size"].to_numpy(dtype=np.int64)[rows])
+    np.maximum.at(expected, market, expected_outcomes(df, rows))
+    return {
+        "row": rows[best],
+        "decimal": best_decimal,
+        "market": best_market,
+        "market_complete": (quoted >= 2) & (quoted == expected),
+    }
+
+def find_arbs(df: pd.DataFrame, total_stake: float = 100.0, min_profit: float = 0.0) -> pd.DataFrame:
+    """Markets whose best prices across books imply less than 100% in total.
+
+    One row per leg, with the stake split that pays the same on every outcome:
+    stake_i = total_stake * (1 / d_i) / sum(1 / d). Sorted by profit, best first.
+    """
+    best = best_prices(df) if not df.empty else None
+    if best is None:
+        return pd.DataFrame(columns=ARB_COLUMNS)
+    market, inverse = best["market"], 1.0 / best["decimal"]
+    book_sum = np.bincount(market, inverse, minlength=len(best["market_complete"]))
+    with np.errstate(divide="ignore"):
+        profit = 1.0 / book_sum - 1.0
+    is_arb = best["market_complete"] & (book_sum > 0) & (profit > min_profit)
+    legs = np.flatnonzero(is_arb[market])
+    if not len(legs):
+        return pd.DataFrame(columns=ARB_COLUMNS)
+
+    leg_market = market[legs]
+    order = np.lexsort((legs, leg_market, -profit[leg_market]))
+    legs, leg_market = legs[order], leg_market[order]
+    rows = best["row"][legs]
+    arb_no = np.cumsum(np.r_[True, leg_market[1:] != leg_market[:-1]])
+    stake = total_stake * inverse[legs] / book_sum[leg_market]
+    sub = df.iloc[rows]
+    return pd.DataFrame({
+        "Arb #": arb_no,
+        "Date/Time": sub["commence_time"].to_numpy(dtype=object),
+        "Matchup": _matchups(sub),
+        "Market": sub["market"].to_numpy(dtype=object),
+        "Outcome": _bets(df, rows).to_numpy(dtype=object),
+        "Sportsbook": sub["book"].to_numpy(dtype=object),
+        "Odds (American)": safe_float_array(sub["price_american"]),
+        "Stake $": np.round(stake, 2),
+        "Payout $": np.round(total_stake / book_sum[leg_market], 2),
+        "Profit %": np.round(profit[leg_market] * 100, 2),
+    })
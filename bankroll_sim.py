@@ -0,0 +1,117 @@
+"""Monte Carlo bankroll paths for choosing a Kelly cap.
+
+    python -m bankroll_sim positive_ev_opportunities.csv --caps 0.1,0.25,0.5,1 --paths 100000
+
+Each path bets a sequence drawn from the given bets. A bet stakes
+kelly_fraction * cap of the current bankroll. Every cap sees the same
+outcomes, so caps differ only by sizing. Paths are simulated as
+(paths x bets) arrays in chunks, spread over a process pool.
+"""
+from __future__ import annotations
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from ev_utils import american_to_decimal_array, kelly_fraction_array
+
+CHUNK_PATHS = 2000  # paths per task: chunk_paths x n_bets float32 stays a few MB
+
+def bets_from_table(table: pd.DataFrame) -> tuple:
+    """(true_prob, decimal) arrays from a compute_table / table_from_scores frame."""
+    prob = table["Expected Prob %"].to_numpy(dtype=float) / 100
+    decimal = american_to_decimal_array(table["Odds (American)"].to_numpy(dtype=float))
+    return prob, decimal
+
+def _simulate_chunk(prob, decimal, caps, n_paths, n_bets, seed, ruin_level, sample) -> dict:
+    rng = np.random.default_rng(seed)
+    n = len(prob)
+    if sample:
+        idx = rng.integers(n, size=(n_paths, n_bets), dtype=np.int32)
+    else:
+        idx = np.broadcast_to(np.arange(n_bets, dtype=np.int32) % n, (n_paths, n_bets))
+    # win/loss are drawn once and shared by every cap; outcome codes index a
+    # per-cap [log loss factors, log win factors] table in a single gather
+    won = rng.random((n_paths, n_bets), dtype=np.float32) < prob.astype(np.float32)[idx]
+    outcome = idx + won.astype(np.int32) * n
+    full = kelly_fraction_array(prob, decimal)
+    out = {"log_growth": [], "max_drawdown": [], "ruined": []}
+    for cap in caps:
+        stake = np.minimum(full * cap, 1.0)
+        with np.errstate(divide="ignore"):
+            table = np.concatenate([np.log1p(-stake), np.log1p(stake * (decimal - 1))]).astype(np.float32)
+        log_bankroll = table[outcome]
+        np.cumsum(log_bankroll, axis=1, out=log_bankroll)
+        peak = np.maximum(np.maximum.accumulate(log_bankroll, axis=1), 0.0)
+        out["log_growth"].append(log_bankroll[:, -1].astype(float))
+        out["max_drawdown"].append(1.0 - np.exp((log_bankroll - peak).min(axis=1).astype(float)))
+        out["ruined"].append(log_bankroll.min(axis=1) <= np.log(ruin_level))
+    return {k: np.stack(v) for k, v in out.items()}
+
+def simulate(prob, decimal, caps=(0.1, 0.25, 0.5, 1.0), n_paths: int = 10_000, n_bets: int = 1_000,
+             seed: int = 0, ruin_level: float = 0.1, sample: bool = True, workers: int | None = None,
+             chunk_paths: int = CHUNK_PATHS) -> dict:
+    """Simulate n_paths bankrolls over n_bets bets for each Kelly cap.
+
+    Bets are drawn with replacement from (prob, decimal) when sample=True,
+    otherwise taken in order and repeated as needed. A path counts as ruined once
+    its bankroll touches ruin_level of the start. Returns {'caps', and
+    (caps x paths) arrays 'log_growth', 'max_drawdown', 'ruined'}. The result
+    depends on seed and chunk_paths, not on the number of workers.
+    """
+    prob = np.asarray(prob, dtype=float)
+    decimal = np.asarray(decimal, dtype=float)
+    caps = [float(c) for c in caps]
+    if not len(prob):
+        raise ValueError("no bets to simulate")
+    sizes = [min(chunk_paths, n_paths - start) for start in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(prob, decimal, caps, size, n_bets, s, ruin_level, sample) for size, s in zip(sizes, seeds)]
+    workers = min(workers or os.cpu_count() or 1, len(args))
+    if workers <= 1:
+        parts = [_simulate_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_chunk, *zip(*args)))
+    out = {k: np.concatenate([p[k] for p in parts], axis=1) for k in parts[0]}
+    out["caps"] = np.array(caps)
+    out["n_bets"] = n_bets
+    return out
+
+def summarize(result: dict) -> pd.DataFrame:
+    """One row per cap: bankroll multiple quantiles, growth per bet, drawdown and ruin odds."""
+    growth = result["log_growth"]
+    multiple = np.exp(growth)
+    q05, q50, q95 = np.quantile(multiple, [0.05, 0.5, 0.95], axis=1)
+    drawdown = result["max_drawdown"]
+    return pd.DataFrame({
+        "Kelly Cap": result["caps"],
+        "Median Bankroll x": np.round(q50, 3),
+        "P5 Bankroll x": np.round(q05, 3),
+        "P95 Bankroll x": np.round(q95, 3),
+        "Growth / Bet %": np.round(np.expm1(growth.mean(axis=1) / result["n_bets"]) * 100, 4),
+        "Median Max Drawdown %": np.round(np.median(drawdown, axis=1) * 100, 2),
+        "P(Drawdown > 50%) %": np.round((drawdown > 0.5).mean(axis=1) * 100, 2),
+        "P(Ruin) %": np.round(result["ruined"].mean(axis=1) * 100, 2),
+    })
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bankroll_sim", description=__doc__.splitlines()[0])
+    parser.add_argument("table", help="CSV exported from the EV Finder (Expected Prob %%, Odds (American))")
+    parser.add_argument("--caps", default="0.1,0.25,0.5,1")
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--bets", type=int, default=1_000)
+    parser.add_argument("--ruin", type=float, default=0.1, help="ruin threshold as a fraction of the start")
+    parser.add_argument("--in-order", action="store_true", help="bet the table in order instead of resampling")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=0, help="processes (0 = all cores)")
+    args = parser.parse_args(argv)
+
+    prob, decimal = bets_from_table(pd.read_csv(args.table))
+    caps = [float(c) for c in args.caps.split(",") if c.strip()]
+    result = simulate(prob, decimal, caps, args.paths, args.bets, args.seed, args.ruin,
+                      sample=not args.in_order, workers=args.workers or None)
+    print(summarize(result).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
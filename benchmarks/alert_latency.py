@@ -0,0 +1,92 @@
+"""Snapshot-to-notification latency of the alert dispatcher against a local webhook.
+
+    python -m benchmarks.alert_latency                 # 10k-row boards, 50 rounds
+    python -m benchmarks.alert_latency --rows 100000 --rounds 20
+
+A stand-in webhook runs on 127.0.0.1 in this process. Each round moves the price
+of a few edges past the 2% rule, so the dedup lets just those through, and
+submits the whole board. It measures the time from submit() until the stand-in
+has read the POST body.
+"""
+from __future__ import annotations
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from alerts import AlertDispatcher, AlertRule, WebhookSink
+from benchmarks.synthetic import events
+from ev_engine import score_snapshot
+from odds_snapshot import attach_reference, flatten_events
+
+def webhook_standin():
+    """(server, received): a local HTTP server whose POSTs append
+    (perf_counter at receipt, alert count) to `received`.
+    """
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like a real webhook endpoint
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            received.append((time.perf_counter(), len(json.loads(body)["alerts"])))
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+def run(n_rows: int, rounds: int, moved: int = 20, seed: int = 0) -> dict:
+    server, received = webhook_standin()
+    url = f"http://127.0.0.1:{server.server_address[1]}/hook"
+    board = score_snapshot(attach_reference(flatten_events(events(n_rows, seed))), 0.03)
+    sink = WebhookSink(url, rate=1e9, burst=10 ** 9)  # measure delivery, not the throttle
+    dispatcher = AlertDispatcher([AlertRule(min_edge=0.02)], [sink])
+    rng = np.random.default_rng(seed)
+    price = board["price_american"].to_numpy(dtype=float)
+    edges = np.flatnonzero(board["edge"].to_numpy(dtype=float) >= 0.03)  # stay past the cut when moved
+    latencies, counts = [], []
+    try:
+        for i in range(rounds + 1):
+            rows = rng.choice(edges, min(moved, len(edges)), replace=False)
+            step = board.copy()
+            if i:
+                # a few edges at a new price; the rest were alerted in an earlier round
+                p = price.copy()
+                p[rows] = np.where(p[rows] > 0, p[rows] + i, p[rows] - i)
+                step["price_american"] = p
+            n_before = len(received)
+            submitted = time.perf_counter()
+            dispatcher.submit(step)
+            while len(received) == n_before:
+                time.sleep(0.0001)
+            if i:  # the first round alerts every edge and opens the connection
+                latencies.append(received[-1][0] - submitted)
+                counts.append(received[-1][1])
+    finally:
+        dispatcher.close()
+        server.shutdown()
+    ms = np.array(latencies) * 1000
+    return {"rows": len(board), "rounds": rounds, "alerts_per_round": float(np.median(counts)),
+            "median_ms": round(float(np.median(ms)), 3), "p95_ms": round(float(np.percentile(ms, 95)), 3),
+            "max_ms": round(float(ms.max()), 3)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.alert_latency", description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--moved", type=int, default=20, help="prices moved per round")
+    args = parser.parse_args(argv)
+    stats = run(args.rows, args.rounds, args.moved)
+    print(f"{stats['rows']} rows, {stats['alerts_per_round']:.0f} alerts per round: "
+          f"median {stats['median_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms, max {stats['max_ms']:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Pipeline benchmarks on synthetic boards.
+
+    python -m benchmarks.run                      # 1k and 100k rows
+    python -m benchmarks.run --sizes 1k,100k,1m
+    python -m benchmarks.run --compare            # last two stored runs side by side
+
+Every run is appended to benchmarks/results.jsonl with the git commit it was
+taken at, so a regression shows up as a jump between two commits.
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import events, csv_frame
+from ev_engine import base_table, compute_table, reference_prices
+from ev_utils import (
+    DEVIG_METHODS, devig_groups, kelly_fraction, kelly_fraction_array,
+    remove_vig_two_way_array, american_to_decimal_array,
+)
+from odds_snapshot import flatten_events, normalize_frame
+from arbitrage import find_arbs
+
+RESULTS = os.path.join(os.path.dirname(__file__), "results.jsonl")
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+SCALAR_LIMIT = 100_000  # per-row Python loops above this only measure patience
+
+def _timeit(fn, repeat: int) -> dict:
+    fn()  # warm caches and lazy imports
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return {"median_ms": round(float(np.median(times)) * 1000, 3), "min_ms": round(min(times) * 1000, 3)}
+
+def cases(n_rows: int, seed: int = 0) -> dict:
+    """name -> zero-argument callable, all over the same seeded board."""
+    evs = events(n_rows, seed)
+    raw = csv_frame(evs).astype(str)
+    snap = normalize_frame(raw)
+    price = snap["price_american"].to_numpy()
+    opp = snap["opp_price_american"].to_numpy()
+    p1, p2 = 1 / american_to_decimal_array(price), 1 / american_to_decimal_array(opp)
+    decimal = american_to_decimal_array(price)
+    base = base_table(snap, 0.03)
+    out = {
+        "flatten_events": lambda: flatten_events(evs),
+        "normalize_frame": lambda: normalize_frame(raw),
+        "compute_table": lambda: compute_table(snap, 0.25, 1000.0, 0.03, 0.0),
+        "base_table": lambda: base_table(snap, 0.03),
+        "BaseTable.view": lambda: base.view(0.25, 1000.0, 0.02),
+        "remove_vig_two_way_array": lambda: remove_vig_two_way_array(p1, p2),
+        "kelly_fraction_array": lambda: kelly_fraction_array(p1 / (p1 + p2), decimal),
+        "reference_prices": lambda: reference_prices(snap, "Pinnacle"),
+        "find_arbs": lambda: find_arbs(snap),
+    }
+    for method in DEVIG_METHODS:
+        out[f"devig_groups[{method}]"] = lambda m=method: devig_groups(p1, snap["market_id"].to_numpy(), m)
+    if len(snap) <= SCALAR_LIMIT:
+        fair, dec = (p1 / (p1 + p2)).tolist(), decimal.tolist()
+        out["kelly_fraction (scalar)"] = lambda: [kelly_fraction(p, d) for p, d in zip(fair, dec)]
+    return out
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def run(sizes, repeat: int = 5, seed: int = 0) -> dict:
+    results = {}
+    for label in sizes:
+        for name, fn in cases(SIZES[label], seed).items():
+            results[f"{name}@{label}"] = _timeit(fn, repeat if SIZES[label] < 1_000_000 else max(1, repeat // 2))
+            print(f"{name + '@' + label:<34} {results[f'{name}@{label}']['median_ms']:>10.2f} ms")
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "machine": f"{platform.system()} {platform.machine()} / {os.cpu_count()} cpus",
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "seed": seed,
+        "results": results,
+    }
+
+def load(path: str = RESULTS) -> list:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+def compare(before: dict, after: dict, threshold: float = 1.2):
+    """Print median timings of two runs; slowdowns beyond `threshold` are flagged."""
+    print(f"{'case':<34} {before['commit'] or '?':>10} {after['commit'] or '?':>10}   ratio")
+    for name, cur in after["results"].items():
+        old = before["results"].get(name)
+        if old is None:
+            print(f"{name:<34} {'-':>10} {cur['median_ms']:>10.2f}")
+            continue
+        ratio = cur["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        flag = "  << slower" if ratio > threshold else ""
+        print(f"{name:<34} {old['median_ms']:>10.2f} {cur['median_ms']:>10.2f}   {ratio:5.2f}x{flag}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,100k", help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results", default=RESULTS)
+    parser.add_argument("--no-save", action="store_true", help="don't append this run to the results file")
+    parser.add_argument("--compare", action="store_true", help="compare the last two stored runs and exit")
+    args = parser.parse_args(argv)
+
+    history = load(args.results)
+    if args.compare:
+        if len(history) < 2:
+            parser.error("need at least two stored runs to compare")
+        compare(history[-2], history[-1])
+        return
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes {unknown}; choose from {list(SIZES)}")
+    record = run(sizes, args.repeat, args.seed)
+    if history:
+        print()
+        compare(history[-1], record)
+    if not args.no_save:
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Seeded synthetic odds boards for benchmarks.
+
+    python -m benchmarks.synthetic --rows 100000 --format csv --out board.csv
+    python -m benchmarks.synthetic --rows 1000 --format json --out board.json
+
+Events look like The Odds API /odds response (h2h only, 3-way for soccer);
+every book prices the same fair line with its own margin and noise, and
+Pinnacle doubles as the reference price in the CSV form.
+"""
+from __future__ import annotations
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from odds_snapshot import flatten_events
+
+# sport key -> outcomes per h2h market
+SPORTS = {
+    "americanfootball_nfl": 2,
+    "basketball_nba": 2,
+    "baseball_mlb": 2,
+    "icehockey_nhl": 2,
+    "soccer_epl": 3,
+}
+# book -> margin (overround) it builds into its prices
+BOOKS = {
+    "Pinnacle": 0.025, "DraftKings": 0.045, "FanDuel": 0.045, "BetMGM": 0.05, "Caesars": 0.05,
+    "PointsBet": 0.055, "BetRivers": 0.055, "Unibet": 0.05, "Bet365": 0.045, "BetUS": 0.06,
+}
+REF_BOOK = "Pinnacle"
+CSV_COLUMNS = ["sport_key", "commence_time", "home_team", "away_team", "book", "market", "side",
+               "price_american", "opp_price_american", "ref_price_american"]
+START = pd.Timestamp("2025-10-01T00:00:00Z")
+
+def _american(decimal: np.ndarray) -> np.ndarray:
+    american = np.where(decimal >= 2.0, (decimal - 1.0) * 100, -100.0 / (decimal - 1.0))
+    return np.rint(american).astype(int)
+
+def events(n_rows: int, seed: int = 0, books=None, coverage: float = 0.9) -> list:
+    """About n_rows outcome quotes of provider JSON (whole markets, so rarely exact).
+    Each book lists a given event with probability `coverage`.
+    """
+    books = list(books or BOOKS)
+    rng = np.random.default_rng(seed)
+    sports = list(SPORTS)
+    per_event = np.mean([SPORTS[s] for s in sports]) * len(books) * coverage
+    n_events = max(1, int(round(n_rows / per_event)))
+
+    sport_idx = rng.integers(len(sports), size=n_events)
+    kickoff = START + pd.to_timedelta(rng.integers(0, 14 * 24 * 4, size=n_events) * 15, unit="min")
+    kickoff = kickoff.strftime("%Y-%m-%dT%H:%M:%SZ").tolist()
+    sizes = np.array([SPORTS[s] for s in sports])[sport_idx]
+
+    # every random draw up front: fair line per event, then each book's noisy, margined copy
+    fair = rng.gamma(4.0, size=(n_events, 3))
+    fair[sizes == 2, 2] = 0.0
+    fair /= fair.sum(axis=1, keepdims=True)
+    noisy = fair[:, None, :] * np.exp(rng.normal(0.0, 0.03, size=(n_events, len(books), 3)))
+    margin = np.array([BOOKS.get(b, 0.05) for b in books])[None, :, None]
+    implied = noisy / noisy.sum(axis=2, keepdims=True) * (1 + margin)
+    with np.errstate(divide="ignore"):
+        prices = _american(1.0 / np.clip(implied, 1e-3, 0.99)).tolist()
+    listed = (rng.random((n_events, len(books))) <= coverage).tolist()
+
+    out = []
+    for i in range(n_events):
+        sport = sports[sport_idx[i]]
+        tag = f"{sport[:3].upper()} {i}"
+        home, away = f"Home {tag}", f"Away {tag}"
+        names = [home, away, "Draw"][:sizes[i]]
+        bookmakers = [
+            {"key": book.lower(), "title": book, "markets": [{"key": "h2h", "outcomes": [
+                {"name": name, "price": p} for name, p in zip(names, prices[i][b])]}]}
+            for b, book in enumerate(books) if listed[i][b]
+        ]
+        out.append({
+            "id": f"{seed}-{i:07d}", "sport_key": sport, "commence_time": kickoff[i],
+            "home_team": home, "away_team": away, "bookmakers": bookmakers,
+        })
+    return out
+
+def csv_frame(evs: list) -> pd.DataFrame:
+    """The events in sample_odds.csv form: string prices like '+110', opponent
+    price from the same book and REF_BOOK's price for the same outcome.
+    """
+    snap = flatten_events(evs)
+    ref = snap[snap["book"] == REF_BOOK].set_index(["event_id", "side"])["price_american"]
+    keys = pd.MultiIndex.from_arrays([snap["event_id"], snap["side"]])
+    snap["ref_price_american"] = ref.reindex(keys).to_numpy()
+    frame = snap[CSV_COLUMNS].copy()
+    for c in ["price_american", "opp_price_american", "ref_price_american"]:
+        codes, uniques = pd.factorize(frame[c].to_numpy(dtype=float))
+        labels = np.array([f"{u:+.0f}" for u in uniques] + [""], dtype=object)
+        frame[c] = labels[codes]  # missing (-1) picks the trailing ""
+    return frame
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic", description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args(argv)
+    evs = events(args.rows, args.seed)
+    if args.format == "json":
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(evs, f)
+    else:
+        csv_frame(evs).to_csv(args.out, index=False)
+    print(f"wrote {sum(len(m['outcomes']) for e in evs for b in e['bookmakers'] for m in b['markets'])} rows to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Bet journal: bets logged from EV Finder rows, with closing line value and realized ROI.
+
+    bets = load()                                         # BET_JOURNAL, default bets.csv
+    index = history_index(bets["event_id"])               # odds_history of the bets' events
+    report = journal_report(bets, index)                  # + closing price, CLV, profit
+    summary(report)
+
+A bet is matched to the last price its book showed for the same outcome before
+the game started (the closing line), by an as-of join on a sorted
+(outcome, fetched_at) index of the odds history. Beating the close is the best
+early sign that bets have an edge: results take thousands of bets to tell,
+CLV only a few hundred.
+"""
+from __future__ import annotations
+import glob
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import odds_history
+from ev_engine import bet_label
+from odds_snapshot import parse_times
+from ev_utils import american_to_decimal_array, remove_vig_two_way_array
+
+JOURNAL_PATH = os.getenv("BET_JOURNAL", "bets.csv")
+JOURNAL_COLUMNS = ["bet_id", "placed_at", "sport_key", "event_id", "commence_time", "home_team", "away_team",
+                   "book", "market", "side", "point", "bet", "price_american", "stake", "true_prob", "result"]
+JOIN_COLUMNS = ["event_id", "book", "market", "side", "point"]  # one outcome at one book
+RESULTS = ["", "win", "loss", "push", "void"]
+
+# ---------- JOURNAL FILE ----------
+def load(path: str | None = None) -> pd.DataFrame:
+    path = path or JOURNAL_PATH
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=JOURNAL_COLUMNS)
+    bets = pd.read_csv(path, dtype={c: str for c in JOURNAL_COLUMNS if c not in ("point", "price_american",
+                                                                              "stake", "true_prob")},
+                       keep_default_na=False, na_values={"point": [""]})
+    return bets.reindex(columns=JOURNAL_COLUMNS)
+
+def _write(bets: pd.DataFrame, path: str):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    bets[JOURNAL_COLUMNS].to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+def append(entries: list, path: str | None = None) -> pd.DataFrame:
+    """Add bets (entry_from_row dicts) to the journal; returns the whole journal."""
+    path = path or JOURNAL_PATH
+    bets = pd.concat([load(path), pd.DataFrame(entries, columns=JOURNAL_COLUMNS)], ignore_index=True)
+    _write(bets, path)
+    return bets
+
+def settle(bet_ids, result: str, path: str | None = None) -> pd.DataFrame:
+    """Record a result (win, loss, push, void or "" to reopen) for the given bets."""
+    if result not in RESULTS:
+        raise ValueError(f"result must be one of {RESULTS}")
+    path = path or JOURNAL_PATH
+    bets = load(path)
+    bets.loc[bets["bet_id"].isin(list(bet_ids)), "result"] = result
+    _write(bets, path)
+    return bets
+
+def entry_from_row(snapshot: pd.DataFrame, row, stake: float | None = None, placed_at: float | None = None) -> dict:
+    """Journal entry for one EV Finder table row, with the outcome it was quoted
+    for (event, market, side, point) looked up in the snapshot the table came from.
+    Raises ValueError if the row is no longer in the snapshot.
+    """
+    price = float(row["Odds (American)"])
+    hit = np.flatnonzero((snapshot["commence_time"].astype(str) == str(row["Date/Time"])).to_numpy()
+                         & (snapshot["book"] == row["Sportsbook"]).to_numpy()
+                         & (snapshot["price_american"].to_numpy(dtype=float) == price))
+    for i in hit:
+        r = snapshot.iloc[i]
+        point = r.get("point")
+        label = bet_label(r.get("side"), r["home_team"], r["away_team"], point, r.get("market"))
+        if label == row["Bet"] and f"{r['away_team']} vs {r['home_team']}" == row["Matchup"]:
+            return {
+                "bet_id": uuid.uuid4().hex[:12],
+                "placed_at": pd.Timestamp(placed_at or time.time(), unit="s", tz="UTC").isoformat(),
+                "sport_key": r.get("sport_key"), "event_id": r["event_id"],
+                "commence_time": str(r["commence_time"]), "home_team": r["home_team"],
+                "away_team": r["away_team"], "book": r["book"], "market": r.get("market", "h2h"),
+                "side": r.get("side"), "point": point, "bet": label, "price_american": price,
+                "stake": float(row["Stake $"] if stake is None else stake),
+                "true_prob": float(row["Expected Prob %"]) / 100, "result": "",
+            }
+    raise ValueError(f"{row['Matchup']} · {row['Bet']} @ {row['Sportsbook']} is not in the current snapshot")
+
+# ---------- CLOSING LINE ----------
+def _epoch_ms(values: pd.Series) -> np.ndarray:
+    """int64 UTC epoch milliseconds of datetimes or ISO strings; missing -> int64 max.
+    A datetime column is converted without going through to_datetime's parser.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(values.dtype):
+        values = parse_times(values)
+    elif values.dt.tz is not None:
+        values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+    ms = values.to_numpy(dtype="datetime64[ms]").view(np.int64)
+    return np.where(values.isna().to_numpy(), np.iinfo(np.int64).max, ms)
+
+def _column(df: pd.DataFrame, c: str):
+    return df[c] if c in df.columns else pd.Series(np.nan, index=df.index)
+
+class ClosingIndex:
+    """Odds history sorted by (outcome, fetched_at) for as-of lookups of closing quotes.
+
+    Building it factorizes and sorts the history once; lookup() then maps each
+    bet's outcome into the history's codes and finds its closing row with one
+    searchsorted, so pricing thousands of bets costs milliseconds however long
+    the history is.
+    """
+
+    def __init__(self, history: pd.DataFrame):
+        self.history = history
+        joint = np.zeros(len(history), dtype=np.int64)
+        self._steps = []  # per JOIN_COLUMNS entry: (its values, their count, dense joint codes so far)
+        for c in JOIN_COLUMNS:
+            codes, uniques = pd.factorize(_column(history, c), use_na_sentinel=False)
+            # re-densify after every column so the combined key never overflows
+            joint, dense = pd.factorize(joint * len(uniques) + codes)
+            kind = float if pd.api.types.is_float_dtype(uniques.dtype) else object
+            values = pd.Index(np.asarray(uniques, dtype=kind), dtype=kind)
+            self._steps.append((values, len(uniques), pd.Index(dense)))
+        t = _epoch_ms(history["fetched_at"]) if len(history) else np.zeros(0, dtype=np.int64)
+        self.scale = 1  # ms per time unit; seconds when (outcome, ms) would not fit an int64
+        self.t0 = int(t.min()) if len(t) else 0
+        self.span = int(t.max() - self.t0) + 2 if len(t) else 1
+        if (len(joint) + 1) * self.span >= 2 ** 62:
+            self.scale, self.t0 = 1000, self.t0 // 1000
+            self.span = int(t.max() // 1000 - self.t0) + 2
+        packed = joint * self.span + (t // self.scale - self.t0)
+        self.order = np.argsort(packed, kind="stable")
+        self.packed = packed[self.order]
+        self.codes = joint[self.order]
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+    def lookup(self, bets: pd.DataFrame, now: float | None = None) -> np.ndarray:
+        """Position in the history of each bet's closing quote: the last row for the
+        same JOIN_COLUMNS fetched strictly before the bet's commence_time (or now,
+        for games not started yet); -1 where the history has none.
+        """
+        if not len(bets) or not len(self.history):
+            return np.full(len(bets), -1, dtype=np.int64)
+        joint = np.zeros(len(bets), dtype=np.int64)
+        for c, (values, size, dense) in zip(JOIN_COLUMNS, self._steps):
+            # each distinct bet value is looked up once
+            local, uniques = pd.factorize(_column(bets, c), use_na_sentinel=False)
+            if values.dtype == float:
+                uniques = pd.to_numeric(pd.Series(np.asarray(uniques, dtype=object)), errors="coerce")
+            codes = values.get_indexer(pd.Index(np.asarray(uniques, dtype=values.dtype), dtype=values.dtype))[local]
+            joint = np.where(codes >= 0, dense.get_indexer(joint * size + codes), -1)
+            joint = np.where(joint >= 0, joint, -1)
+        cut = np.minimum(_epoch_ms(bets["commence_time"]), int((time.time() if now is None else now) * 1000))
+        offset = np.clip(cut // self.scale - self.t0, -1, self.span - 1)
+        at = np.searchsorted(self.packed, np.maximum(joint, 0) * self.span + offset, side="left") - 1
+        found = (joint >= 0) & (at >= 0)
+        found[found] = self.codes[at[found]] == joint[found]
+        return np.where(found, self.order[np.maximum(at, 0)], -1)
+
+def closing_rows(bets: pd.DataFrame, history: pd.DataFrame, now: float | None = None) -> np.ndarray:
+    """ClosingIndex(history).lookup(bets); keep the index to price more bets against the same history."""
+    return ClosingIndex(history).lookup(bets, now)
+
+# ---------- HISTORY ----------
+_indexes = OrderedDict()  # (root, events, history files signature) -> ClosingIndex, most recent last
+_indexes_lock = threading.Lock()
+MAX_INDEXES = 4
+HISTORY_COLUMNS = ["fetched_at"] + JOIN_COLUMNS + ["price_american", "opp_price_american"]
+
+def history_index(event_ids, root: str | None = None) -> ClosingIndex:
+    """ClosingIndex over the odds history of these events, read and built again
+    only when a history file is added, compacted or removed.
+    """
+    root = root or odds_history.HISTORY_DIR
+    files = glob.glob(os.path.join(root, "sport_key=*", "date=*", "*.parquet"))
+    signature = (len(files), max((os.path.getmtime(f) for f in files), default=0.0))
+    events = frozenset(e for e in event_ids if isinstance(e, str) and e)
+    key = (os.path.abspath(root), events, signature)
+    with _indexes_lock:
+        if key in _indexes:
+            _indexes.move_to_end(key)
+            return _indexes[key]
+    history = odds_history.scan(event_ids=sorted(events), columns=HISTORY_COLUMNS, root=root) if events and files \
+        else pd.DataFrame(columns=HISTORY_COLUMNS)
+    index = ClosingIndex(history)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+# ---------- REPORT ----------
+def journal_report(bets: pd.DataFrame, history, now: float | None = None) -> pd.DataFrame:
+    """The journal plus closing_price, clv (bet decimal / closing decimal - 1),
+    close_ev (the bet's expected value at the de-vigged closing line, when the
+    opposing closing price is known) and profit (NaN while a bet is open).
+    `history` is an odds_history.scan frame or a ClosingIndex built from one.
+    """
+    index = history if isinstance(history, ClosingIndex) else ClosingIndex(history)
+    history = index.history
+    report = bets.reset_index(drop=True).copy()
+    close = index.lookup(report, now)
+    found = close >= 0
+    price = np.full(len(report), np.nan)
+    opp = np.full(len(report), np.nan)
+    if found.any():
+        price[found] = history["price_american"].to_numpy(dtype=float)[close[found]]
+        if "opp_price_american" in history.columns:
+            opp[found] = history["opp_price_american"].to_numpy(dtype=float)[close[found]]
+    bet_dec = american_to_decimal_array(report["price_american"].to_numpy(dtype=float))
+    fair, _ = remove_vig_two_way_array(1 / american_to_decimal_array(price), 1 / american_to_decimal_array(opp))
+
+    stake = report["stake"].to_numpy(dtype=float)
+    result = report["result"].fillna("").to_numpy(dtype=object)
+    profit = np.select([result == "win", result == "loss", np.isin(result, ["push", "void"])],
+                       [stake * (bet_dec - 1), -stake, 0.0], np.nan)
+    report["closing_price"] = price
+    report["clv"] = bet_dec / american_to_decimal_array(price) - 1
+    report["close_ev"] = fair * bet_dec - 1
+    report["profit"] = profit
+    return report
+
+def summary(report: pd.DataFrame) -> dict:
+    """Bets, staked, profit and realized ROI over settled bets; average CLV and
+    share of bets that beat the close over bets with a closing price.
+    """
+    settled = report["profit"].notna().to_numpy()
+    staked = float(report["stake"].to_numpy(dtype=float)[settled & (report["result"] != "void").to_numpy()].sum())
+    profit = float(report["profit"].to_numpy(dtype=float)[settled].sum())
+    clv = report["clv"].to_numpy(dtype=float)
+    closed = ~np.isnan(clv)
+    return {
+        "bets": len(report),
+        "settled": int(settled.sum()),
+        "staked": round(staked, 2),
+        "profit": round(profit, 2),
+        "roi": profit / staked if staked else float("nan"),
+        "with_close": int(closed.sum()),
+        "avg_clv": float(clv[closed].mean()) if closed.any() else float("nan"),
+        "beat_close": float((clv[closed] > 0).mean()) if closed.any() else float("nan"),
+    }
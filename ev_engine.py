@@ -0,0 +1,401 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from ev_utils import (
+    american_to_decimal, edge_decimal, kelly_fraction, estimate_true_prob_from_ref,
+    american_to_decimal_array, edge_decimal_array, kelly_fraction_array,
+    implied_prob_from_american_array, devig_groups,
+)
+
+# ---------- SAFE FLOAT ----------
+def safe_float(value):
+    try:
+        if value is None:
+            return None
+        s = str(value).strip()
+        if s == "" or s.lower() in ("nan", "none"):
+            return None
+        return float(s.replace("+", "")) if not s.startswith("-") else float(s)
+    except Exception:
+        return None
+
+def safe_float_array(values) -> np.ndarray:
+    """Column version of safe_float: unparseable entries (e.g. 'opp:+230') become NaN.
+    Odds columns repeat a handful of prices, so each distinct value is parsed once.
+    """
+    s = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        return s.to_numpy(dtype=float, na_value=np.nan)
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    parsed = np.array([safe_float(u) for u in uniques] + [None], dtype=float)
+    return parsed[codes]
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in df.columns:
+        return np.full(len(df), np.nan)
+    return safe_float_array(df[name])
+
+# ---------- OUTCOME KEYS ----------
+# one outcome of one line of one market; quotes of it from different books share the key
+OUTCOME_COLUMNS = ["event_id", "market", "line", "side"]
+
+def outcome_codes(df: pd.DataFrame, rows: np.ndarray, columns=OUTCOME_COLUMNS) -> np.ndarray:
+    """Dense int codes of the `columns` combination at `rows` (missing columns
+    are skipped). Whole columns are factorized before indexing by rows, which is
+    cheaper than gathering Arrow-backed strings first unless rows are a small subset.
+    """
+    key = np.zeros(len(rows), dtype=np.int64)
+    subset = len(rows) * 8 < len(df)
+    for c in columns:
+        if c not in df.columns:
+            continue
+        codes, uniques = pd.factorize(df[c].take(rows) if subset else df[c], use_na_sentinel=False)
+        if key.max(initial=0) >= 2 ** 62 // (len(uniques) + 1):
+            key = pd.factorize(key)[0]
+        key = key * (len(uniques) + 1) + (codes if subset else codes[rows])
+    return pd.factorize(key)[0]
+
+def bet_label(side, home, away, point=None, market=None) -> str:
+    """'Miami Heat', 'Miami Heat +3.5', 'Over 221.5' or 'Draw'."""
+    name = home if side == "home" else (away if side == "away" else side)
+    if point is None or point != point:  # None or NaN
+        return f"{name}"
+    return f"{name} {point:+g}" if "spread" in str(market) else f"{name} {point:g}"
+
+def _bets(df: pd.DataFrame, rows: np.ndarray | None = None):
+    """bet_label for `rows` (default all), formatted once per distinct (side, teams, point, market)."""
+    rows = np.arange(len(df)) if rows is None else rows
+    args = ("side", "home_team", "away_team", "point", "market")
+    columns = [c for c in args if c in df.columns]
+    codes = outcome_codes(df, rows, columns)
+    first = rows[np.unique(codes, return_index=True)[1]]
+    values = [df[c].take(first).to_numpy(dtype=object).tolist() if c in columns else [None] * len(first)
+              for c in args]
+    labels = pd.array([bet_label(*v) for v in zip(*values)], dtype=object)
+    return labels.take(codes)
+
+# ---------- MAIN COMPUTE ----------
+TABLE_COLUMNS = ["Date/Time", "Matchup", "Sportsbook", "Bet", "Odds (American)",
+                 "Implied Prob %", "Expected Prob %", "Edge %", "Stake $"]
+
+def fair_probs(df: pd.DataFrame, rows: np.ndarray, side_implied: np.ndarray,
+               opp_implied: np.ndarray, method: str = "proportional") -> np.ndarray:
+    """De-vigged probability for each scored row.
+
+    Rows whose whole event/book/market is present (snapshot market_id/market_size)
+    are de-vigged together as one N-way market; any other row falls back to the
+    pair (its price, its listed opponent price). All markets go through one batch.
+    """
+    k = len(rows)
+    fair = devig_groups(np.concatenate([side_implied, opp_implied]), np.tile(np.arange(k), 2), method)[:k]
+    if "market_id" in df.columns and "market_size" in df.columns:
+        codes, _ = pd.factorize(df["market_id"].to_numpy()[rows])
+        size = df["market_size"].to_numpy()[rows]
+        complete = (size >= 2) & (np.bincount(codes)[codes] == size)
+        if complete.any():
+            market_codes, _ = pd.factorize(codes[complete])
+            fair[complete] = devig_groups(side_implied[complete], market_codes, method)
+    return fair
+
+# ---------- REFERENCE PRICES ----------
+CONSENSUS_METHODS = ("median", "mean")
+
+def _pair_implied(price: np.ndarray, opp_val: np.ndarray):
+    side_implied = 1.0 / american_to_decimal_array(price)
+    has_opp = ~np.isnan(opp_val) & (opp_val != 0)
+    opp_implied = np.where(has_opp, 1.0 / american_to_decimal_array(np.where(has_opp, opp_val, 1.0)),
+                           1 - side_implied)
+    return side_implied, opp_implied
+
+def reference_prices(df: pd.DataFrame, ref_book: str | None = None, consensus: str = "median",
+                     weights: dict | None = None, method: str = "proportional",
+                     min_books: int = 2) -> np.ndarray:
+    """Fair (no-vig) American reference price for every row, NaN where there is none.
+
+    Each book's price is de-vigged, then rows are grouped by (event, market, line, side):
+    the ref_book's fair price wins when that book quotes the outcome, otherwise the
+    consensus of the books quoting it ('median', or 'mean' weighted by `weights`,
+    book -> weight, default 1) is used if at least min_books of them do.
+    """
+    if consensus not in CONSENSUS_METHODS:
+        raise ValueError(f"unknown consensus {consensus!r}; expected one of {CONSENSUS_METHODS}")
+    out = np.full(len(df), np.nan)
+    if df.empty:
+        return out
+    price = _column(df, "price_american")
+    rows = np.flatnonzero(~np.isnan(price) & (price != 0))
+    if not len(rows):
+        return out
+    side_implied, opp_implied = _pair_implied(price[rows], _column(df, "opp_price_american")[rows])
+    fair = fair_probs(df, rows, side_implied, opp_implied, method)
+
+    key = outcome_codes(df, rows)
+    n_keys = key.max() + 1
+    book_codes, book_names = pd.factorize(df["book"])
+    book_codes = book_codes[rows]
+    counts = np.bincount(key, minlength=n_keys)
+
+    if consensus == "median":
+        order = np.lexsort((fair, key))
+        ranked = fair[order]
+        start = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        prob = (ranked[start + (counts - 1) // 2] + ranked[start + counts // 2]) / 2
+    else:
+        w = np.array([float((weights or {}).get(b, 1.0)) for b in book_names] + [1.0])[book_codes]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            prob = np.bincount(key, w * fair, n_keys) / np.bincount(key, w, n_keys)
+    prob[counts < min_books] = np.nan
+
+    ref_code = pd.Index(book_names).get_indexer([ref_book])[0] if ref_book else -1
+    if ref_code >= 0:
+        is_ref = book_codes == ref_code
+        sharp = np.full(n_keys, np.nan)
+        sharp[key[is_ref]] = fair[is_ref]
+        prob = np.where(np.isnan(sharp), prob, sharp)
+
+    # left unrounded: a whole-number American price would move the fair probability
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d = 1.0 / prob[key]
+        out[rows] = np.where(d >= 2.0, (d - 1.0) * 100, -100.0 / (d - 1.0))
+    return out
+
+def score_arrays(df: pd.DataFrame, fallback_margin: float, method: str = "proportional") -> dict | None:
+    """Batch-score an odds frame without filtering, sorting or stake sizing.
+    Returns unrounded column arrays for the rows with a usable price ('rows' =
+    their positions in df), or None if there are none.
+    """
+    if df.empty:
+        return None
+
+    price = _column(df, "price_american")
+    opp_val = _column(df, "opp_price_american")
+    ref_val = _column(df, "ref_price_american")
+
+    # a zero price has no decimal equivalent; the scalar path raises on it
+    keep = ~np.isnan(price) & (price != 0)
+    if not keep.any():
+        return None
+    price, opp_val, ref_val = price[keep], opp_val[keep], ref_val[keep]
+
+    offer_decimal = american_to_decimal_array(price)
+    side_implied, opp_implied = _pair_implied(price, opp_val)
+
+    rows = np.flatnonzero(keep)
+    fair = fair_probs(df, rows, side_implied, opp_implied, method)
+    true_p = np.where(np.isnan(ref_val), fair, implied_prob_from_american_array(ref_val))
+    return {
+        "rows": rows,
+        "price": price,
+        "implied_prob": side_implied,
+        "true_prob": true_p,
+        "edge": edge_decimal_array(offer_decimal, true_p),
+        "full_kelly": kelly_fraction_array(true_p, offer_decimal),
+    }
+
+def _rounded(raw: dict, kelly_cap: float, stake_bankroll: float) -> dict:
+    stake_reco = np.maximum(0.0, np.minimum(raw["full_kelly"] * kelly_cap * stake_bankroll, stake_bankroll))
+    return {
+        "rows": raw["rows"],
+        "price": raw["price"],
+        "implied_pct": np.round(raw["implied_prob"] * 100, 2),
+        "true_pct": np.round(raw["true_prob"] * 100, 2),
+        "edge_pct": np.round(raw["edge"] * 100, 2),
+        "stake": np.round(stake_reco, 2),
+    }
+
+def score_rows(df: pd.DataFrame, kelly_cap: float, stake_bankroll: float,
+               fallback_margin: float, method: str = "proportional") -> dict | None:
+    """score_arrays plus stake sizing, rounded the way compute_table displays them."""
+    raw = score_arrays(df, fallback_margin, method)
+    return None if raw is None else _rounded(raw, kelly_cap, stake_bankroll)
+
+SCORE_COLUMNS = ["implied_prob", "true_prob", "edge", "full_kelly"]
+
+def score_snapshot(df: pd.DataFrame, fallback_margin: float, method: str = "proportional") -> pd.DataFrame:
+    """Snapshot rows with a usable price plus the settings-independent score columns.
+    Stake size and the min-edge cut are applied later by table_from_scores.
+    The de-vig method used is recorded in attrs["devig_method"].
+    """
+    raw = score_arrays(df, fallback_margin, method)
+    if raw is None:
+        out = df.iloc[:0].assign(**{c: np.empty(0) for c in SCORE_COLUMNS})
+    else:
+        out = df.iloc[raw["rows"]].reset_index(drop=True)
+        out["price_american"] = raw["price"]
+        for c in SCORE_COLUMNS:
+            out[c] = raw[c]
+    out.attrs["devig_method"] = method
+    return out
+
+def build_table(df: pd.DataFrame, scored: dict, order: np.ndarray) -> pd.DataFrame:
+    """Materialize compute_table columns for scored entries `order` (indexes into scored arrays)."""
+    rows = scored["rows"][order]
+    return pd.DataFrame({
+        "Date/Time": df["commence_time"].array.take(rows),
+        "Matchup": _matchups(df).take(rows),
+        "Sportsbook": df["book"].array.take(rows),
+        "Bet": _bets(df, rows),
+        "Odds (American)": scored["price"][order],
+        "Implied Prob %": scored["implied_pct"][order],
+        "Expected Prob %": scored["true_pct"][order],
+        "Edge %": scored["edge_pct"][order],
+        "Stake $": scored["stake"][order],
+    })
+
+def _ordered_table(df: pd.DataFrame, scored: dict, min_edge: float) -> pd.DataFrame:
+    # filter, then order by (commence_time asc, edge desc) on integer codes so the
+    # string columns are only gathered for the rows that survive
+    edge_pct = scored["edge_pct"]
+    passed = np.flatnonzero(edge_pct >= min_edge * 100)  # since we converted to %
+    order = passed[_table_order(df, scored["rows"][passed], edge_pct[passed])]
+    return build_table(df, scored, order)
+
+def compute_table(df: pd.DataFrame, kelly_cap: float, stake_bankroll: float,
+                  fallback_margin: float, min_edge: float, method: str = "proportional") -> pd.DataFrame:
+    """Score every row of an odds frame at once. With the default proportional
+    de-vig and two-way markets this matches compute_table_scalar exactly.
+    """
+    scored = score_rows(df, kelly_cap, stake_bankroll, fallback_margin, method)
+    if scored is None:
+        return pd.DataFrame()
+    return _ordered_table(df, scored, min_edge)
+
+def table_from_scores(scored_df: pd.DataFrame, kelly_cap: float, stake_bankroll: float,
+                      min_edge: float) -> pd.DataFrame:
+    """compute_table output from a score_snapshot frame, without redoing the odds math."""
+    if scored_df.empty:
+        return pd.DataFrame()
+    raw = {c: scored_df[c].to_numpy(dtype=float) for c in SCORE_COLUMNS}
+    raw["rows"] = np.arange(len(scored_df))
+    raw["price"] = scored_df["price_american"].to_numpy(dtype=float)
+    return _ordered_table(scored_df, _rounded(raw, kelly_cap, stake_bankroll), min_edge)
+
+# ---------- BASE TABLE ----------
+BASE_COLUMNS = [c for c in TABLE_COLUMNS if c != "Stake $"]
+
+def _table_order(df: pd.DataFrame, rows: np.ndarray, edge_pct: np.ndarray) -> np.ndarray:
+    """compute_table order of scored entries: commence_time asc, then edge desc."""
+    if not len(rows):
+        return np.empty(0, dtype=np.int64)
+    time_codes, uniques = pd.factorize(df["commence_time"], sort=True)
+    time_codes = np.where(time_codes < 0, len(uniques), time_codes)[rows]  # NaN sorts last
+    return np.lexsort((-edge_pct, time_codes))
+
+def base_columns(df: pd.DataFrame, raw: dict, order: np.ndarray) -> dict:
+    """BASE_COLUMNS plus full_kelly and sport_key for score_arrays entries `order`."""
+    rounded = _rounded(raw, 0.0, 0.0)
+    table = build_table(df, rounded, order)
+    cols = {c: table[c].to_numpy() if pd.api.types.is_numeric_dtype(table[c].dtype) else table[c].array
+            for c in BASE_COLUMNS}
+    cols["full_kelly"] = raw["full_kelly"][order]
+    cols["sport_key"] = df["sport_key"].array.take(raw["rows"][order])
+    return cols
+
+class BaseTable:
+    """Every scored row of a snapshot in compute_table order, before any sidebar setting.
+
+    Stake sizing only scales full_kelly, and min edge, books and sports only drop
+    rows, so view() applies them as a mask and one multiply over these columns.
+    The columns are shared and must not be modified.
+    """
+
+    def __init__(self, cols: dict):
+        self.cols = cols
+        self._codes = {}  # column -> factorized values, for book / sport masks
+
+    def __len__(self) -> int:
+        return len(self.cols["full_kelly"])
+
+    def _keep(self, rows: np.ndarray, column: str, values) -> np.ndarray:
+        """The entries of `rows` whose `column` value is in `values`."""
+        if column not in self._codes:
+            self._codes[column] = pd.factorize(self.cols[column], use_na_sentinel=False)
+        codes, uniques = self._codes[column]
+        wanted = set(values)
+        return rows[np.array([u in wanted for u in uniques], dtype=bool)[codes[rows]]]
+
+    def rows(self, min_edge: float, books=None, sports=None) -> np.ndarray:
+        """Positions passing min_edge (a fraction) and, when given, the book and
+        sport_key lists. Only rows past the edge cut are looked up in the lists.
+        """
+        rows = np.flatnonzero(self.cols["Edge %"] >= min_edge * 100)
+        if books:
+            rows = self._keep(rows, "Sportsbook", books)
+        if sports:
+            rows = self._keep(rows, "sport_key", sports)
+        return rows
+
+    def view(self, kelly_cap: float, stake_bankroll: float, min_edge: float,
+             books=None, sports=None) -> pd.DataFrame:
+        """compute_table output for these settings."""
+        rows = self.rows(min_edge, books, sports)
+        stake = np.maximum(0.0, np.minimum(self.cols["full_kelly"][rows] * kelly_cap * stake_bankroll,
+                                           stake_bankroll))
+        out = {c: self.cols[c].take(rows) for c in BASE_COLUMNS}
+        out["Stake $"] = np.round(stake, 2)
+        return pd.DataFrame(out, copy=False)
+
+def base_table(df: pd.DataFrame, fallback_margin: float, method: str = "proportional") -> BaseTable:
+    """BaseTable of an odds frame, reusing the scores of a score_snapshot frame
+    scored with the same de-vig method.
+    """
+    if "full_kelly" in df.columns and df.attrs.get("devig_method") == method:
+        raw = {c: df[c].to_numpy(dtype=float) for c in SCORE_COLUMNS}
+        raw["rows"] = np.arange(len(df))
+        raw["price"] = df["price_american"].to_numpy(dtype=float)
+    else:
+        raw = score_arrays(df, fallback_margin, method)
+    if raw is None or not len(raw["rows"]):
+        raw = {"rows": np.empty(0, dtype=np.int64), "price": np.empty(0),
+               **{c: np.empty(0) for c in SCORE_COLUMNS}}
+    edge_pct = np.round(raw["edge"] * 100, 2)
+    return BaseTable(base_columns(df, raw, _table_order(df, raw["rows"], edge_pct)))
+
+def _matchups(df: pd.DataFrame):
+    """'away vs home' labels, formatted once per distinct pairing."""
+    away_codes, away = pd.factorize(df["away_team"], use_na_sentinel=False)
+    home_codes, home = pd.factorize(df["home_team"], use_na_sentinel=False)
+    pair_codes, pairs = pd.factorize(away_codes * len(home) + home_codes)
+    away, home = away.tolist(), home.tolist()
+    labels = pd.array([f"{away[p // len(home)]} vs {home[p % len(home)]}" for p in pairs])
+    return labels.take(pair_codes)
+
+def compute_table_scalar(df: pd.DataFrame, kelly_cap: float, stake_bankroll: float,
+                         fallback_margin: float, min_edge: float) -> pd.DataFrame:
+    """Original per-row implementation, kept as the reference for compute_table."""
+    out = []
+    for _, row in df.iterrows():
+        price = safe_float(row["price_american"])
+        opp_val = safe_float(row.get("opp_price_american"))
+        ref_val = safe_float(row.get("ref_price_american"))
+
+        if price is None:
+            continue
+
+        offer_decimal = american_to_decimal(price)
+        side_implied = 1.0 / offer_decimal
+        opp_implied = (1.0 / american_to_decimal(opp_val)) if opp_val else 1 - side_implied
+
+        true_p = estimate_true_prob_from_ref(ref_val, fallback_margin, side_implied, opp_implied)
+        ev = edge_decimal(offer_decimal, true_p)
+        full_k = kelly_fraction(true_p, offer_decimal)
+        stake_reco = max(0.0, min(full_k * kelly_cap * stake_bankroll, stake_bankroll))
+
+        out.append({
+            "Date/Time": row["commence_time"],
+            "Matchup": f"{row['away_team']} vs {row['home_team']}",
+            "Sportsbook": row["book"],
+            "Bet": bet_label(row.get("side"), row["home_team"], row["away_team"], row.get("point"), row.get("market")),
+            "Odds (American)": price,
+            "Implied Prob %": round(side_implied * 100, 2),
+            "Expected Prob %": round(true_p * 100, 2),
+            "Edge %": round(ev * 100, 2),
+            "Stake $": round(stake_reco, 2),
+        })
+
+    out = pd.DataFrame(out)
+    if out.empty:
+        return out
+    out = out.sort_values(by=["Date/Time", "Edge %"], ascending=[True, False])
+    out = out[out["Edge %"] >= min_edge * 100]  # since we converted to %
+    return out.reset_index(drop=True)
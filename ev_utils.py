@@ -1,6 +1,7 @@
 from __future__ import annotations
 import math
 from typing import Tuple, Optional, Dict
+import numpy as np
 
 def american_to_decimal(american: float) -> float:
     if american > 0:
@@ -68,3 +69,134 @@ def estimate_true_prob_from_ref(american_ref: Optional[float], fallback_margin:
     # fallback to de-vig between the two sides
     fair1, fair2 = remove_vig_two_way(side_implied, opp_implied)
     return fair1
+
+# ---------- ARRAY VERSIONS ----------
+# Same math as the scalar helpers above, applied to whole NumPy/pandas columns.
+# Missing prices are NaN and propagate through instead of raising.
+
+def american_to_decimal_array(american) -> np.ndarray:
+    a = np.asarray(american, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(a > 0, 1 + a / 100.0, 1 + 100.0 / np.abs(a))
+
+def decimal_to_american_array(decimal_odds) -> np.ndarray:
+    d = np.asarray(decimal_odds, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.rint(np.where(d >= 2.0, (d - 1.0) * 100, -100.0 / (d - 1.0)))
+
+def implied_prob_from_decimal_array(decimal_odds) -> np.ndarray:
+    with np.errstate(divide="ignore"):
+        return 1.0 / np.asarray(decimal_odds, dtype=float)
+
+def implied_prob_from_american_array(american) -> np.ndarray:
+    return implied_prob_from_decimal_array(american_to_decimal_array(american))
+
+def remove_vig_two_way_array(p1, p2) -> Tuple[np.ndarray, np.ndarray]:
+    p1 = np.asarray(p1, dtype=float)
+    p2 = np.asarray(p2, dtype=float)
+    total = p1 + p2
+    ok = total > 0
+    safe = np.where(ok, total, 1.0)
+    return (np.where(ok, p1 / safe, 0.0), np.where(ok, p2 / safe, 0.0))
+
+def fair_odds_from_true_prob_array(p) -> np.ndarray:
+    p = np.asarray(p, dtype=float)
+    with np.errstate(divide="ignore"):
+        return np.where(p > 0, 1.0 / p, math.inf)
+
+def edge_decimal_array(offer_decimal, true_prob) -> np.ndarray:
+    return np.asarray(offer_decimal, dtype=float) * np.asarray(true_prob, dtype=float) - 1.0
+
+def kelly_fraction_array(true_prob, offer_decimal) -> np.ndarray:
+    b = np.asarray(offer_decimal, dtype=float) - 1.0
+    p = np.asarray(true_prob, dtype=float)
+    q = 1.0 - p
+    ok = b > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f = (b * p - q) / np.where(ok, b, 1.0)
+    return np.where(ok, np.maximum(0.0, f), 0.0)
+
+def estimate_true_prob_from_ref_array(american_ref, fallback_margin: float, side_implied, opp_implied) -> np.ndarray:
+    """Row-wise estimate_true_prob_from_ref: NaN in american_ref means no reference."""
+    ref = np.asarray(american_ref, dtype=float)
+    fair1, _ = remove_vig_two_way_array(side_implied, opp_implied)
+    return np.where(np.isnan(ref), fair1, implied_prob_from_american_array(ref))
+
+# ---------- N-WAY DE-VIG ----------
+# Every function below takes a flat array of book implied probabilities plus an
+# integer market code per entry (0..n_markets-1) and de-vigs all markets at once.
+
+DEVIG_METHODS = ("proportional", "additive", "power", "shin")
+
+def _group_sum(x: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    return np.bincount(groups, weights=x, minlength=n_groups)
+
+def devig_groups(implied, groups, method: str = "proportional", tol: float = 1e-12,
+                 max_iter: int = 100) -> np.ndarray:
+    """Fair probabilities for every outcome of every market.
+
+    proportional: scale by the overround (what remove_vig_two_way does).
+    additive:     subtract an equal share of the overround from each outcome.
+    power:        p_i ** k with k solved so the market sums to 1 (Newton).
+    shin:         Shin's insider-trading model, z solved by Newton steps kept inside
+                  a bisection bracket (a step leaving it bisects instead).
+    Markets with no overround (sum <= 1) are normalized proportionally.
+    """
+    if method not in DEVIG_METHODS:
+        raise ValueError(f"unknown de-vig method {method!r}; expected one of {DEVIG_METHODS}")
+    p = np.asarray(implied, dtype=float)
+    g = np.asarray(groups, dtype=np.int64)
+    if p.size == 0:
+        return p.copy()
+    n = int(g.max()) + 1
+    total = _group_sum(p, g, n)
+    safe_total = np.where(total > 0, total, 1.0)
+    proportional = p / safe_total[g]
+    if method == "proportional":
+        return proportional
+
+    vig = total > 1.0
+    if method == "additive":
+        size = np.bincount(g, minlength=n)
+        fair = np.maximum(p - ((total - 1.0) / size)[g], 0.0)
+        # an outcome pushed below zero is floored and the rest renormalized
+        fair = fair / np.where(_group_sum(fair, g, n) > 0, _group_sum(fair, g, n), 1.0)[g]
+    elif method == "power":
+        log_p = np.log(np.clip(p, 1e-300, None))
+        k = np.ones(n)
+        for _ in range(max_iter):
+            pk = np.exp(k[g] * log_p)
+            f = _group_sum(pk, g, n) - 1.0
+            slope = _group_sum(pk * log_p, g, n)
+            step = np.where(vig & (slope < 0), f / np.where(slope < 0, slope, -1.0), 0.0)
+            k = np.maximum(k - step, 1e-9)
+            if np.abs(step).max() < tol:
+                break
+        fair = np.exp(k[g] * log_p)
+    else:  # shin
+        a = 4.0 * p * p / safe_total[g]
+
+        def shin_fair(z):
+            zg = z[g]
+            r = np.sqrt(zg * zg + (1.0 - zg) * a)
+            fair = (r - zg) / (2.0 * (1.0 - zg))
+            dr = (2.0 * zg - a) / (2.0 * r)
+            slope = ((dr - 1.0) * (1.0 - zg) + (r - zg)) / (2.0 * (1.0 - zg) ** 2)
+            return fair, slope
+        # Newton on z, kept inside a shrinking [lo, hi] bracket (sum of fair probs falls as z grows)
+        lo, hi, z = np.zeros(n), np.full(n, 1.0 - 1e-9), np.zeros(n)
+        for _ in range(max_iter):
+            fair, slope = shin_fair(z)
+            f = _group_sum(fair, g, n) - 1.0
+            df = _group_sum(slope, g, n)
+            lo = np.where(f > 0, z, lo)
+            hi = np.where(f > 0, hi, z)
+            newton = z - f / np.where(df < 0, df, -1.0)
+            nxt = np.where((newton >= lo) & (newton <= hi), newton, 0.5 * (lo + hi))
+            nxt = np.where(vig, nxt, 0.0)
+            if np.abs(nxt - z).max() < tol:
+                z = nxt
+                break
+            z = nxt
+        fair, _ = shin_fair(z)
+    return np.where(vig[g], fair, proportional)
@@ -0,0 +1,183 @@
+"""Per-stage timings for the odds pipeline.
+
+    with stage("flatten") as s:
+        df = flatten_events(events)
+        s["rows"] = len(df)
+
+Each finished stage is added to the current rerun's Timings (see begin()), to
+process-wide totals that prometheus_text() / serve_metrics() expose, and, with
+TIMING_LOG set, logged as one JSON line on the "truline.timing" logger
+(TIMING_LOG=1 for stderr, or a file path).
+"""
+from __future__ import annotations
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger("truline.timing")
+
+class Timings:
+    """Stages recorded during one page run or scan, in the order they finished."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []  # dicts with stage, seconds, rows
+
+    def summary(self) -> list:
+        """One row per stage name: calls, total ms and rows, in first-seen order."""
+        out = {}
+        for rec in self.stages:
+            row = out.setdefault(rec["stage"], {"stage": rec["stage"], "calls": 0, "ms": 0.0, "rows": None})
+            row["calls"] += 1
+            row["ms"] += rec["seconds"] * 1000
+            if rec.get("rows") is not None:
+                row["rows"] = (row["rows"] or 0) + rec["rows"]
+        for row in out.values():
+            row["ms"] = round(row["ms"], 2)
+        return list(out.values())
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+_current = contextvars.ContextVar("timings", default=None)
+_lock = threading.Lock()
+_totals = {}  # stage -> [count, seconds, rows]
+
+def begin() -> Timings:
+    """Start collecting stages for this thread's run (a Streamlit rerun, a scan)."""
+    timings = Timings()
+    _current.set(timings)
+    return timings
+
+def _configure_log():
+    target = os.getenv("TIMING_LOG", "")
+    if not target or log.handlers:
+        return
+    handler = logging.StreamHandler() if target == "1" else logging.FileHandler(target)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+def record(name: str, seconds: float, rows: int | None = None, **labels):
+    rec = {"stage": name, "seconds": seconds, "rows": rows}
+    timings = _current.get()
+    if timings is not None:
+        timings.stages.append(rec)
+    with _lock:
+        total = _totals.setdefault(name, [0, 0.0, 0])
+        total[0] += 1
+        total[1] += seconds
+        total[2] += rows or 0
+    _configure_log()
+    if log.isEnabledFor(logging.INFO):
+        log.info(json.dumps({"ts": round(time.time(), 3), **rec, "seconds": round(seconds, 6), **labels}))
+
+@contextmanager
+def stage(name: str, rows: int | None = None, **labels):
+    """Time the block; set s["rows"] inside it to record how many rows it produced."""
+    rec = {"rows": rows}
+    started = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        record(name, time.perf_counter() - started, rec["rows"], **labels)
+
+# ---------- PROMETHEUS ----------
+def prometheus_text() -> str:
+    """Process totals in the Prometheus text exposition format."""
+    with _lock:
+        totals = {k: list(v) for k, v in _totals.items()}
+    lines = [
+        "# HELP truline_stage_seconds Time spent in each pipeline stage.",
+        "# TYPE truline_stage_seconds summary",
+    ]
+    for name, (count, seconds, _) in sorted(totals.items()):
+        lines.append(f'truline_stage_seconds_sum{{stage="{name}"}} {seconds:.6f}')
+        lines.append(f'truline_stage_seconds_count{{stage="{name}"}} {count}')
+    lines += [
+        "# HELP truline_stage_rows_total Rows produced by each pipeline stage.",
+        "# TYPE truline_stage_rows_total counter",
+    ]
+    lines += [f'truline_stage_rows_total{{stage="{name}"}} {rows}' for name, (_, _, rows) in sorted(totals.items())]
+    return "\n".join(lines) + "\n"
+
+_server = None
+
+def serve_metrics(port: int, host: str = "127.0.0.1"):
+    """Serve prometheus_text() at http://host:port/metrics from a daemon thread.
+    Safe to call on every rerun: only the first call in a process starts it.
+    """
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:  # port taken, e.g. by another Streamlit process
+            log.warning("metrics endpoint not started on port %s: %s", port, e)
+            _server = False
+            return _server
+        threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        return _server
+
+# ---------- PROFILING ----------
+class RunProfiler:
+    """cProfile (or pyinstrument with PROFILER=pyinstrument, if installed) around one run."""
+
+    def __init__(self):
+        self.kind = "cprofile"
+        if os.getenv("PROFILER", "").lower() == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self._profiler = Profiler()
+                self.kind = "pyinstrument"
+            except ImportError:
+                pass
+        if self.kind == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+        if self.kind == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+        self.running = True
+
+    def stop(self) -> dict:
+        """Stop and return {'kind', 'text', 'data'}: a readable report and a file to download."""
+        self.running = False
+        if self.kind == "pyinstrument":
+            self._profiler.stop()
+            return {"kind": self.kind, "text": self._profiler.output_text(),
+                    "data": self._profiler.output_html().encode(), "file": "rerun-profile.html"}
+        import io
+        import marshal
+        import pstats
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(30)
+        self._profiler.create_stats()
+        return {"kind": self.kind, "text": out.getvalue(),
+                "data": marshal.dumps(self._profiler.stats), "file": "rerun.prof"}
@@ -0,0 +1,202 @@
+from __future__ import annotations
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from ev_engine import BASE_COLUMNS, BaseTable, base_columns, score_arrays
+
+KEY_COLUMNS = ["event_id", "book", "market", "line", "side"]
+PRICE_COLUMNS = ["price_american", "opp_price_american", "ref_price_american"]
+
+# ---------- SNAPSHOT DIFF ----------
+class SnapshotDelta(NamedTuple):
+    added: np.ndarray    # positions in the new snapshot with no previous row
+    changed: np.ndarray  # positions in the new snapshot whose prices moved
+    removed: np.ndarray  # positions in the old snapshot that disappeared
+    events: np.ndarray   # event_ids touched by any of the above
+
+    @property
+    def size(self) -> int:
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+def key_parts(df: pd.DataFrame) -> list:
+    """Per-column (codes, uniques) of the key columns; cache it to diff a snapshot twice cheaply.
+    Missing values (no line on h2h) are a key value of their own.
+    """
+    return [pd.factorize(df[c], use_na_sentinel=False) for c in KEY_COLUMNS]
+
+def row_keys(prev_parts: list, curr_parts: list):
+    """int64 ids of (event, book, market, line, outcome), comparable across both snapshots.
+    The new snapshot's distinct values are mapped into the old one's code space.
+    """
+    prev_key = curr_key = 0
+    radix = 1
+    for (prev_codes, prev_uniques), (curr_codes, curr_uniques) in zip(prev_parts, curr_parts):
+        mapped = pd.Index(prev_uniques).get_indexer(curr_uniques)
+        unseen = mapped < 0
+        mapped[unseen] = len(prev_uniques) + np.arange(unseen.sum())
+        size = len(prev_uniques) + unseen.sum() + 1
+        curr_codes = np.where(curr_codes >= 0, mapped[curr_codes], -1)
+        if radix * size >= 2 ** 62:
+            both, dense = pd.factorize(np.concatenate([np.atleast_1d(prev_key), np.atleast_1d(curr_key)]))
+            prev_key, curr_key = both[:len(prev_codes)], both[len(prev_codes):]
+            radix = len(dense)
+        prev_key = prev_key * size + prev_codes + 1
+        curr_key = curr_key * size + curr_codes + 1
+        radix *= size
+    return np.asarray(prev_key, dtype=np.int64), np.asarray(curr_key, dtype=np.int64)
+
+def _prices(df: pd.DataFrame) -> np.ndarray:
+    return np.column_stack([df[c].to_numpy(dtype=float) for c in PRICE_COLUMNS])
+
+def diff_snapshots(prev: pd.DataFrame, curr: pd.DataFrame, prev_parts=None, curr_parts=None) -> SnapshotDelta:
+    prev_keys, curr_keys = row_keys(prev_parts or key_parts(prev), curr_parts or key_parts(curr))
+    # a repeated key keeps its last row, like a dict built from the snapshot
+    prev_index, pos = pd.Index(prev_keys), np.arange(len(prev))
+    if not prev_index.is_unique:
+        last = ~prev_index.duplicated(keep="last")
+        prev_index, pos = prev_index[last], pos[last]
+    hit = prev_index.get_indexer(curr_keys)
+    match = np.where(hit >= 0, pos[hit], -1)
+
+    found = match >= 0
+    old, new = _prices(prev)[match[found]], _prices(curr)[found]
+    moved = ~((old == new) | (np.isnan(old) & np.isnan(new))).all(axis=1)
+
+    added = np.flatnonzero(~found)
+    changed = np.flatnonzero(found)[moved]
+    seen = np.zeros(len(prev), dtype=bool)
+    seen[match[found]] = True
+    removed = np.flatnonzero(~seen)
+
+    events = pd.unique(np.concatenate([
+        curr["event_id"].iloc[np.concatenate([added, changed])].to_numpy(dtype=object),
+        prev["event_id"].iloc[removed].to_numpy(dtype=object),
+    ]))
+    return SnapshotDelta(added, changed, removed, events)
+
+# ---------- INCREMENTAL TABLE ----------
+_EDGE_BITS = 22
+_TEXT_COLUMNS = ("Date/Time", "Matchup", "Sportsbook", "Bet")
+
+def _sort_keys(commence_time, edge_pct) -> np.ndarray:
+    """One int64 per row ordering like compute_table: commence_time asc, edge desc."""
+    codes, uniques = pd.factorize(np.asarray(commence_time, dtype=object))
+    t = pd.to_datetime(pd.Series(uniques, dtype=object), utc=True, errors="coerce", format="ISO8601")
+    secs = np.where(t.isna(), 2 ** 40, t.to_numpy(dtype="datetime64[s]", na_value=np.datetime64(0, "s")).astype(np.int64))
+    secs = np.append(secs, 2 ** 40)[codes]  # code -1 (missing) lands on the appended sentinel
+    limit = 2 ** (_EDGE_BITS - 1) - 1
+    edge = np.clip(np.rint(np.asarray(edge_pct) * 100), -limit, limit).astype(np.int64)
+    return (secs << _EDGE_BITS) - edge
+
+class IncrementalTable:
+    """A snapshot's BaseTable kept up to date across polls.
+
+    Each update diffs the new snapshot against the previous one and rescores only
+    the events with a changed, added or removed price; their rows are dropped from
+    the sorted columns and the fresh ones merged back in by binary search.
+    """
+
+    def __init__(self, fallback_margin: float, method: str = "proportional"):
+        self.params = (fallback_margin, method)
+        self.snapshot = None
+        self.last_delta = None
+        self._cols = None  # BaseTable columns plus "_event" and "_sort", all in table order
+        self._base = None
+        self._parts = None
+        self._event_codes = {}  # event_id -> int, so stale rows are found with an int isin
+        self._next_code = 0     # codes aren't reused, so events can leave the mapping
+
+    def _score(self, df: pd.DataFrame) -> dict:
+        fallback_margin, method = self.params
+        raw = score_arrays(df, fallback_margin, method)
+        if raw is None:
+            cols = {c: np.empty(0, dtype=object if c in _TEXT_COLUMNS else float) for c in BASE_COLUMNS}
+            cols.update(full_kelly=np.empty(0), sport_key=np.empty(0, dtype=object),
+                        _event=np.empty(0, dtype=np.int64), _sort=np.empty(0, dtype=np.int64))
+            return cols
+        rows = raw["rows"]
+        sort = _sort_keys(df["commence_time"].to_numpy()[rows], np.round(raw["edge"] * 100, 2))
+        order = np.argsort(sort, kind="stable")
+        cols = {c: np.asarray(v) for c, v in base_columns(df, raw, order).items()}
+        cols["_event"] = self._codes(df["event_id"].iloc[rows[order]])
+        cols["_sort"] = sort[order]
+        return cols
+
+    def _codes(self, event_ids) -> np.ndarray:
+        codes = self._event_codes
+        local, uniques = pd.factorize(np.asarray(event_ids, dtype=object))
+        out = np.empty(len(uniques), dtype=np.int64)
+        for i, e in enumerate(uniques):
+            if e not in codes:
+                codes[e], self._next_code = self._next_code, self._next_code + 1
+            out[i] = codes[e]
+        return out[local]
+
+    def update(self, snapshot: pd.DataFrame) -> SnapshotDelta | None:
+        """Bring the table in line with `snapshot`; returns the delta that was applied."""
+        snapshot = snapshot.reset_index(drop=True)
+        parts = key_parts(snapshot)
+        if self.snapshot is None:
+            self._cols, self._base = self._score(snapshot), None
+            self.snapshot, self._parts = snapshot, parts
+            self.last_delta = None
+            return None
+
+        delta = diff_snapshots(self.snapshot, snapshot, self._parts, parts)
+        self.snapshot, self._parts = snapshot, parts
+        self.last_delta = delta
+        if not len(delta.events):
+            return delta
+
+        stale = np.isin(self._cols["_event"], self._codes(delta.events))
+        event_codes, event_uniques = parts[0]
+        touched = pd.Index(event_uniques).get_indexer(delta.events)
+        fresh = self._score(snapshot[np.isin(event_codes, touched[touched >= 0])])
+        # events that left the snapshot have no rows left: drop their codes so the
+        # mapping (and the shared tables in ui) tracks the board, not every event ever seen
+        for e in delta.events[touched < 0]:
+            self._event_codes.pop(e, None)
+        kept = {c: v[~stale] for c, v in self._cols.items()}
+        at = np.searchsorted(kept["_sort"], fresh["_sort"], side="right")
+        self._cols, self._base = {c: np.insert(kept[c], at, fresh[c]) for c in kept}, None
+        return delta
+
+    @property
+    def base(self) -> BaseTable:
+        """The current BaseTable; unchanged (and with its masks cached) until an update moves a price."""
+        if self._base is None:
+            # text columns are converted to pandas' string arrays once here instead of on every view
+            self._base = BaseTable({c: pd.Series(v, copy=False).array if v.dtype == object else v
+                                    for c, v in self._cols.items() if not c.startswith("_")})
+        return self._base
+
+# ---------- TABLE CHANGES ----------
+TABLE_KEY = ["Date/Time", "Matchup", "Sportsbook", "Bet"]
+
+def table_changes(prev: pd.DataFrame | None, curr: pd.DataFrame) -> np.ndarray:
+    """Per row of `curr`, how it differs from the same bet (TABLE_KEY) in the
+    previous opportunity table: "new", "up" or "down" (its Edge % moved), or "".
+    With no previous table nothing counts as changed.
+    """
+    status = np.full(len(curr), "", dtype=object)
+    if prev is None or not len(curr):
+        return status
+    joint = np.zeros(len(prev) + len(curr), dtype=np.int64)
+    for c in TABLE_KEY:
+        codes, uniques = pd.factorize(pd.concat([prev[c], curr[c]], ignore_index=True), use_na_sentinel=False)
+        joint = joint * len(uniques) + codes
+        joint, _ = pd.factorize(joint)  # keep the combined key dense so it never overflows
+    prev_index = pd.Index(joint[:len(prev)])
+    pos = np.arange(len(prev))
+    if not prev_index.is_unique:
+        first = ~prev_index.duplicated()
+        prev_index, pos = prev_index[first], pos[first]
+    hit = prev_index.get_indexer(joint[len(prev):])
+    found = hit >= 0
+    old = np.full(len(curr), np.nan)
+    old[found] = prev["Edge %"].to_numpy(dtype=float)[pos[hit[found]]]
+    new = curr["Edge %"].to_numpy(dtype=float)
+    status[~found] = "new"
+    status[found & (new > old)] = "up"
+    status[found & (new < old)] = "down"
+    return status
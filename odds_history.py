@@ -0,0 +1,155 @@
+"""Append-only odds history, stored as Parquet partitioned by sport and UTC date.
+
+    history/sport_key=basketball_nba/date=2025-10-20/part-<fetched>-<id>.parquet
+
+Every scan appends one file per sport; compact() later merges a closed day into
+a single sorted file so month-long range scans touch a few dozen files.
+"""
+from __future__ import annotations
+import datetime as dt
+import glob
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from odds_snapshot import parse_times
+
+HISTORY_DIR = os.getenv("HISTORY_DIR", "history")
+
+# sample_odds.csv columns (sport_key lives in the partition path) plus linkage/time;
+# point is null for h2h and in files written before spreads/totals were kept
+STRING_COLUMNS = ["event_id", "home_team", "away_team", "book", "market", "side"]
+NUMERIC_COLUMNS = ["price_american", "opp_price_american", "ref_price_american", "point"]
+SCHEMA = pa.schema(
+    [("fetched_at", pa.timestamp("ms", tz="UTC")), ("commence_time", pa.timestamp("s", tz="UTC"))]
+    + [(c, pa.string()) for c in STRING_COLUMNS]
+    + [(c, pa.float64()) for c in NUMERIC_COLUMNS]
+)
+PARTITIONING = ds.partitioning(pa.schema([("sport_key", pa.string()), ("date", pa.string())]), flavor="hive")
+ROW_GROUP_SIZE = 32768
+COMPRESSION = "lz4"  # decompresses faster than zstd; range scans are read-bound
+SORT_KEYS = [("event_id", "ascending"), ("book", "ascending"), ("fetched_at", "ascending")]
+
+def _to_table(snapshot: pd.DataFrame, fetched_at: pd.Timestamp) -> pa.Table:
+    frame = pd.DataFrame({
+        "fetched_at": pd.Series(fetched_at, index=snapshot.index).astype("datetime64[ms, UTC]"),
+        "commence_time": parse_times(snapshot["commence_time"]).astype("datetime64[s, UTC]"),
+    })
+    for c in STRING_COLUMNS:
+        frame[c] = snapshot[c].astype(object).where(snapshot[c].notna(), None)
+    for c in NUMERIC_COLUMNS:
+        frame[c] = pd.to_numeric(snapshot[c], errors="coerce") if c in snapshot.columns else float("nan")
+    return pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+
+def append(snapshot: pd.DataFrame, fetched_at=None, root: str | None = None) -> list:
+    """Append one normalized snapshot; returns the files written (one per sport)."""
+    root = root or HISTORY_DIR
+    fetched_at = pd.Timestamp(fetched_at or dt.datetime.now(dt.timezone.utc))
+    fetched_at = fetched_at.tz_localize("UTC") if fetched_at.tzinfo is None else fetched_at.tz_convert("UTC")
+    date = fetched_at.strftime("%Y-%m-%d")
+    written = []
+    for sport, rows in snapshot.groupby("sport_key", sort=False, observed=True):
+        part_dir = os.path.join(root, f"sport_key={sport}", f"date={date}")
+        os.makedirs(part_dir, exist_ok=True)
+        path = os.path.join(part_dir, f"part-{fetched_at.strftime('%H%M%S%f')}-{uuid.uuid4().hex[:8]}.parquet")
+        table = _to_table(rows, fetched_at).sort_by(SORT_KEYS)
+        tmp = path + ".tmp"
+        pq.write_table(table, tmp, compression=COMPRESSION)
+        os.replace(tmp, path)
+        written.append(path)
+    return written
+
+def compact(root: str | None = None, before: str | None = None) -> int:
+    """Merge every multi-file day partition older than `before` (YYYY-MM-DD, default
+    today UTC) into one file sorted by event/book/time. Returns partitions compacted.
+    """
+    root = root or HISTORY_DIR
+    before = before or dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d")
+    done = 0
+    for part_dir in sorted(glob.glob(os.path.join(root, "sport_key=*", "date=*"))):
+        if part_dir.rsplit("date=", 1)[1] >= before:
+            continue
+        files = sorted(glob.glob(os.path.join(part_dir, "part-*.parquet")))
+        if len(files) < 2:
+            continue
+        table = pa.concat_tables([pq.read_table(f, schema=SCHEMA) for f in files]).sort_by(SORT_KEYS)
+        path = os.path.join(part_dir, f"part-compacted-{uuid.uuid4().hex[:8]}.parquet")
+        # small row groups over the sorted rows let event/book filters skip most of the file
+        pq.write_table(table, path + ".tmp", compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+        os.replace(path + ".tmp", path)
+        for f in files:
+            os.remove(f)
+        done += 1
+    return done
+
+# read-side schema: strings stay dictionary-encoded and arrive in pandas as categoricals
+READ_SCHEMA = pa.schema(
+    [pa.field(f.name, pa.dictionary(pa.int32(), pa.string())) if f.name in STRING_COLUMNS else f for f in SCHEMA]
+    + [("sport_key", pa.string()), ("date", pa.string())]
+)
+
+def dataset(root: str | None = None, dictionary: bool = True) -> ds.Dataset:
+    """Dictionary reads are faster for wide scans, but disable row-group pruning on
+    string predicates; pass dictionary=False for selective event/book lookups.
+    """
+    if not dictionary:
+        schema = SCHEMA.append(pa.field("sport_key", pa.string())).append(pa.field("date", pa.string()))
+        return ds.dataset(root or HISTORY_DIR, schema=schema, partitioning=PARTITIONING)
+    fmt = ds.ParquetFileFormat(read_options={"dictionary_columns": STRING_COLUMNS})
+    return ds.dataset(root or HISTORY_DIR, schema=READ_SCHEMA, format=fmt, partitioning=PARTITIONING)
+
+def _utc(value) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+def scan(sport: str | None = None, start=None, end=None, event_ids=None, books=None,
+         columns=None, root: str | None = None) -> pd.DataFrame:
+    """Rows with start <= fetched_at < end, optionally limited to events/books.
+    Sport and date prune whole directories; the rest is pushed down to Parquet row groups.
+    String columns come back as pandas categoricals.
+    """
+    root = root or HISTORY_DIR
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=[f.name for f in SCHEMA] + ["sport_key"])
+    expr = None
+
+    def both(e):
+        return e if expr is None else expr & e
+
+    if sport is not None:
+        expr = both(pc.field("sport_key") == sport)
+    if start is not None:
+        start = _utc(start)
+        expr = both((pc.field("date") >= start.strftime("%Y-%m-%d")) & (pc.field("fetched_at") >= start))
+    if end is not None:
+        end = _utc(end)
+        expr = both((pc.field("date") <= end.strftime("%Y-%m-%d")) & (pc.field("fetched_at") < end))
+    # typed value sets: an empty list would be inferred as null and rejected by isin
+    if event_ids is not None:
+        expr = both(pc.field("event_id").isin(pa.array(list(event_ids), pa.string())))
+    if books is not None:
+        expr = both(pc.field("book").isin(pa.array(list(books), pa.string())))
+
+    if columns is None:
+        columns = [f.name for f in SCHEMA] + ["sport_key"]
+    selective = event_ids is not None or books is not None
+    table = dataset(root, dictionary=not selective).to_table(columns=columns, filter=expr)
+    if selective:
+        table = pa.table({n: pc.dictionary_encode(c) if n in STRING_COLUMNS else c
+                          for n, c in zip(table.column_names, table.columns)})
+    return table.to_pandas()
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m odds_history")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--root", default=HISTORY_DIR)
+    parser.add_argument("--before", default=None, help="compact days before YYYY-MM-DD (default: today)")
+    args = parser.parse_args(argv)
+    print(f"compacted {compact(args.root, args.before)} partitions")
+
+if __name__ == "__main__":
+    main()
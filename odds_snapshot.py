@@ -0,0 +1,305 @@
+from __future__ import annotations
+import hashlib
+import os
+import weakref
+import numpy as np
+import pandas as pd
+from ev_engine import safe_float_array, reference_prices
+from instrument import stage
+
+SAMPLE_CSV = "sample_data/sample_odds.csv"
+
+# Column order of a normalized snapshot (the sample_odds.csv schema plus linkage).
+STR_COLUMNS = ["event_id", "sport_key", "commence_time", "home_team", "away_team", "book", "market", "side"]
+PRICE_COLUMNS = ["price_american", "opp_price_american", "ref_price_american"]
+# point: the outcome's own handicap/total (NaN for h2h); line: the value shared by
+# every outcome of one spread/total line (home-side handicap for spreads)
+LINE_COLUMNS = ["point", "line"]
+INDEX_COLUMNS = ["market_id", "outcome_pos", "market_size", "opp_index"]
+COLUMNS = STR_COLUMNS + PRICE_COLUMNS + LINE_COLUMNS + INDEX_COLUMNS
+# Snapshots are compact: every string column is a categorical (each distinct team,
+# book or sport stored once, rows hold small int codes), prices and points are
+# float64 parsed at ingest and linkage columns are as narrow as they can be.
+INDEX_DTYPES = {"market_id": np.int32, "outcome_pos": np.int16, "market_size": np.int16, "opp_index": np.int32}
+
+DEFAULT_MARKETS = ("h2h",)
+
+# Short names used by the page filters -> provider sport keys.
+SPORT_ALIASES = {
+    "nfl": "americanfootball_nfl",
+    "nba": "basketball_nba",
+    "mlb": "baseball_mlb",
+    "wnba": "basketball_wnba",
+    "epl": "soccer_epl",
+    "laliga": "soccer_spain_la_liga",
+    "nhl": "icehockey_nhl",
+}
+
+class SnapshotError(RuntimeError):
+    pass
+
+def market_keys(spec: str | None = None) -> tuple:
+    """'h2h,spreads,totals' (default: the MARKETS env var) -> ('h2h', 'spreads', 'totals')."""
+    spec = spec if spec is not None else os.getenv("MARKETS", ",".join(DEFAULT_MARKETS))
+    return tuple(m.strip() for m in spec.split(",") if m.strip()) or DEFAULT_MARKETS
+
+def line_values(market, side, point) -> np.ndarray:
+    """Line of each outcome: spreads quote the away side as the negated home
+    handicap, so away points are flipped; totals and others keep their point.
+    """
+    point = np.asarray(point, dtype=float)
+    is_spread = pd.Series(market, dtype=object).astype(str).str.contains("spread").to_numpy()
+    away = np.asarray(side, dtype=object) == "away"
+    return np.where(is_spread & away, -point, point) + 0.0  # +0.0 turns -0.0 into 0.0
+
+def intern(values) -> pd.Categorical:
+    """values as a categorical with sorted categories, so code order is value order
+    (sorting or factorizing by codes then matches sorting the strings).
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), sort=True)
+    return pd.Categorical.from_codes(codes, uniques)
+
+def parse_times(values) -> pd.Series:
+    """ISO timestamps as UTC datetimes (NaT where unparseable). A categorical is
+    parsed once per category; to_datetime can hand a categorical back as
+    categorical timestamps, which don't compare with < or >.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return pd.to_datetime(values, utc=True, errors="coerce", format="ISO8601")
+    parsed = pd.to_datetime(pd.Series(values.cat.categories, dtype=object), utc=True, errors="coerce",
+                            format="ISO8601")
+    return pd.Series(parsed.array.take(values.cat.codes.to_numpy(), allow_fill=True),
+                     index=values.index, name=values.name)
+
+def concat_snapshots(frames) -> pd.DataFrame:
+    """pd.concat of snapshots (or scored boards) that keeps string columns categorical.
+    Frames from different polls have different categories, which plain concat
+    would turn back into per-row strings.
+    """
+    frames = list(frames)
+    for c in STR_COLUMNS:
+        if frames and all(c in f.columns and isinstance(f[c].dtype, pd.CategoricalDtype) for f in frames):
+            categories = np.unique(np.concatenate([np.asarray(f[c].cat.categories, dtype=object) for f in frames]))
+            frames = [f.assign(**{c: f[c].cat.set_categories(categories)}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+def _group_markets(cols: dict, group) -> tuple:
+    """Reorder cols so every market group is contiguous (stable), and return
+    (cols, market_id, outcome_pos, market_size).
+    """
+    codes, _ = pd.factorize(group)
+    if len(codes) and (np.diff(codes) < 0).any():
+        order = np.argsort(codes, kind="stable")
+        cols = {c: np.asarray(v, dtype=object if isinstance(v, list) else None)[order] for c, v in cols.items()}
+        codes = codes[order]
+    market_id = codes
+    n_markets = len(market_id) and market_id[-1] + 1
+    market_size = np.bincount(market_id, minlength=n_markets)[market_id]
+    first = np.searchsorted(market_id, np.arange(n_markets))
+    outcome_pos = np.arange(len(market_id)) - first[market_id]
+    return cols, market_id, outcome_pos, market_size
+
+def _finish(cols: dict, market_id, outcome_pos, market_size) -> pd.DataFrame:
+    """Attach sibling links: every row of a market is contiguous, so the opposite
+    outcome is found by index arithmetic (first other outcome, as before).
+    """
+    market_id = np.asarray(market_id, dtype=np.int64)
+    outcome_pos = np.asarray(outcome_pos, dtype=np.int64)
+    market_size = np.asarray(market_size, dtype=np.int64)
+    start = np.arange(len(market_id)) - outcome_pos
+    opp_index = np.where(market_size >= 2, start + (outcome_pos == 0), -1)
+    price = cols["price_american"]
+    if "opp_price_american" not in cols:
+        cols["opp_price_american"] = np.where(opp_index >= 0, price[np.maximum(opp_index, 0)], np.nan)
+    for c in STR_COLUMNS:
+        cols[c] = intern(cols[c])
+    cols.update(market_id=market_id, outcome_pos=outcome_pos, market_size=market_size, opp_index=opp_index)
+    for c, dtype in INDEX_DTYPES.items():
+        cols[c] = cols[c].astype(dtype)
+    df = pd.DataFrame(cols)
+    return df[COLUMNS]
+
+def flatten_events(events, markets=DEFAULT_MARKETS) -> pd.DataFrame:
+    """Flatten provider JSON (list of events) into a snapshot in one pass over the outcomes.
+    A bookmaker's market holding several lines (alternate spreads/totals) is
+    split into one market group per line.
+    """
+    cols = {c: [] for c in STR_COLUMNS}
+    price, point, block, market_id, outcome_pos, market_size = [], [], [], [], [], []
+    mid = 0
+    for ev in events or []:
+        event_id = ev.get("id")
+        sport_key = ev.get("sport_key")
+        commence = ev.get("commence_time")
+        home = ev.get("home_team")
+        away = ev.get("away_team")
+        for bk in ev.get("bookmakers", []):
+            book = bk.get("title")
+            for mk in bk.get("markets", []):
+                key = mk.get("key")
+                if markets and key not in markets:
+                    continue
+                outcomes = mk.get("outcomes", [])
+                n = len(outcomes)
+                for pos, oc in enumerate(outcomes):
+                    name = oc.get("name")
+                    cols["event_id"].append(event_id)
+                    cols["sport_key"].append(sport_key)
+                    cols["commence_time"].append(commence)
+                    cols["home_team"].append(home)
+                    cols["away_team"].append(away)
+                    cols["book"].append(book)
+                    cols["market"].append(key)
+                    cols["side"].append("home" if name == home else ("away" if name == away else name))
+                    price.append(oc.get("price"))
+                    point.append(oc.get("point"))
+                    market_id.append(mid)
+                    outcome_pos.append(pos)
+                    market_size.append(n)
+                mid += 1
+    cols["price_american"] = safe_float_array(price)
+    cols["ref_price_american"] = np.full(len(price), np.nan)
+    cols["point"] = safe_float_array(point)
+    cols["line"] = line_values(cols["market"], cols["side"], cols["point"])
+    has_line = ~np.isnan(cols["line"])
+    if has_line.any():
+        # (market block, line) groups; h2h blocks keep their single group
+        line_code, _ = pd.factorize(np.where(has_line, cols["line"], 0.0))
+        group = np.asarray(market_id, dtype=np.int64) * (line_code.max() + 1) + line_code
+        cols, market_id, outcome_pos, market_size = _group_markets(cols, group)
+    return _finish(cols, market_id, outcome_pos, market_size)
+
+def _price_column(values) -> np.ndarray:
+    """safe_float_array that also reads labelled prices such as 'opp:+230' or 'ref_home:+100'."""
+    s = pd.Series(values)
+    if pd.api.types.is_string_dtype(s.dtype) or s.dtype == object:
+        s = s.astype(str).str.replace(r"^[A-Za-z_]+:", "", regex=True)
+    return safe_float_array(s)
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce a sample_odds.csv-style frame into the snapshot schema.
+    Rows are grouped by event/book/market/line so siblings stay contiguous.
+    """
+    df = df.rename(columns={"sport": "sport_key"})
+    cols = {}
+    for c in STR_COLUMNS:
+        cols[c] = df[c].to_numpy(dtype=object) if c in df.columns else np.full(len(df), None, dtype=object)
+    if "event_id" not in df.columns:
+        keys = pd.Series(cols["sport_key"]).astype(str) + "|" + pd.Series(cols["commence_time"]).astype(str) \
+            + "|" + pd.Series(cols["home_team"]).astype(str) + "|" + pd.Series(cols["away_team"]).astype(str)
+        cols["event_id"] = keys.to_numpy(dtype=object)
+    for c in PRICE_COLUMNS:
+        cols[c] = _price_column(df[c]) if c in df.columns else np.full(len(df), np.nan)
+    cols["point"] = safe_float_array(df["point"]) if "point" in df.columns else np.full(len(df), np.nan)
+    cols["line"] = line_values(cols["market"], cols["side"], cols["point"])
+
+    group = np.zeros(len(df), dtype=np.int64)
+    for c in ("event_id", "book", "market", "line"):
+        codes, uniques = pd.factorize(cols[c], use_na_sentinel=False)
+        group = pd.factorize(group * (len(uniques) + 1) + codes)[0]
+    cols, market_id, outcome_pos, market_size = _group_markets(cols, group)
+    # sample rows carry their own opponent price, so keep it rather than re-deriving it
+    return _finish(cols, market_id, outcome_pos, market_size)
+
+def load_csv(path: str = SAMPLE_CSV, reference: bool = True) -> pd.DataFrame:
+    """Normalized snapshot from a CSV in the sample_odds.csv schema. Rows without a
+    ref_price_american get one from attach_reference (REF_BOOK or the consensus),
+    as with fetch_snapshot, unless reference=False.
+    """
+    with stage("load_csv") as s:
+        df = normalize_frame(pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""]))
+        s["rows"] = len(df)
+    if not reference or not df["ref_price_american"].isna().any():
+        return df
+    with stage("reference", rows=len(df)):
+        return attach_reference(df)
+
+_hashes = {}  # id(frame) -> (weakref to frame, digest)
+
+def snapshot_hash(df: pd.DataFrame) -> str:
+    """Content hash of a snapshot, for cache keys. Remembered per frame object,
+    so snapshots must be treated as read-only once hashed.
+    """
+    cached = _hashes.get(id(df))
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+    digest = hashlib.blake2b(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes(),
+                             digest_size=16)
+    digest.update(",".join(map(str, df.columns)).encode())
+    key = id(df)
+    _hashes[key] = (weakref.ref(df, lambda _: _hashes.pop(key, None)), digest.hexdigest())
+    return _hashes[key][1]
+
+def _weights(spec: str) -> dict:
+    """'Pinnacle=3,Circa=2' -> {'Pinnacle': 3.0, 'Circa': 2.0}"""
+    out = {}
+    for part in spec.split(","):
+        book, _, w = part.partition("=")
+        if book.strip() and w.strip():
+            out[book.strip()] = float(w)
+    return out
+
+def attach_reference(df: pd.DataFrame, ref_book: str | None = None, consensus: str | None = None,
+                     weights: dict | None = None, method: str | None = None) -> pd.DataFrame:
+    """Fill missing ref_price_american from REF_BOOK, else the cross-book consensus
+    (REF_CONSENSUS, REF_WEIGHTS, DEVIG_METHOD). Rows that already carry one keep it.
+    """
+    ref = reference_prices(
+        df,
+        ref_book=ref_book if ref_book is not None else os.getenv("REF_BOOK", ""),
+        consensus=consensus or os.getenv("REF_CONSENSUS", "median"),
+        weights=weights if weights is not None else _weights(os.getenv("REF_WEIGHTS", "")),
+        method=method or os.getenv("DEVIG_METHOD", "proportional"),
+    )
+    current = df["ref_price_american"].to_numpy(dtype=float)
+    df = df.copy()
+    df["ref_price_american"] = np.where(np.isnan(current), ref, current)
+    return df
+
+def fetch_snapshot(provider, sport_keys, markets=DEFAULT_MARKETS, reference: bool = True) -> pd.DataFrame:
+    """Fetch one or more sports through a provider and flatten them into one snapshot,
+    with reference prices attached unless reference=False. The provider should
+    be built for the same markets (make_provider), so each sport is one request.
+    """
+    sport_keys = [sport_keys] if isinstance(sport_keys, str) else list(sport_keys)
+    with stage("fetch") as s:
+        if len(sport_keys) == 1:
+            events = provider.get_odds(sport_keys[0])
+        else:
+            events = [ev for evs in provider.fetch_many(sport_keys).values() for ev in evs]
+        s["rows"] = len(events)
+    return snapshot_from_events(events, markets, reference)
+
+def snapshot_from_events(events, markets=DEFAULT_MARKETS, reference: bool = True) -> pd.DataFrame:
+    """fetch_snapshot for a provider payload already in hand."""
+    with stage("flatten") as s:
+        df = flatten_events(events, markets=markets)
+        s["rows"] = len(df)
+    if not reference:
+        return df
+    with stage("reference", rows=len(df)):
+        return attach_reference(df)
+
+def make_provider(regions: str, markets=DEFAULT_MARKETS, cached: bool = True):
+    """Provider built from the environment; raises SnapshotError if unusable.
+    All markets are requested together: one call per sport returns every one of them.
+    cached=False skips the shared TTL cache (see providers.cache.get_provider).
+    """
+    markets = markets if isinstance(markets, str) else ",".join(markets)
+    api_key = os.getenv("ODDS_API_KEY", "")
+    if not api_key:
+        raise SnapshotError("Missing ODDS_API_KEY in environment. Set PROVIDER=csv to use sample data.")
+    try:
+        from providers.cache import get_provider
+    except Exception as e:
+        raise SnapshotError(f"Provider import failed: {e}")
+    return get_provider(api_key, regions=regions, markets=markets, odds_format="american", cached=cached)
+
+def sport_keys(sports) -> list:
+    """Full sport keys for short aliases ('nba'); full keys pass through."""
+    return list(dict.fromkeys(SPORT_ALIASES.get(s, s) for s in sports))
+
+def filter_sports(df: pd.DataFrame, sports) -> pd.DataFrame:
+    """Keep rows whose sport_key matches a short alias ('nba') or a full key."""
+    return df[df["sport_key"].isin(sport_keys(sports))]
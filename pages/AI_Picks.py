@@ -1,11 +1,10 @@
 import os
-import pandas as pd
 import streamlit as st
-from datetime import datetime
 from dotenv import load_dotenv
 
-from ui import use_global_style, header
-from ev_utils import american_to_decimal, implied_prob_from_american
+from ui import use_global_style, header, fetch_odds, table_view, export_buttons
+from odds_snapshot import snapshot_hash
+from ai_model import load_model, model_name, picks_table
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="AI Picks • TruLine Betting", page_icon="🤖", layout="wide")
@@ -17,79 +16,32 @@ load_dotenv()
 provider_name = os.getenv("PROVIDER", "csv")
 regions = os.getenv("REGIONS", "us")
 
-# --- Placeholder Data Fetch ---
-# (For now, we just use sample CSV or API odds. Later we swap for real AI.)
-def load_data_csv(path: str) -> pd.DataFrame:
-    return pd.read_csv(path)
-
-def fetch_odds(provider_name: str, regions: str) -> pd.DataFrame:
-    if provider_name.lower() == "csv":
-        return load_data_csv("sample_data/sample_odds.csv")
-    else:
-        try:
-            from providers.oddsapi_provider import OddsAPIProvider
-        except Exception as e:
-            st.error(f"Provider import failed: {e}")
-            return pd.DataFrame()
-
-        api_key = os.getenv("ODDS_API_KEY", "")
-        if not api_key:
-            st.error("Missing ODDS_API_KEY in environment. Set PROVIDER=csv to use sample data.")
-            return pd.DataFrame()
-
-        provider = OddsAPIProvider(api_key, regions=regions, markets="h2h", odds_format="american")
-        sports = provider.get_sports()
-        chosen_sport = st.sidebar.selectbox("Choose Sport", [s["key"] for s in sports])
-        return provider.get_odds(chosen_sport)
-
-df = fetch_odds(provider_name, regions)
+df = fetch_odds(provider_name, regions, label="Choose Sport")
 
 if df.empty:
     st.warning("No data loaded. Add API key in .env or use sample_data.")
     st.stop()
 
-# --- AI MODEL PLACEHOLDER ---
-# Replace this later with real trained model
-def fake_ai_predict(row):
-    # Pretend AI predicts 55% for home team if odds are close
-    return 0.55 if row.get("home_team") else 0.45
-
-# Build AI Picks Table
-rows = []
-for _, row in df.iterrows():
-    try:
-        price = float(row["price_american"])
-    except Exception:
-        continue
-
-    offer_decimal = american_to_decimal(price)
-    ip = implied_prob_from_american(price)
-
-    ai_prob = fake_ai_predict(row)  # <-- placeholder
-    edge = ai_prob - ip
-
-    rows.append({
-        "Date/Time": row.get("commence_time", "Unknown"),
-        "Sport": row.get("sport_key", "Unknown").upper(),
-        "Matchup": f"{row.get('home_team', 'Unknown')} vs {row.get('away_team', 'Unknown')}",
-        "Sportsbook": row.get("book", "Unknown"),
-        "Odds": price,
-        "IP%": f"{ip*100:.1f}%",
-        "AI%": f"{ai_prob*100:.1f}%",
-        "Edge%": f"{edge*100:.1f}%",
-        "Pick": "Home" if ai_prob > 0.5 else "Away"
-    })
+# --- MODEL ---
+# loaded once per process from AI_MODEL_PATH (any sklearn-style pickle/joblib file);
+# without one, picks use the cross-book de-vigged market probability
+try:
+    model = load_model()
+except Exception as e:
+    st.error(f"Could not load AI_MODEL_PATH: {e}")
+    st.stop()
 
-table = pd.DataFrame(rows)
+table = picks_table(df, model)
 
 st.markdown("## 🤖 AI Betting Picks")
-st.caption("Experimental machine learning picks — placeholder model for now.")
+st.caption(f"Experimental machine learning picks — model: {model_name(model)}.")
 
 if table.empty:
     st.info("No AI picks yet.")
 else:
-    st.dataframe(table, use_container_width=True, hide_index=True)
+    view = table_view(table, key="ai")
 
-    # Download option
-    csv = table.to_csv(index=False).encode("utf-8")
-    st.download_button("Download AI Picks (CSV)", data=csv, file_name="ai_picks.csv", mime="text/csv")
+    # Download option: built on click, once per snapshot + model + view settings
+    settings = (id(model), st.session_state.get("ai_search"),
+                st.session_state.get("ai_sort"), st.session_state.get("ai_desc"))
+    export_buttons(view, (snapshot_hash(df), settings), "ai_picks", key="ai_export")
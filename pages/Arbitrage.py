@@ -0,0 +1,60 @@
+from __future__ import annotations
+import os
+import streamlit as st
+from dotenv import load_dotenv
+from ui import use_global_style, header, footer, fetch_odds, export_buttons
+from arbitrage import find_arbs
+from odds_snapshot import filter_sports, snapshot_hash
+
+# --- PAGE CONFIG ---
+st.set_page_config(page_title="Arbitrage • TruLine Betting", page_icon="⚖️", layout="wide")
+
+# --- STYLE + HEADER ---
+use_global_style()
+header(active="Tools")
+
+load_dotenv()
+provider_name = os.getenv("PROVIDER", "csv")
+regions = os.getenv("REGIONS", "us")
+
+# ---------- PAGE ----------
+st.sidebar.header("⚙️ Settings")
+total_stake = st.sidebar.number_input("Total Stake ($)", min_value=10.0, value=100.0, step=10.0)
+min_profit = st.sidebar.slider("Min Profit (%)", 0.0, 5.0, 0.0, 0.1)
+
+books_default = [b.strip() for b in os.getenv(
+    "BOOKS",
+    "DraftKings,FanDuel,BetMGM,PointsBet,Caesars,BetRivers,Unibet,Bet365,Pinnacle,BetUS"
+).split(",") if b.strip()]
+selected_books = st.sidebar.multiselect("Sportsbooks", books_default, default=books_default)
+
+sports_filter = st.sidebar.multiselect("Sports", ["nfl", "nba", "mlb", "wnba", "epl", "laliga", "nhl"], default=[])
+
+st.markdown("## ⚖️ Arbitrage Finder")
+st.caption("Best price per outcome across your books; a market is an arb when those prices "
+           "imply less than 100% in total. Stakes are split so every outcome pays the same.")
+
+df = fetch_odds(provider_name, regions)
+if df.empty:
+    st.warning("No data loaded. If using API, ensure ODDS_API_KEY is set in `.env`.")
+    st.stop()
+snapshot = snapshot_hash(df)
+
+if selected_books:
+    df = df[df["book"].isin(selected_books)]
+if sports_filter:
+    df = filter_sports(df, sports_filter)
+
+table = find_arbs(df, total_stake, min_profit / 100)
+if table.empty:
+    st.info("No arbitrage right now — prices are checked again on every refresh.")
+else:
+    st.metric("Opportunities", int(table["Arb #"].max()), help="Legs below are grouped by Arb #")
+    st.dataframe(table, use_container_width=True, hide_index=True)
+
+    # files are built only when a download is clicked, once per snapshot + settings
+    settings = (total_stake, min_profit, tuple(selected_books), tuple(sports_filter))
+    export_buttons(table, (snapshot, settings), "arbitrage_opportunities", key="arb_export")
+
+# --- FOOTER ---
+footer()
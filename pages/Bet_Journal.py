@@ -0,0 +1,76 @@
+import os
+import numpy as np
+import streamlit as st
+from dotenv import load_dotenv
+
+from ui import use_global_style, header, footer, table_view, export_buttons
+import bet_journal
+import odds_history
+
+# --- PAGE CONFIG ---
+st.set_page_config(page_title="Bet Journal • TruLine Betting", page_icon="📒", layout="wide")
+use_global_style()
+header(active="Tools")
+
+load_dotenv()
+
+st.markdown("## Bet Journal")
+st.caption(f"Bets logged from the EV Finder ({bet_journal.JOURNAL_PATH}). Closing lines come from the "
+           f"scanner's odds history ({odds_history.HISTORY_DIR}).")
+
+bets = bet_journal.load()
+if bets.empty:
+    st.info("No bets yet. Log one from the EV Finder's “Log a bet” panel.")
+    footer()
+    st.stop()
+
+# --- CLOSING LINES ---
+# the sorted history index is built once per set of history files and reused by every rerun
+index = bet_journal.history_index(bets["event_id"])
+if not len(index):
+    st.info("No odds history for these bets yet: run `python -m scanner --history history/` "
+            "to record the closing lines.")
+report = bet_journal.journal_report(bets, index)
+stats = bet_journal.summary(report)
+
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Bets", stats["bets"], help=f"{stats['settled']} settled")
+c2.metric("Profit", f"${stats['profit']:,.2f}", help=f"${stats['staked']:,.2f} staked on settled bets")
+c3.metric("ROI", "—" if np.isnan(stats["roi"]) else f"{stats['roi']:.1%}")
+c4.metric("Avg CLV", "—" if np.isnan(stats["avg_clv"]) else f"{stats['avg_clv']:.2%}",
+          help="—" if np.isnan(stats["beat_close"]) else
+          f"{stats['beat_close']:.0%} of {stats['with_close']} bets beat the closing line")
+
+table = report.rename(columns={"placed_at": "Placed", "commence_time": "Date/Time", "book": "Sportsbook",
+                               "bet": "Bet", "price_american": "Odds (American)", "stake": "Stake $",
+                               "closing_price": "Close", "result": "Result", "profit": "Profit $"})
+table["Matchup"] = table["away_team"] + " vs " + table["home_team"]
+table["CLV %"] = (report["clv"] * 100).round(2)
+table["Close EV %"] = (report["close_ev"] * 100).round(2)
+table = table[["Placed", "Date/Time", "Matchup", "Sportsbook", "Bet", "Odds (American)", "Stake $",
+               "Close", "CLV %", "Close EV %", "Result", "Profit $", "bet_id"]]
+view = table_view(table, key="journal", sort_by="Placed", descending=True)
+# files are built only when a download is clicked, once per journal + history + view
+export_key = (bet_journal.JOURNAL_PATH, os.path.getmtime(bet_journal.JOURNAL_PATH), id(index),
+              st.session_state.get("journal_search"), st.session_state.get("journal_sort"),
+              st.session_state.get("journal_desc"))
+export_buttons(view, export_key, "bet_journal", key="journal_export")
+
+# --- SETTLE ---
+with st.expander("✅ Settle bets"):
+    open_bets = table[table["Result"] == ""]
+    labels = dict(zip(open_bets["bet_id"], open_bets["Matchup"] + " · " + open_bets["Bet"] + " @ "
+                      + open_bets["Sportsbook"]))
+    reopen = st.toggle("Include settled bets", key="journal_reopen")
+    if reopen:
+        labels = dict(zip(table["bet_id"], table["Matchup"] + " · " + table["Bet"] + " @ " + table["Sportsbook"]
+                          + " (" + table["Result"].replace("", "open") + ")"))
+    chosen = st.multiselect("Bets", list(labels), format_func=labels.get, key="journal_settle")
+    result = st.selectbox("Result", bet_journal.RESULTS[1:] + ([""] if reopen else []),
+                          format_func=lambda r: r or "open")
+    if st.button("Save result", disabled=not chosen):
+        bet_journal.settle(chosen, result)
+        del st.session_state["journal_settle"]
+        st.rerun()
+
+footer()
@@ -3,15 +3,22 @@ import os
 import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv
-from ui import use_global_style, header, footer
-from ev_utils import (
-    american_to_decimal, edge_decimal,
-    kelly_fraction, estimate_true_prob_from_ref
-)
+from ui import (use_global_style, header, footer, fetch_odds, diagnostics_start, diagnostics_panel,
+                diagnostics_stop, table_view, export_buttons, scored_base, scanner_snapshot, fragment, board_table,
+                board_latency, changes_strip, LIVE_SECONDS)
+from instrument import stage
+from ev_engine import table_from_scores, score_snapshot
+from ev_utils import DEVIG_METHODS
+from odds_snapshot import filter_sports, snapshot_hash, sport_keys
+from bankroll_sim import simulate, summarize, bets_from_table
+from portfolio import portfolio_scores
+import bet_journal
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="EV Finder • TruLine Betting", page_icon="📈", layout="wide")
 
+timings, profiler = diagnostics_start()
+
 # --- STYLE + HEADER ---
 use_global_style()
 header(active="EV Finder")
@@ -21,118 +28,6 @@ provider_name = os.getenv("PROVIDER", "csv")
 regions = os.getenv("REGIONS", "us")
 fallback_margin = float(os.getenv("REF_FALLBACK_MARGIN", "0.03"))
 
-# ---------- SAFE FLOAT ----------
-def safe_float(value):
-    try:
-        if value is None:
-            return None
-        s = str(value).strip()
-        if s == "" or s.lower() in ("nan", "none"):
-            return None
-        return float(s.replace("+", "")) if not s.startswith("-") else float(s)
-    except Exception:
-        return None
-
-# ---------- DATA PROVIDERS ----------
-def load_data_csv(path: str) -> pd.DataFrame:
-    return pd.read_csv(path)
-
-def fetch_odds(provider_name: str, regions: str) -> pd.DataFrame:
-    if provider_name.lower() == "csv":
-        return load_data_csv("sample_data/sample_odds.csv")
-    else:
-        try:
-            from providers.oddsapi_provider import OddsAPIProvider
-        except Exception as e:
-            st.error(f"Provider import failed: {e}")
-            return pd.DataFrame()
-
-        api_key = os.getenv("ODDS_API_KEY", "")
-        if not api_key:
-            st.error("Missing ODDS_API_KEY in environment. Set PROVIDER=csv to use sample data.")
-            return pd.DataFrame()
-
-        provider = OddsAPIProvider(api_key, regions=regions, markets="h2h", odds_format="american")
-        sports = provider.get_sports()
-        sport_options = [s.get("key") for s in sports]
-
-        chosen = st.sidebar.selectbox("Sport (live from API)", options=sport_options)
-        data = provider.get_odds(chosen)
-
-        rows = []
-        for ev in data:
-            sport_key = ev.get("sport_key")
-            commence = ev.get("commence_time")
-            home = ev.get("home_team")
-            away = ev.get("away_team")
-            for bk in ev.get("bookmakers", []):
-                book = bk.get("title")
-                for mk in bk.get("markets", []):
-                    if mk.get("key") != "h2h":
-                        continue
-                    outcomes = mk.get("outcomes", [])
-                    for oc in outcomes:
-                        name = oc.get("name")
-                        side = "home" if name == home else ("away" if name == away else name)
-                        price_am = oc.get("price")
-                        opp_price = None
-                        for oc2 in outcomes:
-                            if oc2 is not oc:
-                                opp_price = oc2.get("price")
-                                break
-                        rows.append({
-                            "sport": sport_key,
-                            "commence_time": commence,
-                            "home_team": home,
-                            "away_team": away,
-                            "book": book,
-                            "market": "h2h",
-                            "side": side,
-                            "price_american": price_am,
-                            "opp_price_american": opp_price,
-                            "ref_price_american": None,
-                        })
-        return pd.DataFrame(rows)
-
-# ---------- MAIN COMPUTE ----------
-def compute_table(df: pd.DataFrame, kelly_cap: float, stake_bankroll: float,
-                  fallback_margin: float, min_edge: float) -> pd.DataFrame:
-    out = []
-    for _, row in df.iterrows():
-        price = safe_float(row["price_american"])
-        opp_val = safe_float(row.get("opp_price_american"))
-        ref_val = safe_float(row.get("ref_price_american"))
-
-        if price is None:
-            continue
-
-        offer_decimal = american_to_decimal(price)
-        side_implied = 1.0 / offer_decimal
-        opp_implied = (1.0 / american_to_decimal(opp_val)) if opp_val else 1 - side_implied
-
-        true_p = estimate_true_prob_from_ref(ref_val, fallback_margin, side_implied, opp_implied)
-        ev = edge_decimal(offer_decimal, true_p)
-        full_k = kelly_fraction(true_p, offer_decimal)
-        stake_reco = max(0.0, min(full_k * kelly_cap * stake_bankroll, stake_bankroll))
-
-        out.append({
-            "Date/Time": row["commence_time"],
-            "Matchup": f"{row['away_team']} vs {row['home_team']}",
-            "Sportsbook": row["book"],
-            "Odds (American)": price,
-            "Implied Prob %": round(side_implied * 100, 2),
-            "Expected Prob %": round(true_p * 100, 2),
-            "Edge %": round(ev * 100, 2),
-            "Stake $": round(stake_reco, 2),
-        })
-
-    out = pd.DataFrame(out)
-    if out.empty:
-        return out
-    out = out.sort_values(by=["Date/Time", "Edge %"], ascending=[True, False])
-    out = out[out["Edge %"] >= min_edge * 100]  # since we converted to %
-    return out.reset_index(drop=True)
-
 # ---------- PAGE ----------
 st.sidebar.header("⚙️ Settings")
 min_edge_default = float(os.getenv("MIN_EDGE", "0.02"))
@@ -141,6 +36,15 @@ kelly_cap_default = float(os.getenv("KELLY_FRACTION", "0.25"))
 min_edge = st.sidebar.slider("Min Edge (%)", 0.0, 10.0, min_edge_default * 100, 0.5)
 bankroll = st.sidebar.number_input("Bankroll ($)", min_value=10.0, value=1000.0, step=50.0)
 kelly_cap = st.sidebar.slider("Kelly Cap", 0.0, 1.0, kelly_cap_default, 0.05)
+method_default = os.getenv("DEVIG_METHOD", "proportional")
+devig_method = st.sidebar.selectbox("De-vig method", DEVIG_METHODS,
+                                    index=DEVIG_METHODS.index(method_default) if method_default in DEVIG_METHODS else 0)
+portfolio_mode = st.sidebar.toggle("Portfolio sizing (joint Kelly)", value=False,
+                                   help="Size all bets together: same-game outcomes are exclusive "
+                                        "and total stakes stay under the exposure cap.")
+max_exposure = st.sidebar.slider("Max Exposure (%)", 5.0, 100.0,
+                                 float(os.getenv("MAX_EXPOSURE", "0.5")) * 100, 5.0,
+                                 disabled=not portfolio_mode)
 
 books_default = [b.strip() for b in os.getenv(
     "BOOKS",
@@ -149,34 +53,114 @@ books_default = [b.strip() for b in os.getenv(
 selected_books = st.sidebar.multiselect("Sportsbooks", books_default, default=books_default)
 
 sports_filter = st.sidebar.multiselect("Sports", ["nfl", "nba", "mlb", "wnba", "epl", "laliga", "nhl"], default=[])
+live_board = st.sidebar.toggle("Live board", value=os.getenv("LIVE_BOARD", "0") == "1",
+                               help=f"Redraw only the table every {LIVE_SECONDS:g}s with the scanner's latest "
+                                    "snapshot, highlighting new and moved edges.")
 
 st.markdown("## 📈 Positive EV Betting Finder")
 
 df = fetch_odds(provider_name, regions)
 if df.empty:
     st.warning("No data loaded. If using API, ensure ODDS_API_KEY is set in `.env`.")
+    diagnostics_stop(profiler)
     st.stop()
 
-if selected_books:
-    df = df[df["book"].isin(selected_books)]
-if sports_filter:
-    df = df[df["sport"].isin(sports_filter)]
-
-table = compute_table(
-    df=df,
-    kelly_cap=kelly_cap,
-    stake_bankroll=bankroll,
-    fallback_margin=fallback_margin,
-    min_edge=min_edge / 100,
-)
-
-if table.empty:
-    st.info("No bets passed the filters — adjust settings or try again later.")
-else:
-    st.dataframe(table, use_container_width=True, hide_index=True)
-
-    csv = table.to_csv(index=False).encode("utf-8")
-    st.download_button("Download CSV", data=csv, file_name="positive_ev_opportunities.csv", mime="text/csv")
+settings = (min_edge, bankroll, kelly_cap, devig_method, tuple(selected_books), tuple(sports_filter),
+            portfolio_mode, max_exposure)
+
+def build_table(df: pd.DataFrame) -> pd.DataFrame:
+    if portfolio_mode:
+        # the joint allocation depends on every setting, so this path scores and solves per change
+        with stage("filter") as s:
+            if selected_books:
+                df = df[df["book"].isin(selected_books)]
+            if sports_filter:
+                df = filter_sports(df, sports_filter)
+            s["rows"] = len(df)
+        with stage("score") as s:
+            if "full_kelly" not in df.columns or df.attrs.get("devig_method") != devig_method:
+                df = score_snapshot(df, fallback_margin, devig_method)
+            scored = portfolio_scores(df, kelly_cap, min_edge / 100, max_exposure / 100)
+            table = table_from_scores(scored, kelly_cap, bankroll, min_edge / 100)
+            s["rows"] = len(table)
+        return table
+    # odds math once per snapshot (shared by all sessions); the sidebar is a masked view of it
+    base = scored_base(df, fallback_margin, devig_method)
+    with stage("view") as s:
+        table = base.view(kelly_cap, bankroll, min_edge / 100, selected_books, sport_keys(sports_filter))
+        s["rows"] = len(table)
+    return table
+
+def board(df: pd.DataFrame):
+    """(table, searched/sorted view, snapshot it came from) for the opportunity table.
+    As a live fragment it reruns on its own timer, picks up each new scanner
+    snapshot and redraws only this part of the page.
+    """
+    if live_board:
+        # df is the frame of the last full rerun; timer ticks swap in the scanner's newest
+        scanned, _ = scanner_snapshot()
+        df = scanned if scanned is not None else df
+    snapshot = snapshot_hash(df)
+    table, status = board_table("ev", snapshot, settings, lambda: build_table(df))
+    if table.empty:
+        st.info("No bets passed the filters — adjust settings or try again later.")
+        return table, table, df
+    if live_board:
+        changes_strip(table, status)
+    with stage("render", rows=len(table)):
+        view = table_view(table, key="ev", status=status if live_board else None)
+    if live_board:
+        latency = board_latency("ev", df.attrs.get("published_at"))
+        st.caption(f"Live: checking every {LIVE_SECONDS:g}s"
+                   + (f" · on screen {latency * 1000:.0f} ms after the scanner published it"
+                      if latency is not None else " · start `python -m scanner` for live snapshots"))
+
+    # files are built only when a download is clicked, once per snapshot + settings
+    export_key = (snapshot, settings, st.session_state.get("ev_search"),
+                  st.session_state.get("ev_sort"), st.session_state.get("ev_desc"))
+    export_buttons(view, export_key, "positive_ev_opportunities", key="ev_export")
+    return table, view, df
+
+table, view, shown = fragment(board, LIVE_SECONDS if live_board else None)(df)
+
+if not table.empty:
+    with st.expander("📒 Log a bet"):
+        st.caption(f"Adds the bet at its listed price to the bet journal ({bet_journal.JOURNAL_PATH}). "
+                   "The Bet Journal page tracks its closing line value and result.")
+        picks = view.head(200)  # the top of the table as searched and sorted above
+        pick = st.selectbox("Bet", range(len(picks)), key="log_pick",
+                            format_func=lambda i: f"{picks.iloc[i]['Matchup']} · {picks.iloc[i]['Bet']} @ "
+                                                  f"{picks.iloc[i]['Sportsbook']} ({picks.iloc[i]['Odds (American)']:+.0f}, "
+                                                  f"{picks.iloc[i]['Edge %']:.1f}%)")
+        if pick is not None and pick < len(picks):
+            stake = st.number_input("Stake ($)", min_value=0.0, step=5.0, key=f"log_stake_{pick}",
+                                    value=float(picks.iloc[pick]["Stake $"]))
+            if st.button("Log bet"):
+                try:
+                    bet_journal.append([bet_journal.entry_from_row(shown, picks.iloc[pick], stake)])
+                    st.success(f"Logged {picks.iloc[pick]['Bet']} @ {picks.iloc[pick]['Sportsbook']}.")
+                except ValueError as e:
+                    st.error(f"{e}. The line moved; pick it again from the refreshed table.")
+
+    with st.expander("🎲 Kelly cap simulator"):
+        st.caption("Simulates bankroll paths that keep betting opportunities like the ones above, "
+                   "staking capped Kelly of the current bankroll.")
+        col1, col2 = st.columns(2)
+        n_paths = col1.select_slider("Paths", [1_000, 10_000, 100_000], value=10_000)
+        n_bets = col2.slider("Bets per path", 100, 2_000, 1_000, 100)
+        if st.button("Run simulation"):
+            caps = sorted({0.1, 0.25, 0.5, 1.0, round(kelly_cap, 2)} - {0.0})
+            with stage("simulate", rows=n_paths), st.spinner("Simulating…"):
+                result = simulate(*bets_from_table(table), caps=caps, n_paths=n_paths, n_bets=n_bets)
+            st.dataframe(summarize(result), use_container_width=True, hide_index=True)
+
+if provider_name.lower() != "csv":
+    from providers.cache import shared_cache
+    stats = shared_cache().stats()
+    st.sidebar.caption(f"API cache: {stats['hits']} hits · {stats['misses']} misses · "
+                       f"{stats['coalesced']} coalesced ({stats['hit_rate']:.0%} hit rate)")
+
+diagnostics_panel(timings, profiler)
 
 # --- FOOTER ---
 footer()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+import os
+import streamlit as st
+from dotenv import load_dotenv
+from ui import use_global_style, header, footer, fetch_odds, export_buttons
+from ev_engine import score_snapshot
+from ev_utils import DEVIG_METHODS
+from odds_snapshot import filter_sports, snapshot_hash
+from parlay import build_parlays
+
+# --- PAGE CONFIG ---
+st.set_page_config(page_title="Parlay Builder • TruLine Betting", page_icon="🧩", layout="wide")
+
+# --- STYLE + HEADER ---
+use_global_style()
+header(active="Tools")
+
+load_dotenv()
+provider_name = os.getenv("PROVIDER", "csv")
+regions = os.getenv("REGIONS", "us")
+fallback_margin = float(os.getenv("REF_FALLBACK_MARGIN", "0.03"))
+
+# ---------- PAGE ----------
+st.sidebar.header("⚙️ Settings")
+min_legs, max_legs = st.sidebar.slider("Legs", 2, 6, (2, 3))
+min_prob = st.sidebar.slider("Min Win Prob (%)", 0.0, 50.0, 5.0, 0.5)
+min_edge = st.sidebar.slider("Min Leg Edge (%)", 0.0, 10.0, 0.0, 0.5)
+top_k = st.sidebar.number_input("Parlays to show", min_value=1, max_value=100, value=10, step=1)
+bankroll = st.sidebar.number_input("Bankroll ($)", min_value=10.0, value=1000.0, step=50.0)
+kelly_cap = st.sidebar.slider("Kelly Cap", 0.0, 1.0, float(os.getenv("KELLY_FRACTION", "0.25")), 0.05)
+method_default = os.getenv("DEVIG_METHOD", "proportional")
+devig_method = st.sidebar.selectbox("De-vig method", DEVIG_METHODS,
+                                    index=DEVIG_METHODS.index(method_default) if method_default in DEVIG_METHODS else 0)
+
+books_default = [b.strip() for b in os.getenv(
+    "BOOKS",
+    "DraftKings,FanDuel,BetMGM,PointsBet,Caesars,BetRivers,Unibet,Bet365,Pinnacle,BetUS"
+).split(",") if b.strip()]
+selected_books = st.sidebar.multiselect("Sportsbooks", books_default, default=books_default)
+
+sports_filter = st.sidebar.multiselect("Sports", ["nfl", "nba", "mlb", "wnba", "epl", "laliga", "nhl"], default=[])
+
+st.markdown("## 🧩 Parlay Builder")
+st.caption("Highest-EV combinations of +EV legs, at most one leg per game. "
+           "Legs are treated as independent.")
+
+df = fetch_odds(provider_name, regions)
+if df.empty:
+    st.warning("No data loaded. If using API, ensure ODDS_API_KEY is set in `.env`.")
+    st.stop()
+snapshot = snapshot_hash(df)
+
+if selected_books:
+    df = df[df["book"].isin(selected_books)]
+if sports_filter:
+    df = filter_sports(df, sports_filter)
+
+if "full_kelly" not in df.columns or df.attrs.get("devig_method") != devig_method:
+    df = score_snapshot(df, fallback_margin, devig_method)
+table = build_parlays(df, int(top_k), min_legs, max_legs, min_prob / 100, min_edge / 100, kelly_cap, bankroll)
+
+if table.empty:
+    st.info("No parlays passed the filters — adjust settings or try again later.")
+else:
+    st.dataframe(table, use_container_width=True, hide_index=True)
+
+    # files are built only when a download is clicked, once per snapshot + settings
+    settings = (min_legs, max_legs, min_prob, min_edge, int(top_k), bankroll, kelly_cap, devig_method,
+                tuple(selected_books), tuple(sports_filter))
+    export_buttons(table, (snapshot, settings), "parlays", key="parlay_export")
+
+# --- FOOTER ---
+footer()
@@ -17,11 +17,15 @@ st.markdown(
         </div>
         <div class="card">
             <h4>Arbitrage</h4>
-            <button class="btn btn-small" disabled>Coming soon</button>
+            <a class="btn btn-small" href="/Arbitrage">Open</a>
         </div>
         <div class="card">
             <h4>Parlay Builder</h4>
-            <button class="btn btn-small" disabled>Coming soon</button>
+            <a class="btn btn-small" href="/Parlay_Builder">Open</a>
+        </div>
+        <div class="card">
+            <h4>Bet Journal</h4>
+            <a class="btn btn-small" href="/Bet_Journal">Open</a>
         </div>
     </div>
     """,
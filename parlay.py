@@ -0,0 +1,123 @@
+from __future__ import annotations
+import bisect
+import heapq
+import math
+import numpy as np
+import pandas as pd
+from ev_engine import _matchups, _bets, outcome_codes
+from ev_utils import american_to_decimal_array, decimal_to_american, kelly_fraction
+
+PARLAY_COLUMNS = ["Parlay #", "Legs", "Odds (American)", "Win Prob %", "EV %", "Stake $"]
+
+def parlay_legs(scored: pd.DataFrame, min_edge: float = 0.0) -> pd.DataFrame:
+    """Candidate legs from a score_snapshot frame: +EV rows, keeping only the best
+    quote of each (event, market, line, outcome), sorted by EV factor (p * d) descending.
+    """
+    if scored.empty:
+        return scored.assign(decimal=np.empty(0), factor=np.empty(0))
+    decimal = american_to_decimal_array(scored["price_american"].to_numpy(dtype=float))
+    factor = scored["true_prob"].to_numpy(dtype=float) * decimal
+    keep = np.flatnonzero(factor - 1 > max(min_edge, 0.0))
+    order = keep[np.argsort(-factor[keep], kind="stable")]
+    legs = scored.iloc[order].assign(decimal=decimal[order], factor=factor[order])
+    outcome = outcome_codes(legs, np.arange(len(legs)))
+    return legs[~pd.Series(outcome).duplicated().to_numpy()].reset_index(drop=True)
+
+def _suffix_max(x: np.ndarray) -> list:
+    return np.maximum.accumulate(x[::-1])[::-1].tolist()
+
+def top_parlays(factor: np.ndarray, prob: np.ndarray, event: np.ndarray, k: int = 10,
+                min_legs: int = 2, max_legs: int = 3, min_prob: float = 0.0) -> list:
+    """The k leg combinations with the highest EV factor prod(p * d), best first,
+    as (factor, leg indices). Legs must be sorted by factor descending.
+
+    Depth-first over legs in that order with at most one leg per event. A branch
+    is cut when its win probability would drop below min_prob, or when even the
+    best remaining legs could not lift it above the k-th best parlay found so
+    far. Both bounds only shrink further down the list, so a cut ends the loop.
+    The legs still to come are also capped by min_prob: no more than the most
+    probable legs of the board, multiplied in, keep the parlay above it.
+    """
+    factor = np.asarray(factor, dtype=float)
+    prob = np.asarray(prob, dtype=float)
+    event = np.asarray(event)
+    n = len(factor)
+    if n < min_legs or k <= 0:
+        return []
+    # work in log space; the best s legs from i on are simply legs i..i+s-1
+    logf = np.log(factor)
+    csum = np.concatenate([[0.0], np.cumsum(logf)]).tolist()
+    # with a min_prob each leg spends -log(p) of the budget log(p_sofar / min_prob), so the
+    # log factor still reachable from i on is at most budget * the best logf / -log(p) ratio
+    best_prob = _suffix_max(prob)
+    best_ratio = _suffix_max(logf / np.maximum(-np.log(prob), 1e-12))
+    log_min = np.log(min_prob) if min_prob > 0 else -np.inf
+    # -log of the product of the s most probable legs, s = 0..max_legs: at most s
+    # more legs fit while it stays within the budget log(p_sofar / min_prob)
+    top_cost = np.concatenate([[0.0], np.cumsum(-np.log(np.sort(prob)[::-1][:max_legs]))]).tolist()
+    logf, prob_l, event_l = logf.tolist(), prob.tolist(), event.tolist()
+    heap = []  # (log factor, legs) min-heap of the k best so far
+
+    def dfs(start, chosen, used, log_partial, p):
+        budget = math.log(p) - log_min
+        slots = bisect.bisect_right(top_cost, budget + 1e-12, 0, max_legs - len(chosen) + 1) - 1
+        if slots <= 0:
+            return
+        for i in range(start, n):
+            if p * best_prob[i] < min_prob:
+                return
+            if len(heap) == k:
+                reach = min(csum[min(n, i + slots)] - csum[i], budget * best_ratio[i])
+                if log_partial + reach <= heap[0][0]:
+                    return  # every later sibling is bounded by the same or less
+            if event_l[i] in used:
+                continue
+            q = p * prob_l[i]
+            if q < min_prob:
+                continue
+            chosen.append(i)
+            log_now = log_partial + logf[i]
+            if len(chosen) >= min_legs:
+                item = (log_now, tuple(chosen))
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+            if slots > 1:
+                used.add(event_l[i])
+                dfs(i + 1, chosen, used, log_now, q)
+                used.discard(event_l[i])
+            chosen.pop()
+
+    dfs(0, [], set(), 0.0, 1.0)
+    return [(float(np.exp(log_f)), legs) for log_f, legs in sorted(heap, reverse=True)]
+
+def build_parlays(scored: pd.DataFrame, k: int = 10, min_legs: int = 2, max_legs: int = 3,
+                  min_prob: float = 0.0, min_edge: float = 0.0, kelly_cap: float = 0.25,
+                  stake_bankroll: float = 1000.0) -> pd.DataFrame:
+    """Top-k parlays from a score_snapshot frame, one row per parlay."""
+    legs = parlay_legs(scored, min_edge)
+    found = top_parlays(legs["factor"].to_numpy(), legs["true_prob"].to_numpy(dtype=float),
+                        pd.factorize(legs["event_id"])[0], k, min_legs, max_legs, min_prob) if len(legs) else []
+    if not found:
+        return pd.DataFrame(columns=PARLAY_COLUMNS)
+
+    matchups = _matchups(legs)
+    prices = legs["price_american"].to_numpy(dtype=float)
+    labels = [f"{m} · {bet} @ {book} ({price:+.0f})" for m, bet, book, price in
+              zip(matchups, _bets(legs), legs["book"], prices)]
+    decimal, prob = legs["decimal"].to_numpy(), legs["true_prob"].to_numpy(dtype=float)
+    rows = []
+    for n, (ev_factor, combo) in enumerate(found, start=1):
+        idx = list(combo)
+        d, p = float(np.prod(decimal[idx])), float(np.prod(prob[idx]))
+        stake = min(kelly_fraction(p, d) * kelly_cap * stake_bankroll, stake_bankroll)
+        rows.append({
+            "Parlay #": n,
+            "Legs": "\n".join(labels[i] for i in idx),
+            "Odds (American)": decimal_to_american(d),
+            "Win Prob %": round(p * 100, 2),
+            "EV %": round((ev_factor - 1) * 100, 2),
+            "Stake $": round(max(stake, 0.0), 2),
+        })
+    return pd.DataFrame(rows, columns=PARLAY_COLUMNS)
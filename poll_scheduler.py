@@ -0,0 +1,203 @@
+"""Quota-aware polling plan for the scanner.
+
+TheOddsAPI charges each odds call markets x regions requests and reports the
+account quota in x-requests-remaining / x-requests-used headers. PollScheduler
+decides when each sport is fetched next: every few minutes for games about to
+start and for sports whose lines are moving, every few hours for far-off ones.
+When those wishes add up to more than the daily budget allows for the rest of
+the UTC day, every interval is stretched by the same factor.
+
+    scheduler = PollScheduler(sports, daily_budget=500, cost=request_cost(markets, regions))
+    due = scheduler.due()
+    frames = ...fetch the due sports...
+    scheduler.record_fetch(due, frames, provider.quota)
+    time.sleep(scheduler.sleep_for())
+"""
+from __future__ import annotations
+import math
+import time
+import numpy as np
+import pandas as pd
+from ev_utils import implied_prob_from_american_array
+from odds_delta import key_parts, row_keys
+from odds_snapshot import parse_times
+
+DAY = 86400.0
+# (hours until the sport's next kickoff, seconds between polls): the first tier that applies
+KICKOFF_TIERS = ((1, 120), (6, 600), (24, 1800), (72, 3600), (math.inf, 3 * 3600))
+VOLATILITY_REF = 0.005  # line volatility (probability per sqrt(hour)) that halves the interval
+LIVE_HOURS = 4.0        # a kickoff this long ago no longer counts as an upcoming game
+
+def request_cost(markets, regions) -> int:
+    """Requests TheOddsAPI charges for one odds call: markets x regions."""
+    count = lambda x: len([p for p in (x.split(",") if isinstance(x, str) else x) if str(p).strip()])
+    return max(1, count(markets) * count(regions))
+
+def kickoff_interval(hours: float | None) -> float:
+    """Base seconds between polls for a sport whose next game starts in `hours` (None = no games)."""
+    hours = math.inf if hours is None else hours
+    return next(seconds for limit, seconds in KICKOFF_TIERS if hours <= limit)
+
+def line_volatility(prev: pd.DataFrame, curr: pd.DataFrame, hours: float) -> float | None:
+    """Root-mean-square implied-probability move per sqrt(hour) of the quotes present
+    in both snapshots, or None when none are. Unmoved quotes count as zero moves.
+    """
+    if prev is None or not len(prev) or not len(curr) or hours <= 0:
+        return None
+    prev_keys, curr_keys = row_keys(key_parts(prev), key_parts(curr))
+    index = pd.Index(prev_keys)
+    pos = np.arange(len(prev))
+    if not index.is_unique:
+        last = ~index.duplicated(keep="last")
+        index, pos = index[last], pos[last]
+    hit = index.get_indexer(curr_keys)
+    found = hit >= 0
+    if not found.any():
+        return None
+    old = implied_prob_from_american_array(prev["price_american"].to_numpy(dtype=float)[pos[hit[found]]])
+    new = implied_prob_from_american_array(curr["price_american"].to_numpy(dtype=float)[found])
+    move = np.nan_to_num(new - old)
+    return float(np.sqrt(np.mean(move ** 2) / hours))
+
+class QuotaBudget:
+    """Requests spent per UTC day against a daily budget, never past the account's remaining quota."""
+
+    def __init__(self, daily: float):
+        self.daily = float(daily)
+        self.day = None
+        self.spent = 0.0
+        self.remaining = math.inf  # last x-requests-remaining seen
+        self._used = None          # last x-requests-used seen
+
+    def _roll(self, now: float):
+        day = int(now // DAY)
+        if day != self.day:
+            self.day, self.spent = day, 0.0
+
+    def charge(self, estimate: float, quota: dict | None = None, now: float | None = None) -> float:
+        """Record one batch of calls and return its cost. With quota headers the cost is
+        the change in x-requests-used, so cache hits are free and calls made by other
+        clients of the same key count too; otherwise it is `estimate`.
+        """
+        now = time.time() if now is None else now
+        self._roll(now)
+        quota = quota or {}
+        used = quota.get("used")
+        cost = max(used - self._used, 0.0) if used is not None and self._used is not None else float(estimate)
+        if used is not None:
+            self._used = used
+        if quota.get("remaining") is not None:
+            self.remaining = quota["remaining"]
+        self.spent += cost
+        return cost
+
+    def available(self, now: float | None = None) -> float:
+        """Requests that may still be spent today."""
+        now = time.time() if now is None else now
+        self._roll(now)
+        return max(min(self.daily - self.spent, self.remaining), 0.0)
+
+    @staticmethod
+    def seconds_left(now: float) -> float:
+        """Seconds until the budget resets at UTC midnight."""
+        return DAY - now % DAY
+
+class PollScheduler:
+    """When to fetch each sport, from its next kickoff, its recent line volatility and the budget."""
+
+    def __init__(self, sports, daily_budget: float, cost: float = 1, min_seconds: float = 60,
+                 max_sleep: float = 300):
+        self.cost = float(cost)
+        self.budget = QuotaBudget(daily_budget)
+        self.min_seconds = min_seconds
+        self.max_sleep = max_sleep
+        self.state = {}
+        self.add(sports)
+
+    def add(self, sports):
+        """Start tracking sports; a new sport is due immediately."""
+        for sport in sports:
+            self.state.setdefault(sport, {"last": None, "kickoff": None, "volatility": 0.0,
+                                           "frame": None, "frame_at": None})
+
+    def desired_interval(self, sport: str, now: float) -> float:
+        """Seconds between polls this sport wants before the budget is applied."""
+        s = self.state[sport]
+        hours = None
+        if s["kickoff"] is not None and s["kickoff"] > now - LIVE_HOURS * 3600:
+            hours = max(s["kickoff"] - now, 0.0) / 3600
+        return max(kickoff_interval(hours) / (1 + s["volatility"] / VOLATILITY_REF), self.min_seconds)
+
+    def intervals(self, now: float | None = None) -> dict:
+        """Per-sport seconds between polls, stretched evenly when the wanted request
+        rate would spend more than today's remaining budget before midnight.
+        """
+        now = time.time() if now is None else now
+        wanted = {sport: self.desired_interval(sport, now) for sport in self.state}
+        rate = sum(self.cost / seconds for seconds in wanted.values())
+        allowed = self.budget.available(now) / self.budget.seconds_left(now)
+        stretch = max(1.0, rate / allowed) if allowed > 0 else math.inf
+        return {sport: seconds * stretch for sport, seconds in wanted.items()}
+
+    def due(self, now: float | None = None) -> list:
+        """Sports to fetch now, most overdue first, as many as today's budget still covers."""
+        now = time.time() if now is None else now
+        overdue = []
+        for sport, seconds in self.intervals(now).items():
+            last = self.state[sport]["last"]
+            if last is None:
+                overdue.append((math.inf, sport))
+            elif math.isfinite(seconds) and now - last >= seconds:
+                overdue.append(((now - last) / seconds, sport))
+        overdue.sort(key=lambda x: -x[0])
+        affordable = int(self.budget.available(now) // self.cost)
+        return [sport for _, sport in overdue[:affordable]]
+
+    def record_fetch(self, sports, frames: dict, quota: dict | None = None, now: float | None = None) -> float:
+        """Update each fetched sport from its new snapshot (frames: sport -> DataFrame)
+        and charge the batch to the budget; returns its cost. A sport that came back
+        empty, which is also how a failed call looks, keeps its last kickoff and lines.
+        """
+        now = time.time() if now is None else now
+        self.add(sports)
+        for sport in sports:
+            s = self.state[sport]
+            frame = frames.get(sport)
+            if frame is not None and len(frame):
+                starts = parse_times(frame["commence_time"])
+                s["kickoff"] = starts.min().timestamp() if starts.notna().any() else None
+                if s["frame"] is not None:
+                    vol = line_volatility(s["frame"], frame, (now - s["frame_at"]) / 3600)
+                    if vol is not None:
+                        s["volatility"] = 0.5 * s["volatility"] + 0.5 * vol
+                s["frame"], s["frame_at"] = frame, now
+            s["last"] = now
+        return self.budget.charge(self.cost * len(sports), quota, now)
+
+    def sleep_for(self, now: float | None = None) -> float:
+        """Seconds until the next sport falls due (at most max_sleep)."""
+        now = time.time() if now is None else now
+        if self.budget.available(now) < self.cost:
+            return min(self.budget.seconds_left(now), self.max_sleep)
+        waits = [self.state[sport]["last"] + seconds - now if self.state[sport]["last"] is not None else 0.0
+                 for sport, seconds in self.intervals(now).items()]
+        wait = min(waits, default=self.max_sleep)
+        if not math.isfinite(wait):
+            wait = self.budget.seconds_left(now)
+        return min(max(wait, 1.0), self.max_sleep)
+
+    def summary(self, now: float | None = None) -> pd.DataFrame:
+        """One row per sport: hours to kickoff, volatility, planned interval and next poll in seconds."""
+        now = time.time() if now is None else now
+        intervals = self.intervals(now)
+        rows = []
+        for sport, s in self.state.items():
+            seconds = intervals[sport]
+            rows.append({
+                "sport": sport,
+                "hours_to_kickoff": None if s["kickoff"] is None else round((s["kickoff"] - now) / 3600, 2),
+                "volatility": round(s["volatility"], 5),
+                "interval_s": round(seconds, 1),
+                "next_in_s": 0.0 if s["last"] is None else round(s["last"] + seconds - now, 1),
+            })
+        return pd.DataFrame(rows)
@@ -0,0 +1,163 @@
+"""Joint Kelly sizing for bets that are open at the same time.
+
+Independent Kelly sizes each bet as if it were the only one. Here the stakes
+s (fractions of bankroll) maximize E[log(1 + R s)] over outcome scenarios R,
+where outcomes of one event are mutually exclusive (home and away cannot both
+win, and two books on the same side win together) and events are independent.
+Stakes are kept non-negative with a cap on their total.
+"""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from ev_engine import outcome_codes
+from ev_utils import american_to_decimal_array
+
+MAX_SCENARIOS = 4096  # enumerate every joint outcome up to this many, else sample
+N_SAMPLES = 4000
+
+def _project(s: np.ndarray, total: float) -> np.ndarray:
+    """Euclidean projection onto {s >= 0, sum(s) <= total}."""
+    s = np.maximum(s, 0.0)
+    if s.sum() <= total:
+        return s
+    u = np.sort(s)[::-1]
+    css = np.cumsum(u) - total
+    k = np.flatnonzero(u - css / np.arange(1, len(u) + 1) > 0)[-1]
+    return np.maximum(s - css[k] / (k + 1), 0.0)
+
+def scenarios(event: np.ndarray, outcome: np.ndarray, prob: np.ndarray,
+              max_scenarios: int = MAX_SCENARIOS, n_samples: int = N_SAMPLES, seed: int = 0):
+    """Joint outcomes of the events as (winner, weight): winner[m, j] is the outcome
+    code that wins event j in scenario m (-1 = an outcome nobody bet on).
+
+    `outcome` codes are dense over all events, `prob` is each outcome's win
+    probability. Scenarios are enumerated exactly while their count stays under
+    max_scenarios, otherwise n_samples are drawn with equal weights.
+    """
+    n_events = event.max() + 1
+    # per event: its outcome codes and probabilities, plus "none of them" when they don't sum to 1
+    options, weights = [], []
+    for j in range(n_events):
+        codes = np.flatnonzero(event == j)
+        p = prob[codes]
+        if p.sum() > 1:
+            p = p / p.sum()
+        options.append(np.append(outcome[codes], -1))
+        weights.append(np.append(p, max(0.0, 1 - p.sum())))
+
+    sizes = np.array([len(o) for o in options])
+    if np.prod(sizes.astype(float)) <= max_scenarios:
+        winner = np.zeros((1, 0), dtype=np.int64)
+        weight = np.ones(1)
+        for opts, w in zip(options, weights):
+            m = len(weight)
+            winner = np.column_stack([np.repeat(winner, len(opts), axis=0), np.tile(opts, m)])
+            weight = np.repeat(weight, len(opts)) * np.tile(w, m)
+        keep = weight > 0
+        return winner[keep], weight[keep] / weight[keep].sum()
+
+    rng = np.random.default_rng(seed)
+    u = rng.random((n_samples, n_events))
+    width = sizes.max()
+    cum = np.full((n_events, width), np.inf)
+    opts = np.full((n_events, width), -1, dtype=np.int64)
+    for j, (o, w) in enumerate(zip(options, weights)):
+        cum[j, :len(w)] = np.cumsum(w)
+        cum[j, len(w) - 1] = np.inf  # rounding never leaves a draw unassigned
+        opts[j, :len(o)] = o
+    pick = (u[:, :, None] >= cum[None, :, :]).sum(axis=2)
+    return opts[np.arange(n_events)[None, :], pick], np.full(n_samples, 1.0 / n_samples)
+
+def solve(returns: np.ndarray, weight: np.ndarray, total: float, tol: float = 1e-7,
+          max_iter: int = 500) -> np.ndarray:
+    """Maximize sum_m weight[m] * log(1 + returns[m] @ s) over s >= 0, sum(s) <= total.
+
+    Projected gradient ascent with Barzilai-Borwein steps and a backtracking line
+    search that also keeps every scenario's wealth positive. The problem is
+    concave, so this converges to the joint Kelly optimum.
+    """
+    n = returns.shape[1]
+    s = np.zeros(n)
+
+    def value(x):
+        wealth = 1.0 + returns @ x
+        if (wealth <= 0).any():
+            return -np.inf, None
+        return float(weight @ np.log(wealth)), wealth
+
+    f, wealth = value(s)
+    grad = returns.T @ (weight / wealth)
+    step = 1.0
+    for _ in range(max_iter):
+        while True:
+            candidate = _project(s + step * grad, total)
+            f_new, wealth_new = value(candidate)
+            if f_new >= f + 1e-4 * grad @ (candidate - s) or step < 1e-12:
+                break
+            step *= 0.5
+        if f_new == -np.inf:
+            break
+        grad_new = returns.T @ (weight / wealth_new)
+        ds, dg = candidate - s, grad_new - grad
+        s, f, grad = candidate, f_new, grad_new
+        if np.abs(ds).max() < tol:
+            break
+        curvature = -(ds @ dg)
+        step = (ds @ ds) / curvature if curvature > 1e-16 else step * 2
+    return s
+
+def joint_kelly(event_ids, sides, prob, decimal, total: float = 1.0, **kwargs) -> np.ndarray:
+    """Joint full-Kelly fractions for a set of simultaneous bets, summing to at most `total`.
+
+    Rows with the same (event, side) are the same outcome at different books;
+    their win probability is averaged and only the best price is staked, since
+    it pays more in the same scenarios. Bets with no edge get 0.
+    """
+    prob = np.asarray(prob, dtype=float)
+    decimal = np.asarray(decimal, dtype=float)
+    out = np.zeros(len(prob))
+    live = np.flatnonzero(prob * decimal > 1)
+    if not len(live) or total <= 0:
+        return out
+    event, _ = pd.factorize(np.asarray(event_ids, dtype=object)[live])
+    pair = pd.Series(event).astype(str) + "|" + pd.Series(np.asarray(sides, dtype=object)[live]).astype(str)
+    outcome, _ = pd.factorize(pair)
+    outcome_prob = np.bincount(outcome, prob[live]) / np.bincount(outcome)
+    outcome_event = np.zeros(len(outcome_prob), dtype=np.int64)
+    outcome_event[outcome] = event
+
+    # best quote per outcome: highest price, first row on ties
+    order = np.lexsort((-decimal[live], outcome))
+    best = order[np.r_[True, outcome[order][1:] != outcome[order][:-1]]]
+    live, event, outcome = live[best], event[best], outcome[best]
+
+    winner, weight = scenarios(outcome_event, np.arange(len(outcome_prob)), outcome_prob, **kwargs)
+    won = winner[:, event] == outcome[None, :]
+    returns = np.where(won, decimal[live] - 1.0, -1.0)
+    out[live] = solve(returns, weight, total)
+    return out
+
+def portfolio_scores(scored: pd.DataFrame, kelly_cap: float, min_edge: float,
+                     max_exposure: float) -> pd.DataFrame:
+    """score_snapshot rows with 'full_kelly' replaced by the joint allocation of
+    the bets passing min_edge, so table_from_scores then stakes
+    full_kelly * kelly_cap * bankroll with a total of at most max_exposure.
+
+    Each (event, market, line) is one group of exclusive outcomes; different
+    markets and lines of the same game are treated as independent.
+    """
+    out = scored.copy()
+    full = np.zeros(len(scored))
+    # same cut as table_from_scores, which compares the rounded edge %
+    bets = np.flatnonzero(np.round(scored["edge"].to_numpy(dtype=float) * 100, 2) >= min_edge * 100)
+    if len(bets) and kelly_cap > 0:
+        rows = scored.iloc[bets]
+        group = outcome_codes(rows, np.arange(len(rows)), ["event_id", "market", "line"])
+        full[bets] = joint_kelly(
+            group, rows["side"].to_numpy(dtype=object),
+            rows["true_prob"].to_numpy(dtype=float),
+            american_to_decimal_array(rows["price_american"].to_numpy(dtype=float)),
+            total=max_exposure / kelly_cap,
+        )
+    out["full_kelly"] = full
+    return out
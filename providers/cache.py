@@ -0,0 +1,178 @@
+from __future__ import annotations
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+class TTLCache:
+    """Thread-safe TTL cache shared by every Streamlit session in the process.
+
+    Concurrent misses on the same key are coalesced: one caller fetches, the rest
+    wait for its result. Empty results (the provider's failure value) are not stored.
+    Expired entries are swept out at most once per TTL, when a new one is stored.
+    With persist_path set, live entries are written to a JSON file on those sweeps
+    and at exit, and reloaded on start.
+    """
+
+    def __init__(self, ttl: float, persist_path: str | None = None):
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self._data = {}      # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._next_sweep = time.time() + ttl
+        self._dirty = False  # entries changed since the file was last written
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        if persist_path:
+            self._load()
+            atexit.register(self._save)
+
+    def get_or_fetch(self, key: str, fetch):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.time():
+                self.hits += 1
+                return entry[1]
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return fut.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            now = time.time()
+            if value:
+                self._data[key] = (now + self.ttl, value)
+                self._dirty = True
+            self._inflight.pop(key, None)
+            swept = bool(value) and now >= self._next_sweep
+            if swept:
+                self._sweep(now)
+        fut.set_result(value)
+        if swept and self.persist_path:
+            self._save()
+        return value
+
+    def _sweep(self, now: float):
+        """Drop expired entries; called with the lock held."""
+        self._data = {k: entry for k, entry in self._data.items() if entry[0] > now}
+        self._next_sweep = now + self.ttl
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._dirty = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._data),
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+    def _load(self):
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        self._data = {k: (exp, v) for k, (exp, v) in raw.items() if exp > now}
+
+    def _save(self):
+        """Write the live entries to persist_path, if any changed since the last write."""
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            snapshot = {k: list(entry) for k, entry in self._data.items() if entry[0] > now}
+            self._dirty = False
+        tmp = f"{self.persist_path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, self.persist_path)
+        except OSError:
+            pass
+
+class CachedOddsProvider:
+    """Drop-in wrapper for OddsAPIProvider that serves calls from a TTLCache."""
+
+    def __init__(self, provider, cache: TTLCache):
+        self.provider = provider
+        self.cache = cache
+
+    def _key(self, *parts) -> str:
+        p = self.provider
+        return ":".join([*map(str, parts), p.regions, p.markets, p.odds_format])
+
+    @property
+    def quota(self) -> dict:
+        """The wrapped provider's latest quota headers; cache hits don't change them."""
+        return self.provider.quota
+
+    def get_sports(self):
+        return self.cache.get_or_fetch(self._key("sports"), self.provider.get_sports)
+
+    def get_odds(self, sport_key: str):
+        return self.cache.get_or_fetch(self._key("odds", sport_key),
+                                       lambda: self.provider.get_odds(sport_key))
+
+    def fetch_many(self, sport_keys, max_workers=None):
+        sport_keys = list(dict.fromkeys(sport_keys))
+        if not sport_keys:
+            return {}
+        workers = min(max_workers or self.provider.max_workers, len(sport_keys))
+        contexts = [contextvars.copy_context() for _ in sport_keys]  # keep timings in the caller's run
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(zip(sport_keys, pool.map(lambda ctx, key: ctx.run(self.get_odds, key), contexts, sport_keys)))
+
+# ---------- SHARED INSTANCES ----------
+_shared_lock = threading.Lock()
+_shared_cache = None
+_providers = {}
+
+def shared_cache() -> TTLCache:
+    """Process-wide cache; TTL from REFRESH_SECONDS, optional file from ODDS_CACHE_PATH."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            ttl = float(os.getenv("REFRESH_SECONDS", "60"))
+            _shared_cache = TTLCache(ttl, persist_path=os.getenv("ODDS_CACHE_PATH") or None)
+        return _shared_cache
+
+def get_provider(api_key: str, regions="us", markets="h2h", odds_format="american", cached: bool = True):
+    """One cached provider (and connection pool) per configuration, reused across reruns.
+    cached=False returns the pooled provider without the shared TTL cache, for
+    callers that poll on their own schedule.
+    """
+    from providers.oddsapi_provider import OddsAPIProvider
+
+    key = (api_key, regions, markets, odds_format)
+    with _shared_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = _providers[key] = OddsAPIProvider(
+                api_key, regions=regions, markets=markets, odds_format=odds_format)
+    return CachedOddsProvider(provider, shared_cache()) if cached else provider
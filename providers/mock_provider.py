@@ -0,0 +1,112 @@
+"""Local stand-in for OddsAPIProvider, for exercising the scanner and poll scheduler offline.
+
+Events come in TheOddsAPI shape on a rolling schedule per sport, and their
+prices random-walk between calls: faster for volatile sports and as kickoff
+nears. Each odds call is charged markets x regions against a quota that is
+reported in `quota` like the real x-requests-* headers. Pass a clock to drive
+it through simulated time.
+"""
+from __future__ import annotations
+import math
+import time
+import numpy as np
+from ev_utils import decimal_to_american
+
+BOOKS = ["DraftKings", "FanDuel", "BetMGM", "Pinnacle"]
+TEAMS = [f"Team {c}" for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"]
+MARGIN = 0.045
+
+# sport_key -> hours to its first game, hours between games, and line volatility
+# (std of the home win probability per sqrt(hour), far from kickoff)
+DEFAULT_SPORTS = {
+    "basketball_nba": {"starts_in": 0.5, "spacing": 2.0, "volatility": 0.010},
+    "icehockey_nhl": {"starts_in": 4.0, "spacing": 3.0, "volatility": 0.004},
+    "americanfootball_nfl": {"starts_in": 60.0, "spacing": 24.0, "volatility": 0.002},
+    "soccer_epl": {"starts_in": 150.0, "spacing": 24.0, "volatility": 0.001},
+}
+
+def _american(prob: float) -> int:
+    return decimal_to_american(1.0 / min(max(prob, 0.01), 0.99))
+
+class MockOddsProvider:
+    def __init__(self, sports: dict | None = None, events_per_sport: int = 6, regions="us", markets="h2h",
+                 odds_format="american", quota: float = 20_000, clock=time.time, seed: int = 0):
+        self.sports = sports or DEFAULT_SPORTS
+        self.events_per_sport = events_per_sport
+        self.regions = regions
+        self.markets = markets
+        self.odds_format = odds_format
+        self.max_workers = 1
+        self.clock = clock
+        self.started = clock()
+        self.rng = np.random.default_rng(seed)
+        self.quota = {"remaining": float(quota), "used": 0.0, "last": 0.0, "at": self.started}
+        self.calls = {}   # sport_key -> odds calls served
+        self._lines = {}  # (sport_key, game number) -> [home logit, time of last move]
+
+    @property
+    def cost(self) -> int:
+        count = lambda s: len([p for p in s.split(",") if p.strip()])
+        return max(1, count(self.markets) * count(self.regions))
+
+    def get_sports(self):
+        return [{"key": k, "active": True, "has_outrights": False} for k in self.sports]
+
+    def _games(self, sport_key: str, now: float) -> list:
+        """(game number, commence time) of games from 3h ago up to events_per_sport ahead."""
+        spec = self.sports[sport_key]
+        first = self.started + spec["starts_in"] * 3600
+        spacing = spec["spacing"] * 3600
+        k = max(0, math.ceil((now - 3 * 3600 - first) / spacing))
+        return [(k + i, first + (k + i) * spacing) for i in range(self.events_per_sport)]
+
+    def _home_prob(self, sport_key: str, game: int, commence: float, now: float) -> float:
+        line = self._lines.get((sport_key, game))
+        if line is None:
+            line = self._lines[(sport_key, game)] = [float(self.rng.normal(0.2, 0.6)), now]
+        hours = max(now - line[1], 0.0) / 3600
+        to_start = max((commence - now) / 3600, 0.0)
+        sigma = self.sports[sport_key]["volatility"] * (1 + 3 * math.exp(-to_start / 6)) * math.sqrt(hours)
+        line[0] += float(self.rng.normal(0.0, 4 * sigma))  # ~4x: logit moves per probability point near 0.5
+        line[1] = now
+        return 1.0 / (1.0 + math.exp(-line[0]))
+
+    def get_odds(self, sport_key: str):
+        if sport_key not in self.sports or self.quota["remaining"] < self.cost:
+            return []
+        now = self.clock()
+        self.calls[sport_key] = self.calls.get(sport_key, 0) + 1
+        self.quota = {"remaining": self.quota["remaining"] - self.cost, "used": self.quota["used"] + self.cost,
+                      "last": float(self.cost), "at": now}
+        markets = [m.strip() for m in self.markets.split(",")]
+        events = []
+        for game, commence in self._games(sport_key, now):
+            p = self._home_prob(sport_key, game, commence, now)
+            home, away = TEAMS[(2 * game) % len(TEAMS)], TEAMS[(2 * game + 1) % len(TEAMS)]
+            books = []
+            for b, book in enumerate(BOOKS):
+                shade = ((game * 7 + b * 3) % 5 - 2) * 0.004  # fixed per book and game
+                ph, pa = p + MARGIN / 2 + shade, 1 - p + MARGIN / 2 - shade
+                quotes = []
+                if "h2h" in markets:
+                    quotes.append({"key": "h2h", "outcomes": [
+                        {"name": home, "price": _american(ph)}, {"name": away, "price": _american(pa)}]})
+                if "spreads" in markets:
+                    point = round((0.5 - p) * 24) + 0.5  # home spread, never a push
+                    quotes.append({"key": "spreads", "outcomes": [
+                        {"name": home, "price": _american(0.5 + MARGIN / 2 + shade), "point": point},
+                        {"name": away, "price": _american(0.5 + MARGIN / 2 - shade), "point": -point}]})
+                if "totals" in markets:
+                    quotes.append({"key": "totals", "outcomes": [
+                        {"name": "Over", "price": _american(0.5 + MARGIN / 2 + shade), "point": 220.5},
+                        {"name": "Under", "price": _american(0.5 + MARGIN / 2 - shade), "point": 220.5}]})
+                books.append({"key": book.lower(), "title": book, "markets": quotes})
+            events.append({
+                "id": f"{sport_key}-{game}", "sport_key": sport_key,
+                "commence_time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(commence)),
+                "home_team": home, "away_team": away, "bookmakers": books,
+            })
+        return events
+
+    def fetch_many(self, sport_keys, max_workers=None):
+        return {key: self.get_odds(key) for key in dict.fromkeys(sport_keys)}
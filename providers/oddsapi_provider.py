@@ -1,22 +1,103 @@
+import contextvars
 import requests
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from instrument import record
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_BACKOFF = 30.0  # seconds; caps a server's Retry-After as well as the exponential delay
+QUOTA_HEADERS = {"remaining": "x-requests-remaining", "used": "x-requests-used", "last": "x-requests-last"}
 
 class OddsAPIProvider:
-    def __init__(self, api_key: str, regions="us", markets="h2h", odds_format="american"):
+    def __init__(self, api_key: str, regions="us", markets="h2h", odds_format="american",
+                 timeout=10.0, max_workers=8, max_retries=3, backoff=0.5, session=None):
         self.api_key = api_key
         self.base_url = "https://api.the-odds-api.com/v4"
         self.regions = regions
         self.markets = markets
         self.odds_format = odds_format
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # one keep-alive pool shared by every call (and every fetch_many worker)
+        self.session = session or requests.Session()
+        self.quota = {}  # latest x-requests-* headers: remaining, used, last (cost of that call)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff_delay(self, attempt: int, resp) -> float:
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), MAX_BACKOFF)
+            except ValueError:
+                pass  # e.g. an HTTP-date: fall back to exponential backoff
+        return min(self.backoff * (2 ** attempt) * (0.5 + random.random()), MAX_BACKOFF)
+
+    def _read_quota(self, resp):
+        quota = {}
+        for key, header in QUOTA_HEADERS.items():
+            try:
+                quota[key] = float(resp.headers[header])
+            except (KeyError, TypeError, ValueError):
+                pass
+        if quota:
+            self.quota = {**quota, "at": time.time()}
+
+    def _get(self, path: str, **params):
+        """GET with a per-request timeout, retrying 429/5xx, connection errors and
+        unparseable 200 bodies with exponential backoff. Returns parsed JSON, or []
+        if the call never succeeds.
+        """
+        params["apiKey"] = self.api_key
+        resp = data = None
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+            except requests.RequestException:
+                resp = None
+            if resp is not None:
+                self._read_quota(resp)
+            if resp is not None and resp.status_code == 200:
+                try:
+                    data = resp.json()
+                    break
+                except ValueError:
+                    pass  # truncated or non-JSON body (e.g. a proxy error page): retry
+            elif resp is not None and resp.status_code not in RETRY_STATUSES:
+                break
+            if attempt < self.max_retries:
+                time.sleep(self._backoff_delay(attempt, resp))
+        if data is None:
+            record("http", time.perf_counter() - started, 0, path=path,
+                   status=resp.status_code if resp is not None else None, attempts=attempt + 1)
+            return []
+        record("http", time.perf_counter() - started, len(data), path=path, status=200, attempts=attempt + 1)
+        return data
 
     def get_sports(self):
-        url = f"{self.base_url}/sports/?apiKey={self.api_key}"
-        resp = requests.get(url)
-        return resp.json() if resp.status_code == 200 else []
+        return self._get("/sports/")
 
     def get_odds(self, sport_key: str):
-        url = (f"{self.base_url}/sports/{sport_key}/odds/"
-               f"?apiKey={self.api_key}&regions={self.regions}"
-               f"&markets={self.markets}&oddsFormat={self.odds_format}")
-        resp = requests.get(url)
-        return resp.json() if resp.status_code == 200 else []
+        return self._get(f"/sports/{sport_key}/odds/", regions=self.regions,
+                         markets=self.markets, oddsFormat=self.odds_format)
+
+    def fetch_many(self, sport_keys, max_workers=None):
+        """Fetch odds for several sports concurrently over the shared connection pool.
+        Returns {sport_key: events}; a sport that fails after retries maps to [].
+        """
+        sport_keys = list(dict.fromkeys(sport_keys))
+        if not sport_keys:
+            return {}
+        workers = min(max_workers or self.max_workers, len(sport_keys))
+        # each call runs in a copy of the caller's context, so its timings land in the caller's run
+        contexts = [contextvars.copy_context() for _ in sport_keys]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(lambda ctx, key: ctx.run(self.get_odds, key), contexts, sport_keys)
+            return dict(zip(sport_keys, results))
@@ -0,0 +1,233 @@
+"""Headless odds scanner.
+
+Polls the provider every REFRESH_SECONDS, scores the snapshot with ev_engine and
+publishes it to the local snapshot store, independent of any Streamlit session.
+
+    python -m scanner            # run forever
+    python -m scanner --once     # single scan, e.g. from cron
+    python -m scanner --budget 500   # adaptive: per-sport polling within 500 requests a day
+
+With a daily budget, sports are polled on their own schedule (poll_scheduler):
+often near kickoff and when lines move, rarely otherwise. PROVIDER=mock runs
+against providers.mock_provider instead of the network. With ALERT_SINKS set,
+every published board is also checked for edge alerts (see alerts).
+"""
+from __future__ import annotations
+import argparse
+import logging
+import os
+import time
+import pandas as pd
+from dotenv import load_dotenv
+from ev_engine import score_snapshot
+from odds_snapshot import (load_csv, make_provider, fetch_snapshot, market_keys, concat_snapshots, parse_times,
+                           snapshot_hash)
+from poll_scheduler import LIVE_HOURS, PollScheduler, request_cost
+from alerts import dispatcher_from_env
+import instrument
+import snapshot_store
+
+log = logging.getLogger("scanner")
+_published = {}  # store_dir -> snapshot_hash of the last snapshot scan_once published there
+
+def active_sports(provider) -> list:
+    return [s.get("key") for s in provider.get_sports()
+            if s.get("active", True) and not s.get("has_outrights", False)]
+
+def build_provider(provider_name: str, regions: str, markets):
+    if provider_name.lower() == "mock":
+        from providers.mock_provider import MockOddsProvider
+        return MockOddsProvider(regions=regions, markets=",".join(markets))
+    # no TTL cache: its TTL is REFRESH_SECONDS, the default poll interval, so every
+    # other scan would be served the previous response and republish it as new
+    return make_provider(regions, markets, cached=False)
+
+def scan_once(provider_name: str, regions: str, sport_keys=None, fallback_margin: float = 0.03,
+              store_dir: str | None = None, history_dir: str | None = None,
+              method: str = "proportional", alerts=None) -> dict:
+    """Fetch, score and publish one snapshot; returns the published metadata, or
+    None when it is the same as the last one published (nothing is written then).
+    Raises if the fetch came back empty, leaving the last published snapshot in place.
+    """
+    started = time.perf_counter()
+    if provider_name.lower() == "csv":
+        snapshot = load_csv(os.getenv("SCANNER_CSV", "sample_data/sample_odds.csv"))
+        sport_keys = sorted(snapshot["sport_key"].dropna().unique())
+    else:
+        markets = market_keys()
+        provider = build_provider(provider_name, regions, markets)
+        sport_keys = sport_keys or active_sports(provider)
+        snapshot = fetch_snapshot(provider, sport_keys, markets)
+    fetched = time.perf_counter()
+    if snapshot.empty:
+        # keep serving the previous snapshot rather than replacing it with nothing
+        raise RuntimeError(f"provider returned no odds for {len(sport_keys)} sports")
+    digest = snapshot_hash(snapshot)
+    if _published.get(store_dir or snapshot_store.STORE_DIR) == digest:
+        log.info("snapshot unchanged, not republished (%d rows)", len(snapshot))
+        return None
+
+    if history_dir:
+        import odds_history
+        odds_history.append(snapshot, root=history_dir)
+
+    with instrument.stage("score", rows=len(snapshot)):
+        scored = score_snapshot(snapshot, fallback_margin, method)
+    meta = snapshot_store.publish(scored, {
+        "provider": provider_name,
+        "sports": list(sport_keys),
+        "devig_method": method,
+        "fetch_seconds": round(fetched - started, 4),
+        "score_seconds": round(time.perf_counter() - fetched, 4),
+    }, store_dir=store_dir)
+    _published[store_dir or snapshot_store.STORE_DIR] = digest
+    if alerts is not None:
+        alerts.submit(scored)
+    log.info("published %d rows for %d sports (fetch %.2fs, score %.3fs)",
+             meta["rows"], len(sport_keys), meta["fetch_seconds"], meta["score_seconds"])
+    return meta
+
+def _compact_history(history_dir: str | None, compacted_for: str | None) -> str | None:
+    """Compact finished days once the UTC date rolls over; returns the day done."""
+    today = time.strftime("%Y-%m-%d", time.gmtime())
+    if history_dir and compacted_for != today:
+        import odds_history
+        try:
+            odds_history.compact(history_dir, before=today)
+            return today
+        except Exception:
+            log.exception("history compaction failed")
+    return compacted_for
+
+def run(interval: float, **kwargs):
+    """Scan on a fixed schedule; a failed scan is logged and retried next tick.
+    An unchanged snapshot only has its validity extended.
+    With history enabled, finished days are compacted once the UTC date rolls over.
+    """
+    compacted_for = None
+    while True:
+        started = time.monotonic()
+        try:
+            if scan_once(**kwargs) is None:
+                snapshot_store.extend(time.time() + 3 * interval, kwargs.get("store_dir"))
+        except Exception:
+            log.exception("scan failed")
+        compacted_for = _compact_history(kwargs.get("history_dir"), compacted_for)
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+def poll_once(scheduler: PollScheduler, provider, boards: dict, markets, provider_name: str = "",
+              fallback_margin: float = 0.03, store_dir: str | None = None, history_dir: str | None = None,
+              method: str = "proportional", alerts=None) -> dict | None:
+    """Fetch the sports the scheduler has due, rescore them into `boards`
+    (sport -> scored rows) and publish every board together. Returns the published
+    metadata, or None when nothing was due. An AlertDispatcher in `alerts` gets
+    the published board. Raises if there is nothing to publish, leaving the last
+    published snapshot in place to expire.
+    """
+    due = scheduler.due()
+    if not due:
+        return None
+    started = time.perf_counter()
+    try:
+        snapshot = fetch_snapshot(provider, due, markets)
+    except Exception:
+        log.exception("fetch failed for %s", ",".join(due))
+        snapshot = pd.DataFrame()
+    frames = dict(tuple(snapshot.groupby("sport_key", sort=False, observed=True))) if len(snapshot) else {}
+    cost = scheduler.record_fetch(due, frames, getattr(provider, "quota", None))
+    fetched = time.perf_counter()
+    if history_dir and len(snapshot):
+        import odds_history
+        odds_history.append(snapshot, root=history_dir)
+
+    # a sport that came back empty keeps its last board until its games are over
+    with instrument.stage("score", rows=len(snapshot)):
+        for sport, frame in frames.items():
+            boards[sport] = score_snapshot(frame, fallback_margin, method)
+    board = concat_snapshots(boards.values()) if boards else pd.DataFrame()
+    if len(board):
+        starts = parse_times(board["commence_time"])
+        board = board[~(starts < pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=LIVE_HOURS))]
+    if not len(board):
+        # like scan_once: an empty board would have the pages show "No data" instead of fetching
+        raise RuntimeError(f"no odds to publish after polling {','.join(due)}")
+    meta = snapshot_store.publish(board, {
+        "provider": provider_name,
+        "sports": list(boards),
+        "polled": due,
+        "devig_method": method,
+        "fetch_seconds": round(fetched - started, 4),
+        "score_seconds": round(time.perf_counter() - fetched, 4),
+        "requests": cost,
+        "budget_left": scheduler.budget.available(),
+        "valid_until": time.time() + 2 * scheduler.max_sleep,
+    }, store_dir=store_dir)
+    if alerts is not None:
+        alerts.submit(board)
+    log.info("polled %s for %.0f requests (%.0f left today), published %d rows",
+             ",".join(due), cost, meta["budget_left"], meta["rows"])
+    return meta
+
+def run_adaptive(daily_budget: float, min_seconds: float, provider_name: str, regions: str, sport_keys=None,
+                 store_dir: str | None = None, history_dir: str | None = None, **kwargs):
+    """Poll each sport when PollScheduler says it is due, spending at most
+    daily_budget requests per UTC day. Between polls the published snapshot is
+    kept valid so the pages don't fall back to fetching for themselves.
+    """
+    markets = market_keys()
+    provider = build_provider(provider_name, regions, markets)
+    scheduler = PollScheduler(sport_keys or active_sports(provider), daily_budget,
+                              cost=request_cost(markets, regions), min_seconds=min_seconds)
+    boards = {}
+    compacted_for = None
+    while True:
+        try:
+            if poll_once(scheduler, provider, boards, markets, provider_name, store_dir=store_dir,
+                         history_dir=history_dir, **kwargs) is None:
+                snapshot_store.extend(time.time() + 2 * scheduler.max_sleep, store_dir)
+        except Exception:
+            log.exception("poll failed")
+        compacted_for = _compact_history(history_dir, compacted_for)
+        time.sleep(scheduler.sleep_for())
+
+def main(argv=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="python -m scanner", description=__doc__.splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="scan once and exit")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("REFRESH_SECONDS", "60")))
+    parser.add_argument("--sports", default=os.getenv("SCANNER_SPORTS", ""),
+                        help="comma-separated sport keys (default: every active sport)")
+    parser.add_argument("--store", default=snapshot_store.STORE_DIR)
+    parser.add_argument("--history", default=os.getenv("HISTORY_DIR", ""),
+                        help="also append every snapshot to this Parquet history directory")
+    parser.add_argument("--budget", type=float, default=float(os.getenv("POLL_DAILY_BUDGET", "0")),
+                        help="provider requests per UTC day; polls each sport adaptively "
+                             "(--interval is then the shortest gap between polls of a sport)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if os.getenv("METRICS_PORT"):
+        instrument.serve_metrics(int(os.getenv("METRICS_PORT")))
+
+    kwargs = dict(
+        provider_name=os.getenv("PROVIDER", "csv"),
+        regions=os.getenv("REGIONS", "us"),
+        sport_keys=[s.strip() for s in args.sports.split(",") if s.strip()] or None,
+        fallback_margin=float(os.getenv("REF_FALLBACK_MARGIN", "0.03")),
+        store_dir=args.store,
+        history_dir=args.history or None,
+        method=os.getenv("DEVIG_METHOD", "proportional"),
+        alerts=dispatcher_from_env(),
+    )
+    try:
+        if args.once:
+            scan_once(**kwargs)
+        elif args.budget > 0 and kwargs["provider_name"].lower() != "csv":
+            run_adaptive(args.budget, args.interval, **kwargs)
+        else:
+            run(args.interval, **kwargs)
+    finally:
+        if kwargs["alerts"] is not None:
+            kwargs["alerts"].close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Score a large odds file from the command line, without Streamlit.
+
+    python -m score_file odds.csv --out picks.parquet --min-edge 0.02 --workers 4
+    python -m score_file events.jsonl --out picks.csv
+
+The input is read in chunks of whole events (sample_odds.csv schema, or JSONL
+with one provider event per line), scored with ev_engine in a process pool and
+written out as each chunk finishes, so memory stays flat however large the file.
+Rows come out sorted by kickoff and edge within each chunk.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from ev_engine import TABLE_COLUMNS, compute_table
+from odds_snapshot import flatten_events, normalize_frame, attach_reference
+
+CHUNK_ROWS = 100_000
+_EVENT_COLUMNS = ["sport_key", "sport", "commence_time", "home_team", "away_team"]
+
+# ---------- READERS ----------
+def _last_event(frame: pd.DataFrame) -> np.ndarray:
+    """Mask of the rows belonging to the same event as the last row."""
+    cols = ["event_id"] if "event_id" in frame.columns else [c for c in _EVENT_COLUMNS if c in frame.columns]
+    mask = np.ones(len(frame), dtype=bool)
+    for c in cols:
+        values = frame[c].to_numpy(dtype=object)
+        mask &= values == values[-1]
+    return mask
+
+def csv_chunks(path: str, chunk_rows: int = CHUNK_ROWS):
+    """DataFrames of about chunk_rows raw CSV rows that never split an event:
+    the trailing event of each chunk is held back and prepended to the next.
+    Assumes an event's rows are adjacent, as provider dumps write them.
+    """
+    carry = None
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""], chunksize=chunk_rows)
+    for chunk in reader:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        tail = _last_event(chunk)
+        start = len(tail) - np.argmin(tail[::-1]) if not tail.all() else 0
+        carry = chunk.iloc[start:]
+        if start:
+            yield chunk.iloc[:start]
+    if carry is not None and len(carry):
+        yield carry
+
+def jsonl_chunks(path: str, chunk_rows: int = CHUNK_ROWS):
+    """Lists of raw JSON lines holding about chunk_rows outcome quotes each.
+    Lines are parsed in the workers; here they are only counted roughly.
+    """
+    lines, rows = [], 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            lines.append(line)
+            rows += max(1, line.count('"price"'))
+            if rows >= chunk_rows:
+                yield lines
+                lines, rows = [], 0
+    if lines:
+        yield lines
+
+# ---------- SCORING ----------
+def score_chunk(chunk, params: dict) -> pd.DataFrame:
+    """Normalize one chunk (raw CSV frame or JSONL lines) and return its opportunities."""
+    if isinstance(chunk, pd.DataFrame):
+        snapshot = normalize_frame(chunk)
+    else:
+        snapshot = flatten_events([json.loads(line) for line in chunk], markets=params["markets"])
+    if params["reference"]:
+        snapshot = attach_reference(snapshot)
+    table = compute_table(snapshot, params["kelly_cap"], params["bankroll"],
+                          params["fallback_margin"], params["min_edge"], params["method"])
+    return table if not table.empty else pd.DataFrame(columns=TABLE_COLUMNS)
+
+def _results(chunks, params: dict, workers: int):
+    """Scored chunks in input order; at most 2 * workers chunks are in flight."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield score_chunk(chunk, params)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for chunk in chunks:
+            pending.append(pool.submit(score_chunk, chunk, params))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+# ---------- WRITERS ----------
+class CsvWriter:
+    def __init__(self, path: str):
+        self.file = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+        self.header = True
+
+    def write(self, table: pd.DataFrame):
+        header, self.header = self.header, False
+        table.to_csv(self.file, index=False, header=header)
+
+    def close(self):
+        if self.header:
+            pd.DataFrame(columns=TABLE_COLUMNS).to_csv(self.file, index=False)
+        if self.file is not sys.stdout:
+            self.file.close()
+
+class ParquetWriter:
+    def __init__(self, path: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        text = {"Date/Time", "Matchup", "Sportsbook", "Bet"}
+        self.schema = pa.schema([(c, pa.string() if c in text else pa.float64()) for c in TABLE_COLUMNS])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self._pa = pa
+
+    def write(self, table: pd.DataFrame):
+        self.writer.write_table(self._pa.Table.from_pandas(table, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+
+def open_writer(path: str, fmt: str | None = None):
+    fmt = fmt or ("parquet" if path.endswith((".parquet", ".pq")) else "csv")
+    return ParquetWriter(path) if fmt == "parquet" else CsvWriter(path)
+
+def score_file(src: str, out: str, params: dict, chunk_rows: int = CHUNK_ROWS,
+               workers: int = 1, fmt: str | None = None) -> dict:
+    """Stream src through the scorer into out; returns row counts and timing."""
+    is_jsonl = src.endswith((".jsonl", ".ndjson"))
+    chunks = jsonl_chunks(src, chunk_rows) if is_jsonl else csv_chunks(src, chunk_rows)
+    started = time.perf_counter()
+    writer = open_writer(out, fmt)
+    n_chunks = n_rows = 0
+    try:
+        for table in _results(chunks, params, workers):
+            n_chunks += 1
+            if len(table):
+                writer.write(table[TABLE_COLUMNS])
+                n_rows += len(table)
+    finally:
+        writer.close()
+    return {"chunks": n_chunks, "opportunities": n_rows, "seconds": round(time.perf_counter() - started, 3)}
+
+def main(argv=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="python -m score_file", description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="odds CSV (sample_odds.csv schema) or JSONL of provider events")
+    parser.add_argument("--out", default="-", help="output .csv or .parquet ('-' = CSV to stdout)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None)
+    parser.add_argument("--min-edge", type=float, default=float(os.getenv("MIN_EDGE", "0.02")))
+    parser.add_argument("--kelly-cap", type=float, default=float(os.getenv("KELLY_FRACTION", "0.25")))
+    parser.add_argument("--bankroll", type=float, default=1000.0)
+    parser.add_argument("--method", default=os.getenv("DEVIG_METHOD", "proportional"))
+    parser.add_argument("--markets", default=os.getenv("MARKETS", "h2h"),
+                        help="JSONL only: comma-separated market keys (default MARKETS)")
+    parser.add_argument("--no-reference", action="store_true",
+                        help="don't fill missing reference prices from REF_BOOK / the consensus")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=1, help="processes to score chunks in (0 = all cores)")
+    args = parser.parse_args(argv)
+
+    params = {
+        "kelly_cap": args.kelly_cap,
+        "bankroll": args.bankroll,
+        "fallback_margin": float(os.getenv("REF_FALLBACK_MARGIN", "0.03")),
+        "min_edge": args.min_edge,
+        "method": args.method,
+        "markets": tuple(m.strip() for m in args.markets.split(",") if m.strip()),
+        "reference": not args.no_reference,
+    }
+    workers = args.workers or os.cpu_count() or 1
+    stats = score_file(args.input, args.out, params, args.chunk_rows, workers, args.format)
+    print(f"{stats['opportunities']} opportunities from {stats['chunks']} chunks "
+          f"in {stats['seconds']:.2f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
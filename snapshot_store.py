@@ -0,0 +1,85 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+import pandas as pd
+
+# Where the scanner publishes its latest scored snapshot and where pages read it.
+STORE_DIR = os.getenv("SNAPSHOT_STORE", ".scanner")
+SNAPSHOT_FILE = "latest.pkl"
+META_FILE = "latest.json"
+
+_lock = threading.Lock()
+_latest = {}  # store_dir -> (mtime_ns, frame, meta)
+
+def _write_atomic(path: str, write):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+def _write_meta(meta: dict, store_dir: str):
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    _write_atomic(os.path.join(store_dir, META_FILE), write)
+
+def publish(scored: pd.DataFrame, meta: dict, store_dir: str | None = None) -> dict:
+    """Atomically replace the latest snapshot; readers never see a partial file.
+    A "valid_until" timestamp in meta keeps it fresh for readers past their max_age.
+    """
+    store_dir = store_dir or STORE_DIR
+    os.makedirs(store_dir, exist_ok=True)
+    meta = {**meta, "published_at": time.time(), "rows": len(scored)}
+    _write_atomic(os.path.join(store_dir, SNAPSHOT_FILE), scored.to_pickle)
+    _write_meta(meta, store_dir)
+    return meta
+
+def extend(valid_until: float, store_dir: str | None = None) -> dict | None:
+    """Move the latest snapshot's valid_until without rewriting it, e.g. when the
+    scanner is alive but nothing was due for a refresh.
+    """
+    store_dir = store_dir or STORE_DIR
+    meta = read_meta(store_dir)
+    if meta is not None:
+        meta["valid_until"] = valid_until
+        _write_meta(meta, store_dir)
+    return meta
+
+def read_meta(store_dir: str | None = None) -> dict | None:
+    try:
+        with open(os.path.join(store_dir or STORE_DIR, META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def read_latest(store_dir: str | None = None, max_age: float | None = None):
+    """Latest published (frame, meta), or (None, None) if missing or older than max_age
+    and past its valid_until.
+
+    The frame is loaded once per published file and shared by every session in
+    the process, so a rerun only costs a stat() call. Treat it as read-only.
+    """
+    store_dir = store_dir or STORE_DIR
+    path = os.path.join(store_dir, SNAPSHOT_FILE)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, None
+    if max_age is not None and time.time() - mtime / 1e9 > max_age:
+        if (read_meta(store_dir) or {}).get("valid_until", 0) < time.time():
+            return None, None
+
+    with _lock:
+        cached = _latest.get(store_dir)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+    try:
+        frame = pd.read_pickle(path)
+    except Exception:
+        return None, None
+    meta = read_meta(store_dir) or {}
+    frame.attrs["published_at"] = meta.get("published_at")
+    with _lock:
+        _latest[store_dir] = (mtime, frame, meta)
+    return frame, meta
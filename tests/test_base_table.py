@@ -0,0 +1,53 @@
+"""BaseTable.view must reproduce the original per-row compute_table_scalar."""
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import events, csv_frame
+from ev_engine import base_table, compute_table_scalar
+from odds_snapshot import SAMPLE_CSV, load_csv, normalize_frame
+
+SETTINGS = [(0.25, 1000.0, 0.0), (0.25, 1000.0, 0.02), (1.0, 250.0, 0.05), (0.0, 1000.0, -1.0)]
+
+def _plain(table: pd.DataFrame) -> pd.DataFrame:
+    """Table with object text columns and float numbers, for an exact comparison."""
+    out = table.reset_index(drop=True).copy()
+    for c in out.columns:
+        if pd.api.types.is_numeric_dtype(out[c].dtype):
+            out[c] = out[c].astype(float)
+        else:
+            out[c] = out[c].astype(object)
+    return out
+
+def assert_same_table(view: pd.DataFrame, scalar: pd.DataFrame):
+    """Same rows in the same (Date/Time, Edge %) order. The scalar sort isn't stable,
+    so rows tied on both keys may come in any order.
+    """
+    view, scalar = _plain(view), _plain(scalar)
+    order = ["Date/Time", "Edge %"]
+    pd.testing.assert_frame_equal(view[order], scalar[order])
+    columns = list(view.columns)
+    pd.testing.assert_frame_equal(view.sort_values(columns, ignore_index=True),
+                                  scalar.sort_values(columns, ignore_index=True))
+
+@pytest.fixture(scope="module", params=["sample", "synthetic"])
+def snapshot(request):
+    if request.param == "sample":
+        return load_csv(SAMPLE_CSV)
+    # two-way markets only: compute_table_scalar predates the N-way de-vig
+    two_way = [ev for ev in events(2_000, seed=7) if not ev["sport_key"].startswith("soccer")]
+    return normalize_frame(csv_frame(two_way).astype(str))
+
+@pytest.mark.parametrize("kelly_cap,bankroll,min_edge", SETTINGS)
+def test_view_matches_scalar(snapshot, kelly_cap, bankroll, min_edge):
+    view = base_table(snapshot, 0.03).view(kelly_cap, bankroll, min_edge)
+    scalar = compute_table_scalar(snapshot, kelly_cap, bankroll, 0.03, min_edge)
+    assert len(view) == len(scalar)
+    assert_same_table(view, scalar)
+
+def test_view_filters_match_filtered_input(snapshot):
+    books = sorted(snapshot["book"].dropna().unique())[:2]
+    sport = sorted(snapshot["sport_key"].dropna().unique())[0]
+    view = base_table(snapshot, 0.03).view(0.25, 1000.0, 0.0, books=books, sports=[sport])
+    kept = snapshot[np.asarray(snapshot["book"].isin(books) & (snapshot["sport_key"] == sport))]
+    scalar = compute_table_scalar(kept, 0.25, 1000.0, 0.03, 0.0)
+    assert_same_table(view, scalar)
@@ -1,4 +1,16 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
 import streamlit as st
+import instrument
+from snapshot_store import read_latest
+from odds_snapshot import (load_csv, make_provider, snapshot_from_events, flatten_events, market_keys,
+                           snapshot_hash, SnapshotError, SAMPLE_CSV)
+from ev_engine import BaseTable, base_table
+from odds_delta import IncrementalTable, table_changes
 
 def use_global_style():
     st.markdown(
@@ -141,3 +153,303 @@ def footer():
         """,
         unsafe_allow_html=True,
     )
+
+def scanner_snapshot():
+    """(frame, meta) of the scanner's latest snapshot, or (None, None) when none is fresh."""
+    return read_latest(max_age=3 * float(os.getenv("REFRESH_SECONDS", "60")))
+
+# ---------- SHARED SNAPSHOTS ----------
+_snapshots = OrderedDict()  # (source..., reference settings) -> (payload, snapshot), most recent last
+_snapshots_lock = threading.Lock()
+MAX_SNAPSHOTS = 8
+REFERENCE_SETTINGS = ("REF_BOOK", "REF_CONSENSUS", "REF_WEIGHTS", "DEVIG_METHOD")
+
+def _shared_snapshot(source: tuple, payload, build) -> pd.DataFrame:
+    """build() once per source, handing every rerun and session the same frame so
+    its snapshot_hash and scored base are reused as well. An API source is reused
+    only while `payload` is the very object it was built from: the shared TTL
+    cache returns the same list until the entry expires.
+    """
+    key = source + tuple(os.getenv(k, "") for k in REFERENCE_SETTINGS)
+    with _snapshots_lock:
+        cached = _snapshots.get(key)
+        if cached is not None and cached[0] is payload:
+            _snapshots.move_to_end(key)
+            return cached[1]
+    df = build()
+    with _snapshots_lock:
+        _snapshots[key] = (payload, df)
+        _snapshots.move_to_end(key)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return df
+
+def fetch_odds(provider_name: str, regions: str, label: str = "Sport (live from API)") -> pd.DataFrame:
+    """Load the normalized odds snapshot for a page, picking the sport in the sidebar.
+    A fresh snapshot published by the background scanner wins over fetching here.
+    """
+    scanned, meta = scanner_snapshot()
+    if scanned is not None and len(scanned):  # an empty scanner board falls back to fetching here
+        age = time.time() - meta.get("published_at", time.time())
+        st.sidebar.caption(f"Scanner snapshot: {len(scanned)} rows, updated {age:.0f}s ago")
+        return scanned
+
+    if provider_name.lower() == "csv":
+        stat = os.stat(SAMPLE_CSV)
+        return _shared_snapshot(("csv", SAMPLE_CSV, stat.st_mtime_ns, stat.st_size), None,
+                                lambda: load_csv(SAMPLE_CSV))
+    try:
+        markets = market_keys()
+        provider = make_provider(regions, markets)
+    except SnapshotError as e:
+        st.error(str(e))
+        return pd.DataFrame()
+
+    sports = provider.get_sports()
+    chosen = st.sidebar.selectbox(label, options=[s.get("key") for s in sports])
+    if not chosen:
+        return flatten_events([])
+    with instrument.stage("fetch") as s:
+        events = provider.get_odds(chosen)
+        s["rows"] = len(events)
+    return _shared_snapshot(("api", regions, chosen, markets), events,
+                            lambda: snapshot_from_events(events, markets))
+
+# ---------- SCORED BASE ----------
+_bases = OrderedDict()  # (snapshot hash, fallback margin, method) -> BaseTable, most recent last
+_live = {}              # (fallback margin, method) -> IncrementalTable
+_bases_lock = threading.Lock()
+MAX_BASES = 4
+
+def scored_base(df: pd.DataFrame, fallback_margin: float, method: str) -> BaseTable:
+    """The snapshot's BaseTable, scored once per snapshot hash and shared by every
+    session; sidebar settings are then applied with BaseTable.view. Scanner
+    snapshots arrive scored, and raw ones go through a shared IncrementalTable,
+    so a new poll rescores only the events whose prices moved.
+    """
+    key = (snapshot_hash(df), fallback_margin, method)
+    with _bases_lock:
+        base = _bases.get(key)
+        if base is not None:
+            _bases.move_to_end(key)
+            return base
+        with instrument.stage("score_base", rows=len(df)):
+            if "full_kelly" in df.columns:
+                base = base_table(df, fallback_margin, method)
+            else:
+                live = _live.get((fallback_margin, method))
+                if live is None:
+                    live = _live[(fallback_margin, method)] = IncrementalTable(fallback_margin, method)
+                live.update(df)
+                base = live.base
+        _bases[key] = base
+        while len(_bases) > MAX_BASES:
+            _bases.popitem(last=False)
+    return base
+
+# ---------- DIAGNOSTICS ----------
+def _profile_next():
+    st.session_state["_profile_next"] = True
+
+def diagnostics_start():
+    """Call first on a page: starts timing this rerun, and profiling it when
+    "Profile next rerun" was clicked. Returns (timings, profiler or None).
+    """
+    port = os.getenv("METRICS_PORT")
+    if port:
+        instrument.serve_metrics(int(port))
+    timings = instrument.begin()
+    # a rerun cut short (st.rerun, a widget change mid-run, an error) never reached
+    # diagnostics_panel: stop its profiler before starting another on this thread
+    diagnostics_stop(st.session_state.get("_profiler"))
+    profiler = instrument.RunProfiler() if st.session_state.pop("_profile_next", False) else None
+    if profiler is not None:
+        st.session_state["_profiler"] = profiler
+    return timings, profiler
+
+def diagnostics_stop(profiler=None):
+    """Stop this rerun's profiler and keep its report; a no-op once stopped. Pages
+    call it before an early st.stop(), and diagnostics_start catches any other exit.
+    """
+    if profiler is not None and profiler.running:
+        st.session_state.pop("_profiler", None)
+        st.session_state["_profile_report"] = profiler.stop()
+
+def diagnostics_panel(timings, profiler=None):
+    """Call last on a page: stage timings and the last profile in a sidebar expander."""
+    diagnostics_stop(profiler)
+    if not st.sidebar.toggle("Diagnostics", value=os.getenv("DIAGNOSTICS", "0") == "1"):
+        return
+    with st.sidebar.expander("Stage timings", expanded=True):
+        rows = timings.summary()
+        if rows:
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        st.caption(f"Rerun total: {timings.elapsed * 1000:.0f} ms")
+        st.button("Profile next rerun", on_click=_profile_next)
+        report = st.session_state.get("_profile_report")
+        if report:
+            st.code(report["text"][:6000], language=None)
+            st.download_button(f"Download {report['kind']} profile", data=report["data"],
+                               file_name=report["file"])
+
+# ---------- TABLES ----------
+PAGE_SIZES = [25, 50, 100, 250]
+CHANGE_COLORS = {"new": "rgba(46, 204, 113, 0.25)", "up": "rgba(52, 152, 219, 0.25)",
+                 "down": "rgba(231, 76, 60, 0.2)"}
+
+def _search_mask(table: pd.DataFrame, text: str) -> np.ndarray:
+    """Rows where any text column contains `text` (case-insensitive); each
+    distinct value is tested once.
+    """
+    mask = np.zeros(len(table), dtype=bool)
+    for c in table.columns:
+        if pd.api.types.is_numeric_dtype(table[c].dtype):
+            continue
+        codes, uniques = pd.factorize(table[c])
+        hit = pd.Series(uniques, dtype=object).astype(str).str.contains(text, case=False, regex=False).to_numpy()
+        mask |= (codes >= 0) & hit[np.maximum(codes, 0)]
+    return mask
+
+def _sort_order(column: pd.Series, descending: bool) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(column.dtype):
+        keys = column.to_numpy(dtype=float)
+    else:
+        keys, uniques = pd.factorize(column, sort=True)
+        keys = np.where(keys < 0, len(uniques), keys)  # missing values last
+    return np.argsort(-keys if descending else keys, kind="stable")
+
+def _first_page(key: str):
+    st.session_state[f"{key}_page"] = 1
+
+def table_view(table: pd.DataFrame, key: str, sort_by: str | None = None,
+               descending: bool = False, status: np.ndarray | None = None) -> pd.DataFrame:
+    """Render one page of `table` with search, sort and paging controls, all
+    applied here on the server so only the visible rows are sent to the browser.
+    `status` (a CHANGE_COLORS key or "" per row) tints the rows that changed.
+    Returns the searched and sorted (unpaged) frame, e.g. for export.
+    """
+    columns = list(table.columns)
+    c1, c2, c3, c4 = st.columns([3, 2, 1, 1])
+    reset = {"on_change": _first_page, "args": (key,)}
+    text = c1.text_input("Search", key=f"{key}_search", placeholder="team, book, sport…", **reset)
+    sort_by = c2.selectbox("Sort by", ["(default)"] + columns, key=f"{key}_sort",
+                           index=columns.index(sort_by) + 1 if sort_by in columns else 0, **reset)
+    descending = c3.toggle("Descending", value=descending, key=f"{key}_desc", **reset)
+    page_size = c4.selectbox("Rows", PAGE_SIZES, index=1, key=f"{key}_rows", **reset)
+
+    view, rows = table, np.arange(len(table))
+    if text.strip():
+        keep = _search_mask(view, text.strip())
+        view, rows = view[keep], rows[keep]
+    if sort_by in columns:
+        order = _sort_order(view[sort_by], descending)
+        view, rows = view.iloc[order], rows[order]
+
+    n_pages = max(1, -(-len(view) // page_size))
+    page = 1
+    if n_pages > 1:
+        if st.session_state.get(f"{key}_page", 1) > n_pages:
+            st.session_state[f"{key}_page"] = n_pages  # the search or page size shrank the table
+        page = int(st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, key=f"{key}_page"))
+    start = (page - 1) * page_size
+    shown = view.iloc[start:start + page_size]
+    if status is not None and (status[rows[start:start + page_size]] != "").any():
+        shown = _tinted(shown, status[rows[start:start + page_size]])
+    st.dataframe(shown, use_container_width=True, hide_index=True)
+    st.caption(f"Rows {min(start + 1, len(view))}–{min(start + page_size, len(view))} of {len(view)}"
+               + (f" (filtered from {len(table)})" if len(view) != len(table) else ""))
+    return view
+
+def _tinted(page: pd.DataFrame, status: np.ndarray):
+    """Styler colouring each row of a (small) page by its change status."""
+    colors = [f"background-color: {CHANGE_COLORS[s]}" if s else "" for s in status]
+    return page.style.apply(lambda col: colors, axis=0)
+
+_exports = OrderedDict()  # (cache key, format) -> bytes, most recent last
+_exports_lock = threading.Lock()
+MAX_EXPORTS = 8
+
+def export_bytes(table: pd.DataFrame, cache_key, fmt: str = "csv") -> bytes:
+    """CSV or Parquet bytes for `table`, built once per (cache_key, fmt) and
+    shared by every session. cache_key must identify the table's contents, e.g.
+    (snapshot_hash(df), the page's filter settings).
+    """
+    key = (cache_key, fmt)
+    with _exports_lock:
+        if key in _exports:
+            _exports.move_to_end(key)
+            return _exports[key]
+    with instrument.stage(f"to_{fmt}", rows=len(table)):
+        data = table.to_parquet(index=False) if fmt == "parquet" else table.to_csv(index=False).encode("utf-8")
+    with _exports_lock:
+        _exports[key] = data
+        while len(_exports) > MAX_EXPORTS:
+            _exports.popitem(last=False)
+    return data
+
+def export_buttons(table: pd.DataFrame, cache_key, file_stem: str, key: str):
+    """CSV and Parquet download buttons whose files are only built when clicked."""
+    formats = [("csv", "CSV", "text/csv"), ("parquet", "Parquet", "application/vnd.apache.parquet")]
+    for col, (fmt, label, mime) in zip(st.columns(len(formats)), formats):
+        make = lambda fmt=fmt: export_bytes(table, cache_key, fmt)
+        try:
+            col.download_button(f"Download {label}", data=make, file_name=f"{file_stem}.{fmt}",
+                                mime=mime, key=f"{key}_{fmt}")
+        except Exception:
+            # Streamlit without deferred downloads: build the file on an explicit click
+            if col.button(f"Prepare {label}", key=f"{key}_{fmt}_prepare"):
+                col.download_button(f"Download {label}", data=make(), file_name=f"{file_stem}.{fmt}",
+                                    mime=mime, key=f"{key}_{fmt}")
+
+# ---------- LIVE BOARD ----------
+LIVE_SECONDS = float(os.getenv("LIVE_SECONDS", "0.5"))
+MAX_CHANGES = 25
+
+def fragment(func, run_every: float | None = None):
+    """func as a Streamlit fragment: its own widgets, and the run_every timer,
+    rerun only func and redraw only what it drew, not the whole page.
+    """
+    make = getattr(st, "fragment", None) or st.experimental_fragment
+    return make(func, run_every=run_every)
+
+def board_table(key: str, snapshot: str, settings: tuple, build) -> tuple:
+    """(table, status) for a board refreshed by a fragment timer. build() runs once
+    per snapshot and settings, so a tick without a new snapshot is a dict lookup.
+    status marks rows new / up / down against the table this session showed for
+    the previous snapshot (odds_delta.table_changes); changing a setting clears it.
+    """
+    board = st.session_state.setdefault(f"{key}_board", {"snapshot": None, "settings": None})
+    if board["snapshot"] == snapshot and board["settings"] == settings:
+        return board["table"], board["status"]
+    follows = board["snapshot"] is not None and board["settings"] == settings
+    table = build()
+    with instrument.stage("changes", rows=len(table)):
+        status = table_changes(board["table"] if follows else None, table)
+    board.update(snapshot=snapshot, settings=settings, table=table, status=status, shown=False)
+    return table, status
+
+def board_latency(key: str, published_at: float | None) -> float | None:
+    """Seconds from the scanner publishing the board's snapshot to this session
+    first drawing it, recorded once per snapshot as stage "live_latency". Call
+    after rendering the table.
+    """
+    board = st.session_state.get(f"{key}_board")
+    if board is None:
+        return None
+    if not board["shown"]:
+        board["shown"] = True
+        board["latency"] = time.time() - published_at if published_at else None
+        if board["latency"] is not None:
+            instrument.record("live_latency", board["latency"])
+    return board["latency"]
+
+def changes_strip(table: pd.DataFrame, status: np.ndarray):
+    """Only the rows that changed with the latest snapshot, best edge first."""
+    changed = np.flatnonzero(status != "")
+    if not len(changed):
+        return
+    counts = pd.Series(status[changed]).value_counts()
+    st.caption("Latest changes: " + " · ".join(f"{counts.get(s, 0)} {s}" for s in CHANGE_COLORS))
+    top = changed[np.argsort(-table["Edge %"].to_numpy(dtype=float)[changed], kind="stable")[:MAX_CHANGES]]
+    st.dataframe(_tinted(table.iloc[top].assign(Change=status[top]), status[top]),
+                 use_container_width=True, hide_index=True)